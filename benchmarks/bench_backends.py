@@ -0,0 +1,81 @@
+"""
+Compares the throughput of the parser backends (see xml_stream.backends) on synthetic corpora of every shape,
+reading the records as elements and as dicts.
+
+Usage: python benchmarks/bench_backends.py [--size-mb 20] [--shapes employees wide ...]
+
+Each case runs in a fresh interpreter so that the peak RSS is its own. The elements of the lxml backend are lxml
+elements, built in C with only the end events of the records reaching Python.
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import SHAPES, write_corpus  # noqa: E402
+from xml_stream import read_xml_file, get_available_backends  # noqa: E402
+
+CASES = ('elements', 'dicts')
+
+
+def run_case(backend: str, case: str, file_path: str, records_tag: str) -> dict:
+    """Reads every record of the file with the backend in the given case and returns the measurements"""
+    start = time.perf_counter()
+    number_of_records = sum(1 for _ in read_xml_file(
+        file_path, records_tag=records_tag, to_dict=case == 'dicts', backend=backend))
+    seconds = time.perf_counter() - start
+
+    return {
+        'seconds': seconds,
+        'records': number_of_records,
+        'mb_per_second': os.path.getsize(file_path) / 2 ** 20 / seconds,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def main():
+    """Builds the corpora, runs every case in a subprocess and prints a table of the results"""
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--size-mb', type=float, default=20)
+    arg_parser.add_argument('--shapes', nargs='+', choices=sorted(SHAPES), default=list(SHAPES))
+    arg_parser.add_argument('--run-case', nargs=4, metavar=('BACKEND', 'CASE', 'FILE', 'RECORDS_TAG'),
+                            help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.run_case:
+        print(json.dumps(run_case(*args.run_case)))
+        return
+
+    backends = get_available_backends()
+    print('{:<11} {:<9} {:<8} {:>9} {:>8} {:>8} {:>10} {:>12}'.format(
+        'shape', 'case', 'backend', 'records', 'seconds', 'MB/s', 'RSS (MB)', 'vs etree'))
+
+    temp_folder = tempfile.mkdtemp()
+    try:
+        for shape in args.shapes:
+            file_path = os.path.join(temp_folder, '{}.xml'.format(shape))
+            write_corpus(file_path, args.size_mb, shape=shape)
+
+            for case in CASES:
+                baseline_seconds = None
+                for backend in backends:
+                    result = json.loads(subprocess.check_output([
+                        sys.executable, __file__, '--run-case', backend, case, file_path, SHAPES[shape].records_tag]))
+                    baseline_seconds = baseline_seconds or result['seconds']
+
+                    print('{:<11} {:<9} {:<8} {:>9} {:>8.2f} {:>8.1f} {:>10.1f} {:>11.2f}x'.format(
+                        shape, case, backend, result['records'], result['seconds'], result['mb_per_second'],
+                        result['peak_rss_mb'], baseline_seconds / result['seconds']))
+    finally:
+        shutil.rmtree(temp_folder)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Compares streaming decompression inside read_xml_file against decompressing to disk first and parsing the result.
+
+Usage: python benchmarks/bench_compression.py [--size-mb 50] [--chunk-size 65536]
+
+Each case runs in a fresh interpreter so that the reported peak RSS is not polluted by the other cases.
+"""
+import argparse
+import bz2
+import gzip
+import json
+import lzma
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import write_corpus  # noqa: E402
+from xml_stream import read_xml_file  # noqa: E402
+from xml_stream._sources import open_xml_file  # noqa: E402
+
+COMPRESSORS = {'gz': gzip.open, 'bz2': bz2.open, 'xz': lzma.open}
+
+
+def run_case(mode: str, file_path: str, chunk_size: int) -> dict:
+    """Reads every record of the file in the given mode and returns the measurements"""
+    temp_folder = tempfile.mkdtemp()
+    peak_disk = 0
+    start = time.perf_counter()
+
+    try:
+        if mode == 'stream':
+            path_to_parse = file_path
+        else:
+            path_to_parse = os.path.join(temp_folder, 'decompressed.xml')
+            with open_xml_file(file_path) as compressed_file, open(path_to_parse, 'wb') as decompressed_file:
+                shutil.copyfileobj(compressed_file, decompressed_file, chunk_size)
+            peak_disk = os.path.getsize(path_to_parse)
+
+        number_of_records = 0
+        for _ in read_xml_file(path_to_parse, records_tag='employees', chunk_size=chunk_size):
+            number_of_records += 1
+    finally:
+        shutil.rmtree(temp_folder)
+
+    return {
+        'seconds': time.perf_counter() - start,
+        'records': number_of_records,
+        'peak_extra_disk_bytes': peak_disk,
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def main():
+    """Builds the corpus, runs every case in a subprocess and prints a table of the results"""
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--size-mb', type=float, default=50)
+    arg_parser.add_argument('--chunk-size', type=int, default=64 * 1024)
+    arg_parser.add_argument('--run-case', nargs=2, metavar=('MODE', 'FILE'), help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.run_case:
+        print(json.dumps(run_case(args.run_case[0], args.run_case[1], args.chunk_size)))
+        return
+
+    temp_folder = tempfile.mkdtemp()
+    try:
+        plain_file_path = os.path.join(temp_folder, 'corpus.xml')
+        write_corpus(plain_file_path, args.size_mb)
+        xml_size = os.path.getsize(plain_file_path)
+
+        print('{:<6} {:<11} {:>10} {:>10} {:>16} {:>14}'.format(
+            'format', 'mode', 'seconds', 'MB/s', 'extra disk (MB)', 'peak RSS (MB)'))
+
+        for extension, open_compressed in COMPRESSORS.items():
+            compressed_file_path = '{}.{}'.format(plain_file_path, extension)
+            with open(plain_file_path, 'rb') as plain_file, open_compressed(compressed_file_path, 'wb') as output:
+                shutil.copyfileobj(plain_file, output)
+
+            for mode in ('stream', 'decompress'):
+                output = subprocess.check_output([
+                    sys.executable, __file__, '--chunk-size', str(args.chunk_size),
+                    '--run-case', mode, compressed_file_path])
+                result = json.loads(output)
+                print('{:<6} {:<11} {:>10.2f} {:>10.1f} {:>16.1f} {:>14.1f}'.format(
+                    extension, mode, result['seconds'], xml_size / result['seconds'] / 2 ** 20,
+                    result['peak_extra_disk_bytes'] / 2 ** 20, result['peak_rss_kb'] / 1024))
+    finally:
+        shutil.rmtree(temp_folder)
+
+
+if __name__ == '__main__':
+    main()
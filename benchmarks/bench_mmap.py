@@ -0,0 +1,116 @@
+"""
+Compares the buffered read path of read_xml_file against its memory-mapped path (use_mmap=True), for several
+feed (chunk) sizes, on a file already in the page cache ('warm') and on a file evicted from it first ('cold'),
+which is how every page of a file larger than the RAM is read.
+
+Usage: python benchmarks/bench_mmap.py [--size-mb 50] [--chunk-sizes 16384 65536 262144 1048576] [--to-dict]
+
+Each case runs in a fresh interpreter. The read syscalls and bytes copied by them come from /proc/self/io and the
+page faults from getrusage, so they are only reported on Linux.
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import write_corpus  # noqa: E402
+from xml_stream import read_xml_file  # noqa: E402
+
+
+def read_io_counters() -> dict:
+    """Returns the I/O counters of the current process e.g. {'syscr': ..., 'rchar': ...}, empty if unavailable"""
+    try:
+        with open('/proc/self/io') as io_file:
+            return {name: int(value) for name, value in (line.split(':') for line in io_file)}
+    except OSError:
+        return {}
+
+
+def evict_from_page_cache(file_path: str):
+    """Drops the pages of the file from the page cache, if the platform allows it"""
+    if hasattr(os, 'posix_fadvise'):
+        with open(file_path, 'rb') as xml_file:
+            os.fsync(xml_file.fileno())
+            os.posix_fadvise(xml_file.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def run_case(mode: str, cache: str, file_path: str, chunk_size: int, to_dict: bool) -> dict:
+    """Reads every record of the file in the given mode and returns the measurements"""
+    if cache == 'cold':
+        evict_from_page_cache(file_path)
+    else:
+        with open(file_path, 'rb') as xml_file:
+            while xml_file.read(1 << 20):
+                pass
+
+    io_before = read_io_counters()
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    start = time.perf_counter()
+
+    number_of_records = sum(1 for _ in read_xml_file(
+        file_path, records_tag='employees', to_dict=to_dict, chunk_size=chunk_size, use_mmap=mode == 'mmap'))
+
+    seconds = time.perf_counter() - start
+    usage_after = resource.getrusage(resource.RUSAGE_SELF)
+    io_after = read_io_counters()
+
+    return {
+        'seconds': seconds,
+        'records': number_of_records,
+        'read_syscalls': io_after.get('syscr', 0) - io_before.get('syscr', 0),
+        'read_bytes': io_after.get('rchar', 0) - io_before.get('rchar', 0),
+        'minor_faults': usage_after.ru_minflt - usage_before.ru_minflt,
+        'major_faults': usage_after.ru_majflt - usage_before.ru_majflt,
+        'peak_rss_kb': usage_after.ru_maxrss,
+    }
+
+
+def main():
+    """Builds the corpus, runs every case in a subprocess and prints a table of the results"""
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--size-mb', type=float, default=50)
+    arg_parser.add_argument('--chunk-sizes', type=int, nargs='+', default=[16 * 1024, 64 * 1024, 256 * 1024, 2 ** 20])
+    arg_parser.add_argument('--to-dict', action='store_true')
+    arg_parser.add_argument('--run-case', nargs=4, metavar=('MODE', 'CACHE', 'FILE', 'CHUNK_SIZE'),
+                            help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.run_case:
+        mode, cache, file_path, chunk_size = args.run_case
+        print(json.dumps(run_case(mode, cache, file_path, int(chunk_size), args.to_dict)))
+        return
+
+    temp_folder = tempfile.mkdtemp()
+    try:
+        file_path = os.path.join(temp_folder, 'corpus.xml')
+        write_corpus(file_path, args.size_mb)
+        size_in_mb = os.path.getsize(file_path) / 2 ** 20
+
+        print('{:<5} {:<5} {:>10} {:>8} {:>8} {:>12} {:>12} {:>10} {:>10} {:>10}'.format(
+            'cache', 'mode', 'chunk size', 'seconds', 'MB/s', 'read calls', 'read (MB)', 'minor flt', 'major flt',
+            'RSS (MB)'))
+
+        for cache in ('warm', 'cold'):
+            for chunk_size in args.chunk_sizes:
+                for mode in ('read', 'mmap'):
+                    command = [sys.executable, __file__, '--run-case', mode, cache, file_path, str(chunk_size)]
+                    if args.to_dict:
+                        command.append('--to-dict')
+                    result = json.loads(subprocess.check_output(command))
+                    print('{:<5} {:<5} {:>10} {:>8.2f} {:>8.1f} {:>12} {:>12.1f} {:>10} {:>10} {:>10.1f}'.format(
+                        cache, mode, chunk_size, result['seconds'], size_in_mb / result['seconds'],
+                        result['read_syscalls'], result['read_bytes'] / 2 ** 20, result['minor_faults'],
+                        result['major_faults'], result['peak_rss_kb'] / 1024))
+    finally:
+        shutil.rmtree(temp_folder)
+
+
+if __name__ == '__main__':
+    main()
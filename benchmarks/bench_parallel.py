@@ -0,0 +1,59 @@
+"""
+Compares read_xml_file against read_xml_file_parallel with an increasing number of workers.
+
+Usage: python benchmarks/bench_parallel.py [--size-mb 50] [--to-dict] [--task-size 4194304]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import write_corpus  # noqa: E402
+from xml_stream import read_xml_file, read_xml_file_parallel  # noqa: E402
+
+
+def time_reader(reader, *args, **kwargs):
+    """Returns (seconds, number of records) taken to consume the iterator returned by the reader"""
+    start = time.perf_counter()
+    number_of_records = sum(1 for _ in reader(*args, **kwargs))
+    return time.perf_counter() - start, number_of_records
+
+
+def main():
+    """Builds the corpus and prints the throughput of the sequential and parallel readers"""
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--size-mb', type=float, default=50)
+    arg_parser.add_argument('--task-size', type=int, default=4 * 1024 * 1024)
+    arg_parser.add_argument('--to-dict', action='store_true')
+    args = arg_parser.parse_args()
+
+    temp_folder = tempfile.mkdtemp()
+    try:
+        file_path = os.path.join(temp_folder, 'corpus.xml')
+        write_corpus(file_path, args.size_mb)
+        size_in_mb = os.path.getsize(file_path) / 2 ** 20
+
+        seconds, number_of_records = time_reader(read_xml_file, file_path, 'employees', to_dict=args.to_dict)
+        print('{:<24} {:>8} records {:>8.2f}s {:>8.1f} MB/s {:>6.2f}x'.format(
+            'read_xml_file', number_of_records, seconds, size_in_mb / seconds, 1))
+        sequential_seconds = seconds
+
+        workers = 1
+        while workers <= (os.cpu_count() or 1):
+            seconds, number_of_records = time_reader(
+                read_xml_file_parallel, file_path, 'employees', to_dict=args.to_dict, workers=workers,
+                task_size=args.task_size)
+            print('{:<24} {:>8} records {:>8.2f}s {:>8.1f} MB/s {:>6.2f}x'.format(
+                'parallel ({} workers)'.format(workers), number_of_records, seconds, size_in_mb / seconds,
+                sequential_seconds / seconds))
+            workers *= 2
+    finally:
+        shutil.rmtree(temp_folder)
+
+
+if __name__ == '__main__':
+    main()
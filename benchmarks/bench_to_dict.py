@@ -0,0 +1,50 @@
+"""
+Measures the speed of converting records to dicts with XmlDictElement, on records with many repeated children.
+
+Usage: python benchmarks/bench_to_dict.py [--repeated 500] [--common 20] [--records 50]
+"""
+import argparse
+import os
+import sys
+import time
+from xml.etree import ElementTree
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from xml_stream import XmlDictElement  # noqa: E402
+
+
+def build_record(number_of_repeated: int, number_of_common: int) -> bytes:
+    """Returns a record with number_of_repeated repeated children and number_of_common unique siblings"""
+    common = ''.join(
+        '<common{0} kind="shared"><name>Common {0}</name><code>{0}</code></common{0}>'.format(index)
+        for index in range(number_of_common))
+    repeated = ''.join(
+        '<bio first_name="First{0}" last_name="Last{0}">Person {0}<age>{0}</age></bio>'.format(index)
+        for index in range(number_of_repeated))
+    return '<employees><team>Marketing</team>{}{}</employees>'.format(common, repeated).encode('utf-8')
+
+
+def main():
+    """Converts the same record many times and prints the conversion throughput"""
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--repeated', type=int, default=500)
+    arg_parser.add_argument('--common', type=int, default=20)
+    arg_parser.add_argument('--records', type=int, default=50)
+    args = arg_parser.parse_args()
+
+    record = build_record(args.repeated, args.common)
+    # parse every record up front so that only the conversion is timed
+    elements = [ElementTree.fromstring(record) for _ in range(args.records)]
+
+    start = time.perf_counter()
+    for element in elements:
+        XmlDictElement(element)
+    seconds = time.perf_counter() - start
+
+    print('{} records of {} repeated and {} common children converted in {:.3f}s: {:.1f} records/s'.format(
+        args.records, args.repeated, args.common, seconds, args.records / seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Deterministic generator of synthetic XML corpora for the benchmarks.
+
+Every shape is a records generator plus the tag of its records and the document around them, so the same
+size and seed always give the same bytes:
+
+- employees: records with a few unique children and many repeated bio children, like the README's example
+- wide: records with many attributes and many unique children
+- deep: records whose value sits under a long chain of nested elements
+- namespaces: namespaced records whose children use prefixes declared on the root and on the record
+- large_text: records holding large text nodes
+"""
+import random
+from typing import Iterator, NamedTuple, Callable
+
+_WORDS = ('lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur', 'adipiscing', 'elit', 'sed', 'do', 'eiusmod',
+          'tempor', 'incididunt', 'ut', 'labore', 'et', 'dolore', 'magna', 'aliqua', '&amp;', '&lt;tag&gt;')
+
+
+class CorpusShape(NamedTuple):
+    """A shape of corpus: the tag of its records, what comes before and after them, and their generator"""
+    records_tag: str
+    head: bytes
+    tail: bytes
+    generate_records: Callable[[int, int], Iterator[bytes]]
+
+
+def _words(rand: random.Random, number_of_words: int) -> str:
+    """Returns a text of random words"""
+    return ' '.join(rand.choice(_WORDS) for _ in range(number_of_words))
+
+
+def generate_employees_records(number_of_records: int, seed: int = 0) -> Iterator[bytes]:
+    """Yields the bytes of company records shaped like the employees/bio pattern of the README"""
+    rand = random.Random(seed)
+
+    for index in range(number_of_records):
+        bios = ''.join(
+            '<bio first_name="First{0}" last_name="Last{1}">First{0} Last{1}</bio>'.format(
+                rand.randrange(10 ** 6), rand.randrange(10 ** 6))
+            for _ in range(rand.randrange(1, 8)))
+        yield (
+            '<employees id="{}"><team>Team {}</team>'
+            '<location name="Branch {}" address="Kampala, Uganda"/>{}</employees>'.format(
+                index, rand.randrange(100), rand.randrange(100), bios)
+        ).encode('utf-8')
+
+
+def generate_wide_records(number_of_records: int, seed: int = 0) -> Iterator[bytes]:
+    """Yields records with 20 attributes and 50 unique children"""
+    rand = random.Random(seed)
+
+    for index in range(number_of_records):
+        attributes = ''.join(' a{}="{}"'.format(position, rand.randrange(10 ** 6)) for position in range(20))
+        children = ''.join('<field{0}>{1}</field{0}>'.format(position, _words(rand, 2)) for position in range(50))
+        yield '<record id="{}"{}>{}</record>'.format(index, attributes, children).encode('utf-8')
+
+
+def generate_deep_records(number_of_records: int, seed: int = 0) -> Iterator[bytes]:
+    """Yields records whose values sit 30 elements deep"""
+    rand = random.Random(seed)
+    depth = 30
+
+    for index in range(number_of_records):
+        opening = ''.join('<level{0} depth="{0}">'.format(level) for level in range(depth))
+        closing = ''.join('</level{}>'.format(level) for level in reversed(range(depth)))
+        yield '<record id="{}">{}<value>{}</value>{}</record>'.format(
+            index, opening, rand.randrange(10 ** 9), closing).encode('utf-8')
+
+
+def generate_namespaced_records(number_of_records: int, seed: int = 0) -> Iterator[bytes]:
+    """Yields records using prefixes declared on the root element and on the record itself"""
+    rand = random.Random(seed)
+
+    for index in range(number_of_records):
+        yield (
+            '<a:entry xmlns:d="urn:example:d" a:id="{}"><b:title>{}</b:title>'
+            '<c:value c:unit="kg">{}</c:value><c:value c:unit="g">{}</c:value><d:note>{}</d:note></a:entry>'.format(
+                index, _words(rand, 3), rand.randrange(1000), rand.randrange(1000), _words(rand, 5))
+        ).encode('utf-8')
+
+
+def generate_large_text_records(number_of_records: int, seed: int = 0) -> Iterator[bytes]:
+    """Yields records with a text node of 5 000 to 50 000 words"""
+    rand = random.Random(seed)
+
+    for index in range(number_of_records):
+        yield '<doc id="{}"><title>{}</title><body>{}</body></doc>'.format(
+            index, _words(rand, 4), _words(rand, rand.randrange(5000, 50000))).encode('utf-8')
+
+
+SHAPES = {
+    'employees': CorpusShape(
+        'employees', b'<?xml version="1.0" encoding="UTF-8"?>\n<company><staff>', b'</staff></company>\n',
+        generate_employees_records),
+    'wide': CorpusShape('record', b'<dataset>', b'</dataset>\n', generate_wide_records),
+    'deep': CorpusShape('record', b'<dataset>', b'</dataset>\n', generate_deep_records),
+    'namespaces': CorpusShape(
+        '{urn:example:a}entry',
+        b'<a:feed xmlns:a="urn:example:a" xmlns:b="urn:example:b" xmlns:c="urn:example:c">', b'</a:feed>\n',
+        generate_namespaced_records),
+    'large_text': CorpusShape('doc', b'<library>', b'</library>\n', generate_large_text_records),
+}
+
+
+def write_corpus(file_path: str, size_in_mb: float, seed: int = 0, shape: str = 'employees') -> int:
+    """Writes an XML file of about size_in_mb megabytes of records of the given shape and returns their number"""
+    corpus_shape = SHAPES[shape]
+    target_size = int(size_in_mb * 1024 * 1024)
+    written = 0
+    number_of_records = 0
+
+    with open(file_path, 'wb') as xml_file:
+        written += xml_file.write(corpus_shape.head)
+        for record in corpus_shape.generate_records(10 ** 12, seed):
+            if written >= target_size:
+                break
+            written += xml_file.write(record)
+            number_of_records += 1
+        xml_file.write(corpus_shape.tail)
+
+    return number_of_records
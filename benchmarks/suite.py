@@ -0,0 +1,197 @@
+"""
+Runs the benchmark suite on synthetic corpora of every shape and saves the results as JSON, or compares two
+saved results and flags the regressions.
+
+Usage:
+    python benchmarks/suite.py run [--size-mb 20] [--seed 0] [--shapes employees wide ...] [--output results.json]
+    python benchmarks/suite.py compare baseline.json results.json [--threshold 0.1]
+
+For each shape (see corpus.py) and entry point (read_xml_file, read_xml_string), three cases are run, each in a fresh
+interpreter so that the peak RSS is its own:
+
+- elements: records read as xml.etree.ElementTree.Element objects i.e. the parse alone
+- dicts: records read with to_dict=True
+- stages: records read as elements and converted with XmlDictElement, timing the parse and the conversion apart
+
+compare exits with status 1 if any case got slower (in records/s) or bigger (in peak RSS) by more than the threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import SHAPES, write_corpus  # noqa: E402
+from xml_stream import read_xml_file, read_xml_string, XmlDictElement  # noqa: E402
+
+ENTRY_POINTS = ('read_xml_file', 'read_xml_string')
+CASES = ('elements', 'dicts', 'stages')
+
+
+def run_case(entry_point: str, case: str, file_path: str, records_tag: str) -> dict:
+    """Reads every record of the file with the entry point in the given case and returns the measurements"""
+    if entry_point == 'read_xml_string':
+        with open(file_path, 'rb') as xml_file:
+            xml_data = xml_file.read()
+        read_records = read_xml_string
+    else:
+        xml_data = file_path
+        read_records = read_xml_file
+
+    number_of_records = 0
+    convert_seconds = 0.0
+    start = time.perf_counter()
+
+    if case == 'stages':
+        clock = time.perf_counter
+        for element in read_records(xml_data, records_tag=records_tag):
+            convert_start = clock()
+            XmlDictElement(element)
+            convert_seconds += clock() - convert_start
+            number_of_records += 1
+    else:
+        for _ in read_records(xml_data, records_tag=records_tag, to_dict=case == 'dicts'):
+            number_of_records += 1
+
+    seconds = time.perf_counter() - start
+    result = {
+        'seconds': seconds,
+        'records': number_of_records,
+        'records_per_second': number_of_records / seconds,
+        'mb_per_second': os.path.getsize(file_path) / 2 ** 20 / seconds,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+    if case == 'stages':
+        result['parse_seconds'] = seconds - convert_seconds
+        result['convert_seconds'] = convert_seconds
+
+    return result
+
+
+def get_commit() -> str:
+    """Returns the current git commit of the repository, or '' if it is not known"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def run(args: argparse.Namespace):
+    """Builds the corpora, runs every case in a subprocess, prints a table of the results and saves them"""
+    results = {
+        'metadata': {
+            'commit': get_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'size_mb': args.size_mb,
+            'seed': args.seed,
+        },
+        'cases': {},
+    }
+
+    print('{:<11} {:<16} {:<9} {:>9} {:>12} {:>8} {:>10} {:>9} {:>10}'.format(
+        'shape', 'entry point', 'case', 'records', 'records/s', 'MB/s', 'RSS (MB)', 'parse (s)', 'convert (s)'))
+
+    temp_folder = tempfile.mkdtemp()
+    try:
+        for shape in args.shapes:
+            file_path = os.path.join(temp_folder, '{}.xml'.format(shape))
+            write_corpus(file_path, args.size_mb, seed=args.seed, shape=shape)
+
+            for entry_point in ENTRY_POINTS:
+                for case in CASES:
+                    output = subprocess.check_output([
+                        sys.executable, __file__, 'run-case', entry_point, case, file_path, SHAPES[shape].records_tag])
+                    result = json.loads(output)
+                    results['cases']['{}/{}/{}'.format(shape, entry_point, case)] = result
+
+                    print('{:<11} {:<16} {:<9} {:>9} {:>12.1f} {:>8.1f} {:>10.1f} {:>9} {:>10}'.format(
+                        shape, entry_point, case, result['records'], result['records_per_second'],
+                        result['mb_per_second'], result['peak_rss_mb'],
+                        '{:.2f}'.format(result['parse_seconds']) if case == 'stages' else '',
+                        '{:.2f}'.format(result['convert_seconds']) if case == 'stages' else ''))
+    finally:
+        shutil.rmtree(temp_folder)
+
+    with open(args.output, 'w') as results_file:
+        json.dump(results, results_file, indent=2)
+    print('Results saved to {}'.format(args.output))
+
+
+def compare(args: argparse.Namespace) -> int:
+    """Prints the change of every case between two saved results and returns 1 if any of them regressed, else 0"""
+    with open(args.baseline) as baseline_file, open(args.results) as results_file:
+        baseline = json.load(baseline_file)
+        results = json.load(results_file)
+
+    print('{:<44} {:>14} {:>14} {:>9} {:>9}  {}'.format(
+        'case', 'base records/s', 'records/s', 'speed', 'RSS', ''))
+
+    regressions = 0
+    for name, result in results['cases'].items():
+        baseline_result = baseline['cases'].get(name)
+        if baseline_result is None:
+            continue
+
+        speed_change = result['records_per_second'] / baseline_result['records_per_second'] - 1
+        rss_change = result['peak_rss_mb'] / baseline_result['peak_rss_mb'] - 1
+        is_regression = speed_change < -args.threshold or rss_change > args.threshold
+        regressions += is_regression
+
+        print('{:<44} {:>14.1f} {:>14.1f} {:>+8.1%} {:>+8.1%}  {}'.format(
+            name, baseline_result['records_per_second'], result['records_per_second'], speed_change, rss_change,
+            'REGRESSION' if is_regression else ''))
+
+    if baseline['metadata'].get('size_mb') != results['metadata'].get('size_mb'):
+        print('Warning: the results were measured on corpora of different sizes')
+
+    print('{} regression(s) beyond {:.0%}'.format(regressions, args.threshold))
+    return 1 if regressions else 0
+
+
+def main():
+    """Parses the command line and runs the requested command"""
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = arg_parser.add_subparsers(dest='command')
+    commands.required = True
+
+    run_parser = commands.add_parser('run', help='run the suite and save the results')
+    run_parser.add_argument('--size-mb', type=float, default=20)
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--shapes', nargs='+', choices=sorted(SHAPES), default=list(SHAPES))
+    run_parser.add_argument('--output', default='benchmark_results.json')
+
+    compare_parser = commands.add_parser('compare', help='compare saved results against a baseline')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('results')
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help='relative change beyond which a case is flagged, 0.1 by default')
+
+    run_case_parser = commands.add_parser('run-case')
+    run_case_parser.add_argument('entry_point', choices=ENTRY_POINTS)
+    run_case_parser.add_argument('case', choices=CASES)
+    run_case_parser.add_argument('file_path')
+    run_case_parser.add_argument('records_tag')
+
+    args = arg_parser.parse_args()
+
+    if args.command == 'run-case':
+        print(json.dumps(run_case(args.entry_point, args.case, args.file_path, args.records_tag)))
+    elif args.command == 'run':
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+
+if __name__ == '__main__':
+    main()
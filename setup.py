@@ -28,6 +28,11 @@ setup(
     packages=find_packages(exclude=("test",)),
     include_package_data=True,
     install_requires=[],
+    extras_require={
+        "parquet": ["pyarrow"],
+        "zstd": ["zstandard"],
+        "lxml": ["lxml"],
+    },
     entry_points={
     },
 )
\ No newline at end of file
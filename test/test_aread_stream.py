@@ -0,0 +1,110 @@
+"""Tests for the aread_xml_stream function"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, main
+from xml.etree.ElementTree import Element
+
+from xml_stream import aread_xml_stream, read_xml_file
+
+
+class TestAreadXmlStream(TestCase):
+    """Test class for the aread_xml_stream function"""
+
+    def setUp(self) -> None:
+        """Initialize some variables"""
+        test_folder_path = os.path.dirname(__file__)
+        self.small_mock_file_path = os.path.join(test_folder_path, 'small_mock.xml')
+        with open(self.small_mock_file_path, 'rb') as xml_file:
+            self.xml_bytes = xml_file.read()
+        self.expected_output = list(read_xml_file(self.small_mock_file_path, records_tag='employees', to_dict=True))
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self) -> None:
+        """Close the event loop"""
+        self.loop.close()
+
+    def collect(self, source, **kwargs):
+        """Returns the list of the records read asynchronously from the source"""
+        async def collect_records():
+            return [record async for record in aread_xml_stream(source, records_tag='employees', **kwargs)]
+
+        return self.loop.run_until_complete(collect_records())
+
+    async def iter_chunks(self, chunk_size=10):
+        """Yields the XML bytes a few at a time, giving control back to the event loop in between"""
+        for start in range(0, len(self.xml_bytes), chunk_size):
+            await asyncio.sleep(0)
+            yield self.xml_bytes[start:start + chunk_size]
+
+    def test_aread_xml_stream_from_async_iterable(self):
+        """Reads records from an asynchronous iterable of bytes chunks"""
+        output = self.collect(self.iter_chunks(), to_dict=True)
+        self.assertListEqual(output, self.expected_output)
+
+        elements = self.collect(self.iter_chunks())
+        self.assertIsInstance(elements[0], Element)
+        self.assertListEqual([element.findtext('team') for element in elements], ['Marketing', 'Customer Service'])
+
+    def test_aread_xml_stream_from_stream_reader(self):
+        """Reads records from an asyncio.StreamReader, chunk_size bytes at a time"""
+        async def collect_records():
+            stream_reader = asyncio.StreamReader()
+            records = []
+
+            async def write():
+                for start in range(0, len(self.xml_bytes), 100):
+                    stream_reader.feed_data(self.xml_bytes[start:start + 100])
+                    await asyncio.sleep(0)
+                stream_reader.feed_eof()
+
+            writer = asyncio.ensure_future(write())
+            async for record in aread_xml_stream(stream_reader, records_tag='employees', to_dict=True, chunk_size=64):
+                records.append(record)
+            await writer
+            return records
+
+        self.assertListEqual(self.loop.run_until_complete(collect_records()), self.expected_output)
+
+    def test_aread_xml_stream_yields_records_as_they_complete(self):
+        """Yields each record before the rest of the source has arrived"""
+        first_record_end = self.xml_bytes.index(b'</employees>') + len(b'</employees>')
+        received_sizes = []
+
+        async def iter_chunks():
+            for start in range(0, len(self.xml_bytes), 50):
+                received_sizes.append(start + 50)
+                yield self.xml_bytes[start:start + 50]
+
+        async def get_first_record():
+            async for record in aread_xml_stream(iter_chunks(), records_tag='employees', to_dict=True):
+                return record, received_sizes[-1]
+
+        record, received_size = self.loop.run_until_complete(get_first_record())
+        self.assertDictEqual(record, self.expected_output[0])
+        self.assertLess(received_size, first_record_end + 50)
+
+    def test_aread_xml_stream_converts_in_executor(self):
+        """Converts the records to dicts in the given executor"""
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            output = self.collect(self.iter_chunks(), to_dict=True, convert_in_executor=True, executor=executor)
+        self.assertListEqual(output, self.expected_output)
+
+        output = self.collect(self.iter_chunks(), to_dict=True, convert_in_executor=True,
+                              fields=['team'], where={'team': 'Marketing'})
+        self.assertListEqual(output, [{'team': 'Marketing'}])
+
+    def test_aread_xml_stream_from_sync_source(self):
+        """Falls back to the synchronous sources of read_xml_stream"""
+        self.assertListEqual(self.collect(self.xml_bytes, to_dict=True, chunk_size=32), self.expected_output)
+
+
+    def test_aread_xml_stream_rejects_unsupported_arguments(self):
+        """Raises a TypeError for the arguments it does not support, like batches and stats, and for misspelled ones"""
+        for kwargs in ({'batch_size': 10, 'columnar': True}, {'stats': object()}, {'to_dic': True}):
+            with self.assertRaises(TypeError):
+                self.collect(self.xml_bytes, **kwargs)
+
+
+if __name__ == '__main__':
+    main()
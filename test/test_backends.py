@@ -0,0 +1,198 @@
+"""Conformance tests of the parser backends: every available backend should give the same records"""
+import asyncio
+import os
+import tracemalloc
+from unittest import TestCase, main
+from xml.etree.ElementTree import Element
+
+from xml_stream import (read_xml_string, read_xml_file, aread_xml_stream, ParserBackend, register_backend,
+                        get_available_backends)
+from xml_stream.backends import ElementTreeBackend, get_backend
+
+_CATALOG_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<!-- a catalog -->
+<catalog xmlns="urn:example:catalog" xmlns:p="urn:example:price">
+  <?render mode="fast"?>
+  <items>
+    <item id="1" p:currency="UGX">
+      <name>Pen &amp; paper</name>
+      <!-- a comment inside a record -->
+      <p:price>100</p:price>
+      <description>Some <b>bold</b> and <i>italic</i> text &#233;</description>
+      <item id="1.1"><name>Refill</name></item>
+    </item>
+    <item id="2"><name><![CDATA[<raw> text]]></name><tag>a</tag><tag>b</tag></item>
+    text after the items
+  </items>
+  <order id="o1"><item id="o1.1"/></order>
+  <item id="3"/>
+</catalog>
+'''
+
+_ITEM = '{urn:example:catalog}item'
+_ORDER = '{urn:example:catalog}order'
+
+
+def to_tree(element):
+    """Returns the tag, attributes, text and sub elements (with their tails) of an element as plain values"""
+    return (element.tag, dict(element.attrib), element.text,
+            [to_tree(child) + (child.tail,) for child in element])
+
+
+def to_comparable(records):
+    """Returns the records, batches or pairs of records and tags or checkpoints, with the elements as plain values"""
+    comparable_records = []
+    for record in records:
+        if isinstance(record, list):
+            comparable_records.append(to_comparable(record))
+        elif isinstance(record, tuple) and isinstance(record[0], str):
+            comparable_records.append((record[0], to_comparable([record[1]])[0]))
+        elif isinstance(record, tuple):
+            # a (record, checkpoint) pair
+            comparable_records.append((to_comparable([record[0]])[0], record[1]))
+        elif isinstance(record, dict):
+            comparable_records.append(record)
+        else:
+            comparable_records.append(to_tree(record))
+    return comparable_records
+
+
+class TestBackends(TestCase):
+    """Test class for the conformance of the parser backends"""
+
+    def setUp(self) -> None:
+        """Initialize some variables"""
+        test_folder_path = os.path.dirname(__file__)
+        self.small_mock_file_path = os.path.join(test_folder_path, 'small_mock.xml')
+        self.backends = get_available_backends()
+
+    def test_available_backends(self):
+        """The standard library's backend is always available, and comes first"""
+        self.assertEqual(self.backends[0], 'etree')
+
+    def test_read_xml_string(self):
+        """Every backend gives the same records as the standard library's, whatever the arguments"""
+        arguments = [
+            {}, {'to_dict': True}, {'fields': ['@id', 'name']}, {'to_dict': True, 'fields': ['@id', 'name']},
+            {'where': {'@id': '2'}}, {'to_dict': True, 'where': {'@id': '2'}}, {'batch_size': 2},
+            {'to_dict': True, 'batch_size': 2}, {'max_buffered_elements': 100}, {'to_dict': True, 'columnar': True,
+                                                                                 'batch_size': 2},
+        ]
+        records_tags = [_ITEM, {_ITEM, _ORDER}, '/{urn:example:catalog}catalog/{urn:example:catalog}items/' + _ITEM]
+
+        for records_tag in records_tags:
+            for kwargs in arguments:
+                if kwargs.get('columnar') and not isinstance(records_tag, str):
+                    continue
+
+                for chunk_size in (7, 1024):
+                    expected_records = to_comparable(read_xml_string(
+                        _CATALOG_XML, records_tag=records_tag, chunk_size=chunk_size, backend='etree', **kwargs))
+                    self.assertTrue(expected_records)
+
+                    for backend in self.backends:
+                        records = to_comparable(read_xml_string(
+                            _CATALOG_XML, records_tag=records_tag, chunk_size=chunk_size, backend=backend, **kwargs))
+                        self.assertListEqual(records, expected_records,
+                                             msg='{} {} {}'.format(backend, records_tag, kwargs))
+
+    def test_read_xml_file(self):
+        """Every backend gives the same records of a file, including with checkpoints and memory maps"""
+        for to_dict in (False, True):
+            for kwargs in ({}, {'use_mmap': True}, {'checkpoints': True}):
+                expected_records = to_comparable(read_xml_file(
+                    self.small_mock_file_path, records_tag='employees', to_dict=to_dict, backend='etree', **kwargs))
+
+                for backend in self.backends:
+                    records = to_comparable(read_xml_file(
+                        self.small_mock_file_path, records_tag='employees', to_dict=to_dict, backend=backend,
+                        **kwargs))
+                    self.assertListEqual(records, expected_records)
+
+    def test_aread_xml_stream(self):
+        """Every backend gives the same records asynchronously"""
+        async def collect_records(**kwargs):
+            return [record async for record in aread_xml_stream([_CATALOG_XML], records_tag=_ITEM, **kwargs)]
+
+        loop = asyncio.new_event_loop()
+        try:
+            for to_dict in (False, True):
+                expected_records = to_comparable(loop.run_until_complete(
+                    collect_records(to_dict=to_dict, backend='etree')))
+
+                for backend in self.backends:
+                    records = to_comparable(loop.run_until_complete(collect_records(to_dict=to_dict, backend=backend)))
+                    self.assertListEqual(records, expected_records)
+        finally:
+            loop.close()
+
+    def test_flat_memory(self):
+        """Every backend releases the elements that ended outside of records"""
+        def generate_document(number_of_records):
+            yield b'<company><metadata>'
+            for index in range(number_of_records):
+                yield '<entry id="{0}">{0}</entry>'.format(index).encode()
+            yield b'</metadata><staff><department>'
+            for index in range(number_of_records):
+                yield '<employee id="{0}"><name>Name {0}</name></employee> text '.format(index).encode()
+            yield b'</department></staff></company>'
+
+        def get_peak_memory(number_of_records, **kwargs):
+            tracemalloc.start()
+            try:
+                for _ in read_xml_string(generate_document(number_of_records), records_tag='employee', **kwargs):
+                    pass
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            return peak
+
+        for backend in self.backends:
+            for to_dict in (False, True):
+                small_peak = get_peak_memory(1000, backend=backend, to_dict=to_dict)
+                large_peak = get_peak_memory(10000, backend=backend, to_dict=to_dict)
+                self.assertLess(large_peak, 1.5 * small_peak + 64 * 1024, msg='{} {}'.format(backend, to_dict))
+
+    def test_backend_selection(self):
+        """Unknown backends raise a ValueError, and registered backends can be used and preferred"""
+        with self.assertRaises(ValueError):
+            list(read_xml_string(_CATALOG_XML, records_tag=_ITEM, backend='unknown'))
+
+        # the standard library's backend is the default, even for the reads lxml could filter
+        for filters_tags in (False, True):
+            self.assertIsInstance(get_backend('auto', filters_tags=filters_tags), ElementTreeBackend)
+        self.assertIsInstance(next(read_xml_string(_CATALOG_XML, records_tag=_ITEM)), Element)
+
+        class ExpatBackend(ElementTreeBackend):
+            """A custom backend"""
+            name = 'expat'
+            number_of_parsers = 0
+
+            def create_pull_parser(self, tags=None):
+                ExpatBackend.number_of_parsers += 1
+                return super().create_pull_parser(tags)
+
+        register_backend(ExpatBackend(), preferred=True)
+        try:
+            self.assertEqual(get_available_backends()[0], 'expat')
+            self.assertIsInstance(get_backend('auto', filters_tags=True), ExpatBackend)
+            # reads that can not be filtered use the standard library's parser
+            self.assertIsInstance(get_backend('auto', filters_tags=False), ElementTreeBackend)
+
+            records = list(read_xml_string(_CATALOG_XML, records_tag=_ITEM))
+            self.assertEqual(ExpatBackend.number_of_parsers, 1)
+            self.assertListEqual(to_comparable(records),
+                                 to_comparable(read_xml_string(_CATALOG_XML, records_tag=_ITEM, backend='etree')))
+        finally:
+            register_backend(ElementTreeBackend(), preferred=True)
+            from xml_stream.backends import _BACKENDS
+            del _BACKENDS['expat']
+
+        self.assertEqual(get_available_backends()[0], 'etree')
+
+        with self.assertRaises(ValueError):
+            register_backend(ParserBackend())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Tests for the batch_size and columnar arguments of the readers"""
+import os
+from unittest import TestCase, main
+from xml.etree.ElementTree import Element
+
+from xml_stream import read_xml_file, read_xml_string
+
+
+class TestBatches(TestCase):
+    """Test class for the batched outputs of the readers"""
+
+    def setUp(self) -> None:
+        """Initialize some variables"""
+        test_folder_path = os.path.dirname(__file__)
+        self.small_mock_file_path = os.path.join(test_folder_path, 'small_mock.xml')
+        self.products_xml = '<products>{}</products>'.format(''.join(
+            '<product id="{0}"><name>Product {0}</name>{1}</product>'.format(
+                index, '<size unit="cm">{}</size>'.format(index) if index % 2 else '')
+            for index in range(7)))
+
+    def test_batches_of_elements_and_dicts(self):
+        """Yields lists of batch_size records, the last one holding the records left"""
+        for to_dict in (False, True):
+            for chunk_size in (16, 1024):
+                batches = list(read_xml_string(self.products_xml, records_tag='product', to_dict=to_dict,
+                                               chunk_size=chunk_size, batch_size=3))
+                records = list(read_xml_string(self.products_xml, records_tag='product', to_dict=to_dict))
+
+                self.assertListEqual([len(batch) for batch in batches], [3, 3, 1])
+                if to_dict:
+                    self.assertListEqual([record for batch in batches for record in batch], records)
+                else:
+                    self.assertIsInstance(batches[0][0], Element)
+                    self.assertListEqual([record.get('id') for batch in batches for record in batch],
+                                         [record.get('id') for record in records])
+
+    def test_batches_with_fields_and_where(self):
+        """Batches the records that are trimmed and filtered while parsing"""
+        batches = list(read_xml_string(self.products_xml, records_tag='product', to_dict=True, batch_size=2,
+                                       fields=['@id'], where={'size/@unit': 'cm'}))
+
+        self.assertListEqual(batches, [[{'id': '1'}, {'id': '3'}], [{'id': '5'}]])
+
+    def test_columnar_batches(self):
+        """Yields dicts of columns keyed by field paths, with None for the missing fields"""
+        batches = list(read_xml_string(self.products_xml, records_tag='product', batch_size=4, columnar=True))
+
+        self.assertEqual(len(batches), 2)
+        self.assertDictEqual(batches[0], {
+            'id': ['0', '1', '2', '3'],
+            'name': ['Product 0', 'Product 1', 'Product 2', 'Product 3'],
+            'size/unit': [None, 'cm', None, 'cm'],
+            'size/_value': [None, '1', None, '3'],
+        })
+        self.assertListEqual(batches[1]['id'], ['4', '5', '6'])
+
+    def test_columnar_batches_keep_lists_as_values(self):
+        """Keeps the lists of repeated sub elements as the values of their columns"""
+        batch, = read_xml_file(self.small_mock_file_path, records_tag='employees', batch_size=10, columnar=True)
+
+        self.assertListEqual(list(batch), ['bio'])
+        self.assertListEqual([[bio['first_name'] for bio in value] for value in batch['bio']],
+                             [['John', 'Jane', 'Peter'], ['Mary', 'Harry', 'Paul']])
+
+    def test_invalid_batch_arguments(self):
+        """Raises a ValueError for batch sizes below 1 and for columnar batches without a batch size"""
+        with self.assertRaises(ValueError):
+            read_xml_string(self.products_xml, records_tag='product', batch_size=0)
+
+        with self.assertRaises(ValueError):
+            read_xml_string(self.products_xml, records_tag='product', columnar=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""Tests for the checkpoints and resume_from arguments of read_xml_file"""
+import gzip
+import os
+import shutil
+import tempfile
+from unittest import TestCase, main
+from xml.etree.ElementTree import ParseError
+
+from xml_stream import read_xml_file, build_index, get_checkpoint, Checkpoint, register_backend
+from xml_stream.backends import ElementTreeBackend, _BACKENDS
+
+
+class _DeferringParser:
+    """A parser holding back the events of the last chunk fed until more data comes, as expat 2.6+ may do"""
+
+    def __init__(self, parser):
+        self._parser = parser
+        self._deferred_chunk = b''
+        self.read_events = getattr(parser, 'read_events', None)
+
+    def feed(self, data):
+        self._parser.feed(self._deferred_chunk)
+        self._deferred_chunk = bytes(data)
+
+    def flush(self):
+        self._parser.feed(self._deferred_chunk)
+        self._deferred_chunk = b''
+        if hasattr(self._parser, 'flush'):
+            self._parser.flush()
+
+    def close(self):
+        self.flush()
+        return self._parser.close()
+
+
+class _DeferringBackend(ElementTreeBackend):
+    """The standard library's backend, with parsers deferring their events"""
+    name = 'deferring'
+
+    def create_pull_parser(self, tags=None):
+        return _DeferringParser(super().create_pull_parser(tags))
+
+    def create_target_parser(self, target):
+        return _DeferringParser(super().create_target_parser(target))
+
+
+class TestCheckpoints(TestCase):
+    """Test class for reading files with checkpoints and resuming from them"""
+
+    def setUp(self) -> None:
+        """Initialize some variables"""
+        self.temp_folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_folder)
+
+        self.file_path = os.path.join(self.temp_folder, 'catalog.xml')
+        groups = ''.join(
+            '<shop:group name="{0}">{1}</shop:group>'.format(group, ''.join(
+                '<shop:item id="{0}-{1}"><shop:name>Item {1}</shop:name></shop:item>\n'.format(group, index)
+                for index in range(4)))
+            for group in range(3))
+        with open(self.file_path, 'w') as xml_file:
+            xml_file.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                           '<!DOCTYPE catalog>\n'
+                           '<catalog xmlns:shop="https://example.com/shop">{}</catalog>'.format(groups))
+
+        self.records_tag = '{https://example.com/shop}item'
+        self.expected_output = list(read_xml_file(self.file_path, self.records_tag, to_dict=True))
+
+    def test_checkpoints_after_each_record(self):
+        """Yields each record with the checkpoint just after it, holding the start tags of its open ancestors"""
+        output = list(read_xml_file(self.file_path, self.records_tag, to_dict=True, chunk_size=10, checkpoints=True))
+
+        self.assertListEqual([record for record, _ in output], self.expected_output)
+        checkpoint = output[5][1]
+        self.assertIsInstance(checkpoint, Checkpoint)
+        self.assertEqual(checkpoint.prolog, b'<?xml version="1.0" encoding="UTF-8"?>\n<!DOCTYPE catalog>\n')
+        self.assertTupleEqual(checkpoint.ancestors, (b'<catalog xmlns:shop="https://example.com/shop">',
+                                                     b'<shop:group name="1">'))
+        with open(self.file_path, 'rb') as xml_file:
+            self.assertTrue(xml_file.read()[:checkpoint.offset].endswith(b'<shop:name>Item 1</shop:name></shop:item>'))
+
+    def test_resume_from_checkpoint(self):
+        """Resumes reading just after the record of the checkpoint, with the namespaces in scope there"""
+        checkpoints = [checkpoint for _, checkpoint in read_xml_file(
+            self.file_path, self.records_tag, checkpoints=True)]
+
+        for index, checkpoint in enumerate(checkpoints):
+            for to_dict in (False, True):
+                output = list(read_xml_file(self.file_path, self.records_tag, to_dict=to_dict,
+                                            resume_from=Checkpoint.from_json(checkpoint.to_json())))
+                if to_dict:
+                    self.assertListEqual(output, self.expected_output[index + 1:])
+                else:
+                    self.assertListEqual([element.get('id') for element in output],
+                                         [record['id'] for record in self.expected_output[index + 1:]])
+
+    def test_resume_from_every_checkpoint_with_deferred_events(self):
+        """Never skips a record when resuming from any checkpoint, even if the parser defers the events of a chunk"""
+        register_backend(_DeferringBackend())
+        self.addCleanup(_BACKENDS.pop, _DeferringBackend.name)
+
+        for backend in ('etree', _DeferringBackend.name):
+            for to_dict in (False, True):
+                output = list(read_xml_file(self.file_path, self.records_tag, to_dict=to_dict, chunk_size=10,
+                                            checkpoints=True, backend=backend))
+                offsets = [checkpoint.offset for _, checkpoint in output]
+                self.assertEqual(len(set(offsets)), len(offsets))
+
+                for index, (_, checkpoint) in enumerate(output):
+                    resumed_output = list(read_xml_file(self.file_path, self.records_tag, to_dict=True, chunk_size=10,
+                                                        resume_from=checkpoint, backend=backend))
+                    self.assertListEqual(resumed_output, self.expected_output[index + 1:])
+
+    def test_resume_from_checkpoint_with_fields_and_where(self):
+        """Carries on checking the filter and trimming the records after resuming"""
+        _, checkpoint = next(read_xml_file(self.file_path, self.records_tag, checkpoints=True))
+        output = list(read_xml_file(self.file_path, self.records_tag, to_dict=True, resume_from=checkpoint,
+                                    fields=['@id'], where={'{https://example.com/shop}name': 'Item 0'}))
+
+        self.assertListEqual(output, [{'id': '1-0'}, {'id': '2-0'}])
+
+    def test_nested_records_keep_the_checkpoint_before_the_outer_record(self):
+        """Never skips the outer record when resuming from the checkpoint of a record nested in it"""
+        file_path = os.path.join(self.temp_folder, 'nested.xml')
+        with open(file_path, 'w') as xml_file:
+            xml_file.write('<items><item id="1"><item id="1.1"/></item><item id="2"/></items>')
+
+        output = [(record['id'], checkpoint) for record, checkpoint in read_xml_file(
+            file_path, 'item', to_dict=True, checkpoints=True)]
+        self.assertListEqual([record_id for record_id, _ in output], ['1.1', '1', '2'])
+
+        resumed_output = list(read_xml_file(file_path, 'item', to_dict=True, resume_from=output[0][1]))
+        self.assertListEqual([record['id'] for record in resumed_output], ['1.1', '1', '2'])
+
+    def test_resume_from_indexed_record(self):
+        """Resumes from the checkpoint of any record of the index without scanning the file"""
+        build_index(self.file_path, self.records_tag)
+        output = list(read_xml_file(self.file_path, self.records_tag, to_dict=True,
+                                    resume_from=get_checkpoint(self.file_path, 6)))
+
+        self.assertListEqual(output, self.expected_output[6:])
+
+    def test_checkpoints_of_empty_files(self):
+        """Raises a ParseError for an empty file as a plain read does"""
+        _, checkpoint = next(read_xml_file(self.file_path, self.records_tag, checkpoints=True))
+        empty_file_path = os.path.join(self.temp_folder, 'empty.xml')
+        open(empty_file_path, 'w').close()
+
+        for kwargs in ({}, {'checkpoints': True}, {'resume_from': checkpoint}):
+            with self.assertRaises(ParseError):
+                list(read_xml_file(empty_file_path, self.records_tag, **kwargs))
+
+    def test_checkpoints_of_compressed_files(self):
+        """Raises a ValueError as compressed files can not be read from an offset"""
+        compressed_file_path = self.file_path + '.gz'
+        with open(self.file_path, 'rb') as xml_file, gzip.open(compressed_file_path, 'wb') as compressed_file:
+            compressed_file.write(xml_file.read())
+
+        with self.assertRaises(ValueError):
+            list(read_xml_file(compressed_file_path, self.records_tag, checkpoints=True))
+
+
+if __name__ == '__main__':
+    main()
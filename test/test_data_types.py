@@ -0,0 +1,68 @@
+"""Tests for the XmlDictElement and XmlListElement data types"""
+from unittest import TestCase, main
+from xml.etree import ElementTree
+
+from xml_stream import XmlDictElement, XmlListElement
+
+
+class TestDataTypes(TestCase):
+    """Test class for the conversion of XML elements to XmlDictElement and XmlListElement"""
+
+    def setUp(self) -> None:
+        """Initialize some variables"""
+        self.team_xml = (
+            '<team><name>A</name><office city="Kla"><floor>2</floor></office>'
+            '<member id="1">Ann</member><member id="2">Bob<role>lead</role></member></team>')
+
+    def test_repeated_elements_get_the_common_sub_elements(self):
+        """Each repeated element gets the sub elements that are not repeated and its text as '_value'"""
+        output = XmlDictElement(ElementTree.XML(self.team_xml))
+
+        self.assertDictEqual(output, {
+            'member': [
+                {'_value': 'Ann', 'id': '1', 'name': 'A', 'office': {'city': 'Kla', 'floor': '2'}},
+                {'_value': 'Bob', 'id': '2', 'name': 'A', 'office': {'city': 'Kla', 'floor': '2'}, 'role': 'lead'},
+            ]
+        })
+        self.assertIsInstance(output['member'], XmlListElement)
+        self.assertIsInstance(output['member'][0], XmlDictElement)
+
+    def test_common_sub_elements_are_not_shared_between_repeated_elements(self):
+        """The dicts of the common sub elements of each repeated element can be changed independently"""
+        output = XmlDictElement(ElementTree.XML(self.team_xml))
+        output['member'][0]['office']['floor'] = '3'
+
+        self.assertEqual(output['member'][1]['office']['floor'], '2')
+
+    def test_conversion_leaves_the_xml_element_unchanged(self):
+        """Converting an element to a dict does not change the element"""
+        element = ElementTree.XML(self.team_xml)
+        XmlDictElement(element)
+
+        self.assertEqual(ElementTree.tostring(element).decode('utf-8'), self.team_xml)
+
+    def test_repeated_elements_in_a_unique_sub_element(self):
+        """Repeated elements inside a sub element are grouped without getting the common sub elements"""
+        output = XmlDictElement(ElementTree.XML(
+            '<company><staff><name>Ops</name><bio first="J"/><bio first="K">K</bio></staff><site>HQ</site></company>'))
+
+        self.assertDictEqual(output, {'site': 'HQ', 'staff': {'bio': ['K'], 'name': 'Ops'}})
+
+    def test_common_sub_element_with_the_tag_of_a_sub_element_of_a_repeated_element(self):
+        """A common sub element whose tag is also in a repeated element makes that tag repeated in it"""
+        output = XmlDictElement(ElementTree.XML(
+            '<group><label>x</label><item><label>own</label></item><item>plain</item><item/></group>'))
+
+        self.assertDictEqual(output, {'item': [['own', 'x'], {'_value': 'plain', 'label': 'x'}, {'label': 'x'}]})
+
+    def test_nested_repeated_elements(self):
+        """Repeated elements inside repeated elements become lists of lists"""
+        output = XmlListElement(ElementTree.XML(
+            '<matrix><row><cell>1</cell><cell>2</cell><note>n</note></row><row><cell>3</cell><cell>4</cell></row>'
+            '</matrix>'))
+
+        self.assertListEqual(output, [[{'_value': '1', 'note': 'n'}, {'_value': '2', 'note': 'n'}], ['3', '4']])
+
+
+if __name__ == '__main__':
+    main()
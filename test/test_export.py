@@ -0,0 +1,162 @@
+"""Tests for the exporters of the xml_stream.export module"""
+import csv
+import json
+import os
+import shutil
+import tempfile
+import tracemalloc
+import unittest
+from unittest import TestCase, main
+
+from xml_stream.export import to_csv, to_jsonl, to_parquet
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+
+class TestExport(TestCase):
+    """Test class for to_parquet, to_csv and to_jsonl"""
+
+    def setUp(self) -> None:
+        """Initialize some variables"""
+        self.folder_path = tempfile.mkdtemp()
+        self.xml_file_path = os.path.join(self.folder_path, 'products.xml')
+        with open(self.xml_file_path, 'w') as xml_file:
+            xml_file.write('<products>{}</products>'.format(''.join(
+                '<product id="{0}"><name>Product {0}</name>{1}</product>'.format(
+                    index, '<size unit="cm">{}</size>'.format(index) if index % 2 else '')
+                for index in range(5))))
+
+    def tearDown(self) -> None:
+        """Remove the temporary files"""
+        shutil.rmtree(self.folder_path)
+
+    def read_csv(self, csv_path):
+        """Returns the rows of a CSV file"""
+        with open(csv_path, newline='', encoding='utf-8') as csv_file:
+            return list(csv.reader(csv_file))
+
+    def test_to_csv_with_inferred_columns(self):
+        """Writes the flattened records with the columns of the first batch as header"""
+        csv_path = os.path.join(self.folder_path, 'products.csv')
+        number_of_records = to_csv(self.xml_file_path, 'product', csv_path, batch_size=2)
+
+        self.assertEqual(number_of_records, 5)
+        self.assertListEqual(self.read_csv(csv_path), [
+            ['id', 'name', 'size/unit', 'size/_value'],
+            ['0', 'Product 0', '', ''],
+            ['1', 'Product 1', 'cm', '1'],
+            ['2', 'Product 2', '', ''],
+            ['3', 'Product 3', 'cm', '3'],
+            ['4', 'Product 4', '', ''],
+        ])
+
+    def test_to_csv_with_declared_columns(self):
+        """Writes only the declared columns, leaving the missing fields empty"""
+        csv_path = os.path.join(self.folder_path, 'products.csv')
+        to_csv(self.xml_file_path, 'product', csv_path, columns=['size/_value', 'id'], batch_size=1)
+
+        self.assertListEqual(self.read_csv(csv_path), [
+            ['size/_value', 'id'], ['', '0'], ['1', '1'], ['', '2'], ['3', '3'], ['', '4']])
+
+    def test_to_csv_with_declared_columns_missing_from_the_records(self):
+        """Counts and writes every record when none of them has the declared columns"""
+        csv_path = os.path.join(self.folder_path, 'products.csv')
+        number_of_records = to_csv(self.xml_file_path, 'product', csv_path, columns=['color'], batch_size=2)
+
+        self.assertEqual(number_of_records, 5)
+        self.assertListEqual(self.read_csv(csv_path), [['color']] + [['']] * 5)
+
+    def test_to_csv_with_fields_missing_from_the_inferred_columns(self):
+        """Raises a ValueError when a later batch has fields that are not in the inferred columns,
+        and removes the partially written file"""
+        csv_path = os.path.join(self.folder_path, 'products.csv')
+        with self.assertRaises(ValueError):
+            to_csv(self.xml_file_path, 'product', csv_path, batch_size=1)
+
+        self.assertFalse(os.path.exists(csv_path))
+
+    def test_to_jsonl(self):
+        """Writes each dict record on its own line, with the reader's arguments passed on"""
+        jsonl_path = os.path.join(self.folder_path, 'products.jsonl')
+        number_of_records = to_jsonl(self.xml_file_path, 'product', jsonl_path, batch_size=2,
+                                     where={'size/@unit': 'cm'})
+
+        with open(jsonl_path, encoding='utf-8') as jsonl_file:
+            records = [json.loads(line) for line in jsonl_file]
+
+        self.assertEqual(number_of_records, 2)
+        self.assertListEqual(records, [
+            {'id': '1', 'name': 'Product 1', 'size': {'unit': 'cm', '_value': '1'}},
+            {'id': '3', 'name': 'Product 3', 'size': {'unit': 'cm', '_value': '3'}},
+        ])
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_to_parquet_with_inferred_columns(self):
+        """Writes string columns in row groups of row_group_size records"""
+        parquet_path = os.path.join(self.folder_path, 'products.parquet')
+        number_of_records = to_parquet(self.xml_file_path, 'product', parquet_path, row_group_size=4)
+        parquet_file = pyarrow.parquet.ParquetFile(parquet_path)
+
+        self.assertEqual(number_of_records, 5)
+        self.assertEqual(parquet_file.num_row_groups, 2)
+        self.assertDictEqual(parquet_file.read().to_pydict(), {
+            'id': ['0', '1', '2', '3', '4'],
+            'name': ['Product 0', 'Product 1', 'Product 2', 'Product 3', 'Product 4'],
+            'size/unit': [None, 'cm', None, 'cm', None],
+            'size/_value': [None, '1', None, '3', None],
+        })
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_to_parquet_with_schema(self):
+        """Casts the texts to the types of the schema's fields"""
+        parquet_path = os.path.join(self.folder_path, 'products.parquet')
+        schema = pyarrow.schema([('id', pyarrow.int64()), ('size/_value', pyarrow.float64())])
+        to_parquet(self.xml_file_path, 'product', parquet_path, schema=schema, row_group_size=2)
+        table = pyarrow.parquet.read_table(parquet_path)
+
+        self.assertEqual(table.schema, schema)
+        self.assertDictEqual(table.to_pydict(), {'id': [0, 1, 2, 3, 4], 'size/_value': [None, 1.0, None, 3.0, None]})
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_to_parquet_without_records(self):
+        """Writes an empty file with the schema when there are no records"""
+        parquet_path = os.path.join(self.folder_path, 'products.parquet')
+        schema = pyarrow.schema([('id', pyarrow.int64())])
+
+        self.assertEqual(to_parquet(self.xml_file_path, 'missing', parquet_path, schema=schema), 0)
+        self.assertEqual(pyarrow.parquet.read_table(parquet_path).num_rows, 0)
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_to_parquet_with_fields_missing_from_the_inferred_columns(self):
+        """Raises a ValueError when a later row group has new fields, and removes the partially written file"""
+        parquet_path = os.path.join(self.folder_path, 'products.parquet')
+        with self.assertRaises(ValueError):
+            to_parquet(self.xml_file_path, 'product', parquet_path, row_group_size=1)
+
+        self.assertFalse(os.path.exists(parquet_path))
+
+    def test_to_csv_memory_is_bounded_by_the_batch_size(self):
+        """Keeps memory flat however many records are written"""
+        with open(self.xml_file_path, 'w') as xml_file:
+            xml_file.write('<products>')
+            for index in range(20000):
+                xml_file.write('<product id="{0}"><name>Product {0}</name></product>'.format(index))
+            xml_file.write('</products>')
+
+        tracemalloc.start()
+        try:
+            to_csv(self.xml_file_path, 'product', os.path.join(self.folder_path, 'products.csv'), batch_size=100)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        # the whole file as dicts would take several megabytes
+        self.assertLess(peak, 1024 * 1024)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Tests for the record filters passed as the where argument of the readers"""
+import os
+from unittest import TestCase, main
+from unittest.mock import patch
+from xml.etree.ElementTree import Element
+
+from xml_stream import read_xml_file, read_xml_string, RecordFilter, XmlDictElement
+
+
+class TestRecordFilter(TestCase):
+    """Test class for the RecordFilter and the where argument of the readers"""
+
+    def setUp(self) -> None:
+        """Initialize some variables"""
+        test_folder_path = os.path.dirname(__file__)
+        self.small_mock_file_path = os.path.join(test_folder_path, 'small_mock.xml')
+        self.products_xml = (
+            '<products>'
+            '<product id="1" status="active"><name>Pen</name><price>100</price><tags><tag>office</tag></tags></product>'
+            '<product id="2" status="retired"><name>Quill</name><price>900</price></product>'
+            '<product id="3" status="active"><name>Pencil</name><price>50</price></product>'
+            '<product id="4" status="active"><name>Ruler</name></product>'
+            '</products>')
+
+    def test_where_with_attribute_condition(self):
+        """Rejects the records whose attributes do not match on their start tag"""
+        record_filter = RecordFilter({'@status': 'active'})
+        output = [element.get('id') for element in read_xml_string(
+            self.products_xml, records_tag='product', where=record_filter)]
+
+        self.assertListEqual(output, ['1', '3', '4'])
+        self.assertEqual(record_filter.seen, 4)
+        self.assertEqual(record_filter.accepted, 3)
+        self.assertDictEqual(record_filter.rejected, {'start': 1, 'parsing': 0, 'end': 0})
+
+    def test_where_with_sub_element_conditions(self):
+        """Rejects records as soon as a sub element does not match, and checks missing sub elements against None"""
+        record_filter = RecordFilter({'price': lambda price: price is not None and int(price) < 500, 'tags/tag': None})
+        output = list(read_xml_string(self.products_xml, records_tag='product', to_dict=True, where=record_filter))
+
+        self.assertListEqual(output, [{'id': '3', 'status': 'active', 'name': 'Pencil', 'price': '50'}])
+        self.assertDictEqual(record_filter.rejected, {'start': 0, 'parsing': 2, 'end': 1})
+
+    def test_where_with_predicate(self):
+        """Checks a callable against the whole record before it is converted"""
+        for to_dict in (False, True):
+            output = list(read_xml_file(self.small_mock_file_path, records_tag='employees', to_dict=to_dict,
+                                        where=lambda record: record.findtext('team') == 'Customer Service'))
+
+            self.assertEqual(len(output), 1)
+            self.assertIsInstance(output[0], XmlDictElement if to_dict else Element)
+            self.assertEqual(output[0]['bio'][0]['first_name'] if to_dict else output[0][2].get('first_name'), 'Mary')
+
+    def test_where_with_fields(self):
+        """Checks conditions on sub elements that are not part of the selected fields"""
+        output = list(read_xml_string(
+            self.products_xml, records_tag='product', to_dict=True, fields=['name'], where={'price': '900'}))
+
+        self.assertListEqual(output, [{'name': 'Quill'}])
+
+    def test_rejected_records_are_not_converted(self):
+        """Does not convert the rejected records to dicts"""
+        with patch('xml_stream._builders.XmlDictElement', side_effect=XmlDictElement) as mock_xml_dict_element:
+            output = list(read_xml_string(
+                self.products_xml, records_tag='product', to_dict=True, where={'@status': 'retired'}))
+
+        self.assertEqual(len(output), 1)
+        self.assertEqual(mock_xml_dict_element.call_count, 1)
+
+    def test_conditions_on_the_same_element(self):
+        """Raises a ValueError for two conditions on the text of the same element, whose paths differ"""
+        with self.assertRaisesRegex(ValueError, "'price' and './price'"):
+            RecordFilter({'price': '100', './price': lambda price: price is not None})
+
+    def test_nested_records_with_fields_and_where(self):
+        """Yields the records nested in other records as a plain read does, trimmed and filtered on their own"""
+        xml_string = '<a><item id="1"><name>Box</name><item id="n"><name>Pen</name></item></item><item id="2"/></a>'
+        self.assertListEqual([element.get('id') for element in read_xml_string(xml_string, records_tag='item')],
+                             ['n', '1', '2'])
+
+        output = list(read_xml_string(xml_string, records_tag='item', to_dict=True, fields=['@id']))
+        self.assertListEqual(output, [{'id': 'n'}, {'id': '1'}, {'id': '2'}])
+
+        record_filter = RecordFilter({'name': 'Pen'})
+        output = list(read_xml_string(xml_string, records_tag='item', to_dict=True, fields=['name', 'item/@id'],
+                                      where=record_filter))
+        self.assertListEqual(output, [{'name': 'Pen'}])
+        self.assertEqual(record_filter.seen, 3)
+        self.assertDictEqual(record_filter.rejected, {'start': 0, 'parsing': 1, 'end': 1})
+
+
+if __name__ == '__main__':
+    main()
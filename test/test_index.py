@@ -0,0 +1,116 @@
+"""Tests for the record index: build_index, read_index, get_record and read_records_at"""
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase, main
+from xml.etree.ElementTree import Element
+
+from xml_stream import build_index, read_index, get_record, read_records_at, read_xml_file, read_xml_file_parallel
+
+
+class TestRecordIndex(TestCase):
+    """Test class for the record index"""
+
+    def setUp(self) -> None:
+        """Initialize some variables"""
+        self.temp_folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_folder)
+
+        self.file_path = os.path.join(self.temp_folder, 'catalog.xml')
+        items = ''.join(
+            '<shop:item id="{0}"><shop:name>Item {0}</shop:name><shop:item id="nested-{0}"/></shop:item>'
+            '<!-- <shop:item id="commented"/> -->'.format(index)
+            for index in range(50))
+        with open(self.file_path, 'w') as xml_file:
+            xml_file.write(
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<catalog xmlns:shop="https://example.com/shop"><group>{0}</group>'
+                '<group><shop:item>no id</shop:item></group></catalog>'.format(items))
+
+        self.records_tag = '{https://example.com/shop}item'
+
+    def test_build_index_and_read_index(self):
+        """Saves the offset, length and key of every outermost record next to the file"""
+        index_path = build_index(self.file_path, self.records_tag, key='@id')
+        entries = list(read_index(self.file_path))
+
+        self.assertEqual(index_path, self.file_path + '.xsidx')
+        self.assertEqual(len(entries), 51)
+        self.assertEqual(entries[3][2], '3')
+        self.assertIsNone(entries[-1][2])
+
+        with open(self.file_path, 'rb') as xml_file:
+            content = xml_file.read()
+        offset, length, _ = entries[3]
+        self.assertEqual(content[offset:offset + length],
+                         b'<shop:item id="3"><shop:name>Item 3</shop:name><shop:item id="nested-3"/></shop:item>')
+
+    def test_get_record(self):
+        """Reads the record with the given key with the namespaces of its ancestors"""
+        build_index(self.file_path, self.records_tag, key='{https://example.com/shop}name')
+
+        element = get_record(self.file_path, 'Item 42')
+        self.assertIsInstance(element, Element)
+        self.assertEqual(element.get('id'), '42')
+
+        self.assertDictEqual(get_record(self.file_path, 'Item 7', to_dict=True, fields=['@id']), {'id': '7'})
+        self.assertIsNone(get_record(self.file_path, 'Item 1000'))
+
+    def test_get_record_with_callable_key(self):
+        """Uses the value returned by a callable taking the record as key"""
+        index_path = os.path.join(self.temp_folder, 'by_number.xsidx')
+        build_index(self.file_path, self.records_tag, key=lambda record: len(record), index_path=index_path)
+
+        self.assertEqual(get_record(self.file_path, 2, index_path=index_path).get('id'), '0')
+        self.assertEqual(get_record(self.file_path, 0, index_path=index_path).text, 'no id')
+
+    def test_read_records_at(self):
+        """Reads the records at the given offsets in their order"""
+        build_index(self.file_path, self.records_tag)
+        offsets = [offset for offset, _, _ in read_index(self.file_path)]
+
+        records = list(read_records_at(self.file_path, [offsets[10], offsets[2]], to_dict=True))
+        self.assertListEqual([record['id'] for record in records], ['10', '2'])
+
+        with self.assertRaises(KeyError):
+            list(read_records_at(self.file_path, [offsets[0] + 1]))
+
+    def test_index_of_an_empty_file(self):
+        """Builds an empty index for an empty file, in which no record is found"""
+        empty_file_path = os.path.join(self.temp_folder, 'empty.xml')
+        open(empty_file_path, 'w').close()
+
+        for key in (None, '@id'):
+            build_index(empty_file_path, self.records_tag, key=key)
+            self.assertListEqual(list(read_index(empty_file_path)), [])
+            self.assertIsNone(get_record(empty_file_path, '1'))
+            self.assertListEqual(list(read_records_at(empty_file_path, [])), [])
+            with self.assertRaises(KeyError):
+                list(read_records_at(empty_file_path, [0]))
+
+    def test_out_of_date_index(self):
+        """Refuses to use an index built before the file changed"""
+        build_index(self.file_path, self.records_tag, key='@id')
+        time.sleep(0.01)
+        with open(self.file_path, 'a') as xml_file:
+            xml_file.write('\n')
+
+        with self.assertRaises(ValueError):
+            get_record(self.file_path, '1')
+
+    def test_read_xml_file_parallel_with_index(self):
+        """Hands out the byte ranges of the index to the workers instead of scanning the file"""
+        index_path = build_index(self.file_path, self.records_tag)
+        expected_output = list(read_xml_file(self.file_path, self.records_tag, to_dict=True))
+
+        output = list(read_xml_file_parallel(
+            self.file_path, self.records_tag, to_dict=True, workers=2, task_size=100, index_path=index_path))
+        self.assertListEqual(output, expected_output)
+
+        with self.assertRaises(ValueError):
+            list(read_xml_file_parallel(self.file_path, 'group', index_path=index_path))
+
+
+if __name__ == '__main__':
+    main()
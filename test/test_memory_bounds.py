@@ -0,0 +1,112 @@
+"""Tests for the memory used by the readers on documents of adversarial shapes, and for max_buffered_elements"""
+import asyncio
+import tracemalloc
+from typing import Iterator
+from unittest import TestCase, main
+
+from xml_stream import read_xml_string, aread_xml_stream
+
+
+def generate_wrapped_records(number_of_records: int) -> Iterator[bytes]:
+    """Yields a document whose records sit under several wrappers, with text between them"""
+    yield b'<company><staff><department>'
+    for index in range(number_of_records):
+        yield '<employee id="{0}"><name>Name {0}</name></employee> some text between records '.format(index).encode()
+    yield b'</department></staff></company>'
+
+
+def generate_late_records(number_of_records: int) -> Iterator[bytes]:
+    """Yields a document with many elements that are not records, deep in the tree, before a few records"""
+    yield b'<feed><metadata><entries>'
+    for index in range(number_of_records):
+        yield '<entry id="{0}"><value>{0}</value></entry>'.format(index).encode()
+    yield b'</entries></metadata><records>'
+    for index in range(3):
+        yield '<employee id="{}"/>'.format(index).encode()
+    yield b'</records></feed>'
+
+
+def generate_mixed_records(number_of_records: int) -> Iterator[bytes]:
+    """Yields a document whose records are interleaved with siblings that are not records, at several depths"""
+    yield b'<root>'
+    for index in range(number_of_records):
+        yield '<group><note>{0}</note><employee id="{0}"/><note>{0}</note></group><extra>{0}</extra>'.format(
+            index).encode()
+    yield b'</root>'
+
+
+class TestMemoryBounds(TestCase):
+    """Test class for the memory bounds of the readers"""
+
+    def get_peak_memory(self, generate_document, number_of_records: int, **kwargs) -> int:
+        """Returns the peak memory allocated while reading the generated document"""
+        tracemalloc.start()
+        try:
+            for _ in read_xml_string(generate_document(number_of_records), records_tag='employee', **kwargs):
+                pass
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return peak
+
+    def test_flat_memory(self):
+        """The memory used does not grow with the number of records, whatever the shape of the document"""
+        for generate_document in (generate_wrapped_records, generate_late_records, generate_mixed_records):
+            for kwargs in ({}, {'to_dict': True}, {'fields': ['@id']}, {'batch_size': 10}):
+                small_peak = self.get_peak_memory(generate_document, 1000, **kwargs)
+                large_peak = self.get_peak_memory(generate_document, 10000, **kwargs)
+
+                # holding every element of the large document would take megabytes
+                self.assertLess(large_peak, 1.5 * small_peak + 64 * 1024,
+                                msg='{} {}'.format(generate_document.__name__, kwargs))
+
+    def test_records_are_complete(self):
+        """Dropping the elements that ended outside of records leaves the records and nested records whole"""
+        xml = ('<root><a><employee id="1"><name>A</name><employee id="2"><name>B</name></employee></employee>'
+               '<skip><x/></skip></a><employee id="3"/></root>')
+        records = list(read_xml_string(xml, records_tag='employee', chunk_size=3))
+
+        self.assertListEqual([record.get('id') for record in records], ['2', '1', '3'])
+        self.assertListEqual([child.tag for child in records[1]], ['name', 'employee'])
+        self.assertEqual(records[1].find('employee/name').text, 'B')
+
+    def test_max_buffered_elements(self):
+        """Raises a ValueError as soon as a record or the nesting of the elements exceeds max_buffered_elements"""
+        large_record = '<root><employee>{}</employee></root>'.format('<bio/>' * 100)
+        deep_document = '<root>{}<employee/>{}</root>'.format('<a>' * 100, '</a>' * 100)
+
+        for kwargs in ({}, {'to_dict': True}, {'fields': ['bio']}):
+            self.assertEqual(len(list(read_xml_string(large_record, records_tag='employee', max_buffered_elements=102,
+                                                      **kwargs))), 1)
+
+            with self.assertRaises(ValueError):
+                list(read_xml_string(large_record, records_tag='employee', max_buffered_elements=50, **kwargs))
+
+            with self.assertRaises(ValueError):
+                list(read_xml_string(deep_document, records_tag='employee', max_buffered_elements=50, **kwargs))
+
+        # many small records are fine
+        records = read_xml_string(generate_wrapped_records(1000), records_tag='employee', max_buffered_elements=10)
+        self.assertEqual(len(list(records)), 1000)
+
+        with self.assertRaises(ValueError):
+            list(read_xml_string(large_record, records_tag='employee', max_buffered_elements=0))
+
+    def test_max_buffered_elements_async(self):
+        """aread_xml_stream also raises a ValueError beyond max_buffered_elements"""
+        async def collect_records():
+            return [record async for record in aread_xml_stream(
+                ['<root><employee>', '<bio/>' * 100, '</employee></root>'], records_tag='employee',
+                max_buffered_elements=50)]
+
+        loop = asyncio.new_event_loop()
+        try:
+            with self.assertRaises(ValueError):
+                loop.run_until_complete(collect_records())
+        finally:
+            loop.close()
+
+
+if __name__ == '__main__':
+    main()
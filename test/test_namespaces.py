@@ -0,0 +1,129 @@
+"""Tests for the namespaces and namespace_mode arguments of the readers"""
+import asyncio
+import os
+import shutil
+import tempfile
+from unittest import TestCase, main
+
+from xml_stream import (read_xml_file, read_xml_string, read_xml_file_parallel, aread_xml_stream, RecordFilter,
+                        RecordSchema, get_available_backends)
+
+
+class TestNamespaces(TestCase):
+    """Test class for the namespaces and namespace_mode arguments of the readers"""
+
+    def setUp(self) -> None:
+        """Initialize some variables"""
+        self.namespaces = {'shop': 'https://example.com/shop', 'x': 'urn:extra', '': 'urn:default'}
+        self.xml_string = (
+            '<shop:catalog xmlns:shop="https://example.com/shop" xmlns="urn:default" xmlns:x="urn:extra">'
+            '<shop:item x:id="1" plain="p"><name>Pen</name><shop:price>2</shop:price><x:note>blue</x:note></shop:item>'
+            '<other xmlns="urn:other"><name>Other</name></other>'
+            '<shop:item x:id="2"><name>Quill</name><shop:price>9</shop:price></shop:item>'
+            '</shop:catalog>')
+
+        self.temp_folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_folder)
+        self.file_path = os.path.join(self.temp_folder, 'catalog.xml')
+        with open(self.file_path, 'w') as xml_file:
+            xml_file.write(self.xml_string)
+
+    def test_prefixed_records_tag(self):
+        """Matches prefixed tags and anchored paths, the default namespace applying to tags without prefix"""
+        for records_tag in ('shop:item', '/shop:catalog/shop:item', '{https://example.com/shop}item'):
+            output = [element.get('{urn:extra}id') for element in read_xml_string(
+                self.xml_string, records_tag=records_tag, namespaces=self.namespaces)]
+            self.assertListEqual(output, ['1', '2'])
+
+        output = [element.findtext('{urn:default}name') for element, _ in read_xml_file(
+            self.file_path, records_tag='shop:item', namespaces=self.namespaces, checkpoints=True)]
+        self.assertListEqual(output, ['Pen', 'Quill'])
+
+        output = [element.tag for element in read_xml_string(
+            self.xml_string, records_tag='name', namespaces=self.namespaces)]
+        self.assertListEqual(output, ['{urn:default}name'] * 2)
+
+        with self.assertRaisesRegex(ValueError, "Unknown namespace prefix 'y'"):
+            list(read_xml_string(self.xml_string, records_tag='y:item', namespaces=self.namespaces))
+
+    def test_namespace_modes(self):
+        """Strips the namespaces of the names of the records or replaces them with their prefixes"""
+        expected_outputs = {
+            'keep': {'{urn:extra}id': '1', 'plain': 'p', '{urn:default}name': 'Pen',
+                     '{https://example.com/shop}price': '2', '{urn:extra}note': 'blue'},
+            'strip': {'id': '1', 'plain': 'p', 'name': 'Pen', 'price': '2', 'note': 'blue'},
+            'prefix': {'x:id': '1', 'plain': 'p', 'name': 'Pen', 'shop:price': '2', 'x:note': 'blue'},
+        }
+
+        for backend in get_available_backends():
+            for namespace_mode, expected_output in expected_outputs.items():
+                output = list(read_xml_string(self.xml_string, records_tag='shop:item', to_dict=True, backend=backend,
+                                              namespaces=self.namespaces, namespace_mode=namespace_mode))
+                self.assertDictEqual(output[0], expected_output)
+
+            elements = list(read_xml_string(self.xml_string, records_tag='shop:item', backend=backend,
+                                            namespaces=self.namespaces, namespace_mode='prefix'))
+            self.assertListEqual([element.tag for element in elements[0]], ['name', 'shop:price', 'x:note'])
+            self.assertEqual(elements[0].get('x:id'), '1')
+
+    def test_names_are_shared_by_records(self):
+        """Renames each distinct name once, so that all the records share the same key strings"""
+        first_record, second_record = read_xml_string(
+            self.xml_string, records_tag='shop:item', to_dict=True, namespaces=self.namespaces,
+            namespace_mode='strip')
+
+        second_keys = {key: key for key in second_record}
+        for key in ('id', 'name', 'price'):
+            self.assertIs(next(first_key for first_key in first_record if first_key == key), second_keys[key])
+
+    def test_prefixed_paths(self):
+        """Resolves the prefixes of the paths of fields, where and schema, and labels pairs as records_tag was given"""
+        output = list(read_xml_string(
+            self.xml_string, records_tag='shop:item', to_dict=True, fields=['shop:price', '@x:id'],
+            where={'name': 'Quill'}, namespaces=self.namespaces, namespace_mode='prefix'))
+        self.assertListEqual(output, [{'x:id': '2', 'shop:price': '9'}])
+
+        record_filter = RecordFilter({'x:note': 'blue'}, namespaces=self.namespaces)
+        output = list(read_xml_string(self.xml_string, records_tag='shop:item', to_dict=True, where=record_filter,
+                                      namespaces=self.namespaces, namespace_mode='strip'))
+        self.assertListEqual([record['id'] for record in output], ['1'])
+
+        schema = RecordSchema({'id': ('@x:id', int), 'price': ('shop:price', float)}, namespaces=self.namespaces)
+        output = list(read_xml_string(self.xml_string, records_tag='{https://example.com/shop}item', schema=schema))
+        self.assertListEqual([tuple(record) for record in output], [(1, 2.0), (2, 9.0)])
+
+        output = list(read_xml_string(self.xml_string, records_tag=['shop:item', '/shop:catalog/{urn:other}other'],
+                                      to_dict=True, namespaces=self.namespaces, namespace_mode='strip'))
+        self.assertListEqual([(label, record.get('name')) for label, record in output], [
+            ('shop:item', 'Pen'), ('/shop:catalog/{urn:other}other', 'Other'), ('shop:item', 'Quill')])
+
+    def test_namespaces_in_other_readers(self):
+        """Passes the namespaces on in the parallel and asynchronous readers"""
+        output = list(read_xml_file_parallel(self.file_path, records_tag='shop:item', to_dict=True, workers=2,
+                                             namespaces=self.namespaces, namespace_mode='strip'))
+        self.assertListEqual([record['id'] for record in output], ['1', '2'])
+
+        async def read_all():
+            async def iter_chunks():
+                yield self.xml_string
+
+            return [record async for record in aread_xml_stream(
+                iter_chunks(), records_tag='shop:item', to_dict=True, namespaces=self.namespaces,
+                namespace_mode='prefix')]
+
+        loop = asyncio.new_event_loop()
+        try:
+            self.assertListEqual([record['x:id'] for record in loop.run_until_complete(read_all())], ['1', '2'])
+        finally:
+            loop.close()
+
+    def test_invalid_namespace_modes(self):
+        """Raises a ValueError for unknown modes, and for the prefix mode without namespaces"""
+        with self.assertRaisesRegex(ValueError, "Unknown namespace_mode"):
+            list(read_xml_string(self.xml_string, records_tag='item', namespace_mode='drop'))
+        with self.assertRaisesRegex(ValueError, "needs the namespaces"):
+            list(read_xml_string(self.xml_string, records_tag='item', namespace_mode='prefix'))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,21 @@
 """Tests for the read_xml_file function"""
+import bz2
+import gzip
+import lzma
 import os
+import shutil
+import tempfile
 from unittest import TestCase, main
 from xml.etree.ElementTree import Element
-from xml.etree import cElementTree as ElementTree
+from xml.etree import ElementTree
 
 from xml_stream import read_xml_file
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 
 class TestReadXmlString(TestCase):
     """Test class for the read_xml_file function"""
@@ -169,6 +179,94 @@ class TestReadXmlString(TestCase):
             self.assertIsInstance(element, Element)
             self.assertEqual(ElementTree.tostring(element), ElementTree.tostring(expected_element))
 
+    def test_read_compressed_xml_file_to_dict(self):
+        """Decompresses gzip, bz2, xz and zstd files while parsing them, detecting the format by magic bytes"""
+        with open(self.small_mock_file_path, 'rb') as small_mock_file:
+            xml_bytes = small_mock_file.read()
+
+        compressors = {'gz': gzip.compress, 'bz2': bz2.compress, 'xz': lzma.compress}
+        if zstandard is not None:
+            compressors['zst'] = zstandard.ZstdCompressor().compress
+
+        temp_folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_folder)
+
+        for extension, compress in compressors.items():
+            for file_name in ('small_mock.xml.{}'.format(extension), 'small_mock_{}.xml'.format(extension)):
+                file_path = os.path.join(temp_folder, file_name)
+                with open(file_path, 'wb') as compressed_file:
+                    compressed_file.write(compress(xml_bytes))
+
+                for chunk_size in (16, 64 * 1024):
+                    staff_output = list(read_xml_file(
+                        file_path, records_tag='staff', to_dict=True, chunk_size=chunk_size))
+                    self.assertListEqual(staff_output, [self.expected_small_mock_output])
+
+    def test_read_xml_file_with_explicit_compression(self):
+        """Uses the compression that is passed explicitly instead of detecting it"""
+        temp_folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_folder)
+        file_path = os.path.join(temp_folder, 'small_mock.xml.gz')
+        shutil.copyfile(self.small_mock_file_path, file_path)
+
+        staff_output = list(read_xml_file(file_path, records_tag='staff', to_dict=True, compression=None))
+        self.assertListEqual(staff_output, [self.expected_small_mock_output])
+
+        with self.assertRaises(ValueError):
+            list(read_xml_file(file_path, records_tag='staff', compression='rar'))
+
+    def test_read_xml_file_to_dict_with_fields(self):
+        """Keeps only the selected sub elements and attributes of the records when fields are passed"""
+        output = list(read_xml_file(
+            self.small_mock_file_path, records_tag='employees', to_dict=True, fields=['team', 'location/@name']))
+
+        self.assertListEqual(output, [
+            {'team': 'Marketing', 'location': {'name': 'head office'}},
+            {'team': 'Customer Service', 'location': {'name': 'Kampala branch'}},
+        ])
+
+    def test_read_xml_file_with_fields(self):
+        """Removes the sub elements and attributes that are not selected from the records when fields are passed"""
+        output = list(read_xml_file(
+            self.small_mock_file_path, records_tag='employees', fields=['bio/@first_name', 'location/@address']))
+
+        self.assertListEqual([sub_element.tag for sub_element in output[0]], ['location', 'bio', 'bio', 'bio'])
+        self.assertDictEqual(output[0][0].attrib, {'address': 'Kampala, Uganda'})
+        self.assertListEqual([bio.attrib for bio in output[1].findall('bio')],
+                             [{'first_name': 'Mary'}, {'first_name': 'Harry'}, {'first_name': 'Paul'}])
+        self.assertListEqual([bio.text for bio in output[1].findall('bio')], ['Mary Doe', 'Harry Doe', 'Paul Doe'])
+
+    def test_read_xml_file_with_mmap(self):
+        """Feeds slices of the memory-mapped file to the parser, giving the same records as the buffered reads"""
+        for records_tag in ('staff', 'employees', 'bio'):
+            for to_dict in (False, True):
+                for chunk_size in (7, 64 * 1024):
+                    expected_output = list(read_xml_file(self.small_mock_file_path, records_tag, to_dict=to_dict))
+                    output = list(read_xml_file(
+                        self.small_mock_file_path, records_tag, to_dict=to_dict, chunk_size=chunk_size, use_mmap=True))
+
+                    if not to_dict:
+                        expected_output = [ElementTree.tostring(element) for element in expected_output]
+                        output = [ElementTree.tostring(element) for element in output]
+                    self.assertListEqual(output, expected_output)
+
+    def test_read_xml_file_with_mmap_stopped_early(self):
+        """Releases the memory-mapped file when the iterator is closed before the end"""
+        records = read_xml_file(self.small_mock_file_path, records_tag='bio', use_mmap=True)
+        self.assertEqual(next(records).get('first_name'), 'John')
+        records.close()
+
+    def test_read_compressed_xml_file_with_mmap(self):
+        """Raises a ValueError as compressed files can not be memory-mapped"""
+        temp_folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_folder)
+        file_path = os.path.join(temp_folder, 'small_mock.xml.gz')
+        with open(self.small_mock_file_path, 'rb') as small_mock_file, gzip.open(file_path, 'wb') as compressed_file:
+            compressed_file.write(small_mock_file.read())
+
+        with self.assertRaises(ValueError):
+            list(read_xml_file(file_path, records_tag='staff', use_mmap=True))
+
 
 if __name__ == '__main__':
     main()
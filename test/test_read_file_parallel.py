@@ -0,0 +1,110 @@
+"""Tests for the read_xml_file_parallel function"""
+import os
+import shutil
+import tempfile
+from unittest import TestCase, main
+from xml.etree import ElementTree
+from xml.etree.ElementTree import Element
+
+from xml_stream import read_xml_file, read_xml_file_parallel, RecordFilter, ReaderStats
+
+
+class TestReadXmlFileParallel(TestCase):
+    """Test class for the read_xml_file_parallel function"""
+
+    def setUp(self) -> None:
+        """Initialize some variables"""
+        test_folder_path = os.path.dirname(__file__)
+        self.small_mock_file_path = os.path.join(test_folder_path, 'small_mock.xml')
+
+        self.temp_folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_folder)
+
+        self.namespaced_file_path = os.path.join(self.temp_folder, 'namespaced.xml')
+        items = ''.join(
+            '<shop:item id="{0}" note="a &gt; b"><shop:name>Item {0}</shop:name>'
+            '<!-- <shop:item> in a comment --><![CDATA[</shop:item>]]><shop:item id="nested-{0}"/></shop:item>'
+            '<shop:other>{0}</shop:other>'.format(index)
+            for index in range(200))
+        with open(self.namespaced_file_path, 'w') as xml_file:
+            xml_file.write(
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<catalog xmlns:shop="https://example.com/shop"><group>{0}</group><group>{0}</group></catalog>'.format(
+                    items))
+
+    def test_read_xml_file_parallel_to_dict(self):
+        """Returns the same dicts as read_xml_file, in the same order when ordered=True"""
+        for records_tag in ('staff', 'operations_department', 'employees', 'bio', 'location'):
+            expected_output = list(read_xml_file(self.small_mock_file_path, records_tag=records_tag, to_dict=True))
+            output = list(read_xml_file_parallel(
+                self.small_mock_file_path, records_tag=records_tag, to_dict=True, workers=2, task_size=1))
+            self.assertListEqual(output, expected_output)
+
+    def test_read_xml_file_parallel_to_xml_element(self):
+        """Returns the same elements as read_xml_file by default"""
+        expected_output = [ElementTree.tostring(element)
+                           for element in read_xml_file(self.small_mock_file_path, records_tag='bio')]
+        output = []
+        for element in read_xml_file_parallel(self.small_mock_file_path, records_tag='bio', workers=2):
+            self.assertIsInstance(element, Element)
+            output.append(ElementTree.tostring(element))
+
+        self.assertListEqual(output, expected_output)
+
+    def test_read_xml_file_parallel_with_namespaces(self):
+        """Carries the namespace declarations of the ancestors over to the workers parsing the records"""
+        records_tag = '{https://example.com/shop}item'
+        expected_output = [element.get('id') for element in read_xml_file(self.namespaced_file_path, records_tag)]
+
+        for task_size in (1, 1000, 10 ** 6):
+            output = [element.get('id') for element in read_xml_file_parallel(
+                self.namespaced_file_path, records_tag=records_tag, workers=3, task_size=task_size)]
+            self.assertListEqual(output, expected_output)
+
+    def test_read_xml_file_parallel_unordered(self):
+        """Returns all records, in the order their batches complete, when ordered=False"""
+        records_tag = '{https://example.com/shop}other'
+        expected_output = [element.text for element in read_xml_file(self.namespaced_file_path, records_tag)]
+        output = [element.text for element in read_xml_file_parallel(
+            self.namespaced_file_path, records_tag=records_tag, workers=3, ordered=False, task_size=100)]
+
+        self.assertListEqual(sorted(output), sorted(expected_output))
+
+    def test_read_xml_file_parallel_with_record_filter(self):
+        """Counts the records seen, accepted and rejected by the workers in the RecordFilter passed as where"""
+        record_filter = RecordFilter({'{https://example.com/shop}name': 'Item 7'})
+        output = [element.get('id') for element in read_xml_file_parallel(
+            self.namespaced_file_path, records_tag='{https://example.com/shop}item', workers=2, task_size=1000,
+            where=record_filter)]
+
+        self.assertListEqual(output, ['7', '7'])
+        self.assertEqual(record_filter.seen, 800)
+        self.assertEqual(record_filter.accepted, 2)
+        self.assertEqual(sum(record_filter.rejected.values()), 798)
+
+    def test_read_xml_file_parallel_of_an_empty_file(self):
+        """Raises the same ParseError as read_xml_file for an empty file"""
+        empty_file_path = os.path.join(self.temp_folder, 'empty.xml')
+        open(empty_file_path, 'w').close()
+
+        for reader in (read_xml_file, read_xml_file_parallel):
+            with self.assertRaisesRegex(ElementTree.ParseError, 'no element found'):
+                list(reader(empty_file_path, records_tag='item'))
+
+    def test_read_xml_file_parallel_rejects_compressed_files(self):
+        """Raises a ValueError for compressed files which can not be split into byte ranges"""
+        file_path = os.path.join(self.temp_folder, 'small_mock.xml.gz')
+        with open(file_path, 'wb') as xml_file:
+            xml_file.write(b'\x1f\x8b')
+
+        with self.assertRaises(ValueError):
+            list(read_xml_file_parallel(file_path, records_tag='staff'))
+
+    def test_read_xml_file_parallel_rejects_stats(self):
+        """Raises a ValueError for stats, which the workers would collect in copies of it"""
+        with self.assertRaisesRegex(ValueError, "stats"):
+            next(read_xml_file_parallel(self.small_mock_file_path, records_tag='staff', stats=ReaderStats()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Tests for the read_xml_files function"""
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+from collections import Counter
+from unittest import TestCase, main, skipIf
+from xml.etree import ElementTree
+
+from xml_stream import read_xml_files, RecordFilter
+
+
+@skipIf(sys.version_info < (3, 7), "read_xml_files needs Python 3.7+")
+class TestReadXmlFiles(TestCase):
+    """Test class for the read_xml_files function"""
+
+    def setUp(self) -> None:
+        """Initialize some variables"""
+        self.temp_folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_folder)
+
+        self.file_paths = []
+        for file_number in range(4):
+            file_path = os.path.join(self.temp_folder, 'drop_{}.xml'.format(file_number))
+            with open(file_path, 'w') as xml_file:
+                xml_file.write('<drop><items>{}</items></drop>'.format(''.join(
+                    '<item id="{}-{}"><price>{}</price></item>'.format(file_number, index, index)
+                    for index in range(300))))
+            self.file_paths.append(file_path)
+
+        self.compressed_file_path = os.path.join(self.temp_folder, 'drop_4.xml.gz')
+        with gzip.open(self.compressed_file_path, 'wt') as xml_file:
+            xml_file.write('<drop><item id="4-0"><price>0</price></item></drop>')
+
+        self.bad_file_path = os.path.join(self.temp_folder, 'broken.xml')
+        with open(self.bad_file_path, 'w') as xml_file:
+            xml_file.write('<drop><item id="5-0"><price>0</price></item><item id="5-1">')
+
+    def test_read_xml_files_of_directory(self):
+        """Reads every file of a directory, tagging each record with its file and keeping each file's order"""
+        output = list(read_xml_files(self.temp_folder, records_tag='item', to_dict=True, workers=2,
+                                     continue_on_error=True, message_size=50))
+
+        counts = Counter(file_path for file_path, _ in output)
+        self.assertDictEqual(counts, {**{file_path: 300 for file_path in self.file_paths},
+                                      self.compressed_file_path: 1, self.bad_file_path: 1})
+        for file_path in self.file_paths:
+            self.assertListEqual([record['id'] for path, record in output if path == file_path],
+                                 ['{}-{}'.format(file_path[-5], index) for index in range(300)])
+
+    def test_read_xml_files_of_glob_and_paths(self):
+        """Reads the files matching a glob pattern, or the given paths, passing the other arguments to the workers"""
+        output = list(read_xml_files(os.path.join(self.temp_folder, '**', 'drop_*.xml'), records_tag='item',
+                                     workers=2, where={'price': '7'}))
+        self.assertListEqual(sorted((file_path, element.get('id')) for file_path, element in output),
+                             [(file_path, '{}-7'.format(number)) for number, file_path in enumerate(self.file_paths)])
+
+        output = list(read_xml_files(self.file_paths[:1], records_tag='item', workers=1, batch_size=128,
+                                     schema={'id': '@id', 'price': ('price', int)}))
+        self.assertListEqual([len(batch) for _, batch in output], [128, 128, 44])
+        self.assertEqual(output[0][1][5].price, 5)
+
+    def test_read_xml_files_with_record_filter(self):
+        """Counts the records seen, accepted and rejected by the workers in the RecordFilter passed as where"""
+        record_filter = RecordFilter({'@id': '1-7'})
+        output = list(read_xml_files(self.file_paths, records_tag='item', workers=2, where=record_filter))
+
+        self.assertListEqual([element.get('id') for _, element in output], ['1-7'])
+        self.assertEqual(record_filter.seen, 1200)
+        self.assertEqual(record_filter.accepted, 1)
+        self.assertDictEqual(record_filter.rejected, {'start': 1199, 'parsing': 0, 'end': 0})
+
+    def test_read_xml_files_errors(self):
+        """Raises the error of a bad file, or skips its rest and reports it if continue_on_error"""
+        with self.assertRaises(ElementTree.ParseError):
+            list(read_xml_files([self.file_paths[0], self.bad_file_path], records_tag='item', workers=2))
+
+        errors = []
+        output = list(read_xml_files([self.bad_file_path, os.path.join(self.temp_folder, 'missing.xml')],
+                                     records_tag='item', workers=2, continue_on_error=True,
+                                     on_error=lambda file_path, error: errors.append((file_path, type(error)))))
+        self.assertListEqual([record.get('id') for _, record in output], ['5-0'])
+        self.assertListEqual(sorted(errors), [(self.bad_file_path, ElementTree.ParseError),
+                                              (os.path.join(self.temp_folder, 'missing.xml'), FileNotFoundError)])
+
+    def test_read_xml_files_closed_early(self):
+        """Stops the workers blocked on a full queue when the reader is closed before the end"""
+        records = read_xml_files(self.file_paths, records_tag='item', workers=2, queue_size=1, message_size=1)
+        self.assertEqual(next(records)[1].tag, 'item')
+        records.close()
+
+    def test_read_xml_files_invalid_arguments(self):
+        """Raises a ValueError for the arguments that can not be used"""
+        with self.assertRaises(ValueError):
+            next(read_xml_files(self.file_paths, records_tag='item', queue_size=0))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Tests for the read_xml_stream function"""
+import gzip
+import io
+import os
+import socket
+import subprocess
+import sys
+import threading
+import tracemalloc
+from unittest import TestCase, main
+from xml.etree.ElementTree import Element
+
+from xml_stream import read_xml_stream, XmlDictElement
+
+
+class TestReadXmlStream(TestCase):
+    """Test class for the read_xml_stream function"""
+
+    def setUp(self) -> None:
+        """Initialize some variables"""
+        test_folder_path = os.path.dirname(__file__)
+        self.small_mock_file_path = os.path.join(test_folder_path, 'small_mock.xml')
+
+        with open(self.small_mock_file_path, 'rb') as small_mock_file:
+            self.xml_bytes = small_mock_file.read()
+
+        self.expected_teams = ['Marketing', 'Customer Service']
+
+    def get_teams(self, source, **kwargs):
+        """Returns the team of each employees record read from the source"""
+        return [element.find('team').text for element in read_xml_stream(source, records_tag='employees', **kwargs)]
+
+    def test_read_xml_stream_from_binary_file_object(self):
+        """Reads records from an already open binary file object"""
+        self.assertListEqual(self.get_teams(io.BytesIO(self.xml_bytes)), self.expected_teams)
+
+        with open(self.small_mock_file_path, 'rb') as xml_file:
+            self.assertListEqual(self.get_teams(xml_file), self.expected_teams)
+
+    def test_read_xml_stream_from_gzip_file(self):
+        """Reads records from a gzip.GzipFile, decompressing as it goes"""
+        gzipped_file = gzip.GzipFile(fileobj=io.BytesIO(gzip.compress(self.xml_bytes)), mode='rb')
+        self.assertListEqual(self.get_teams(gzipped_file), self.expected_teams)
+
+    def test_read_xml_stream_from_generator_of_bytes(self):
+        """Reads records from a generator of byte chunks"""
+        chunks = (self.xml_bytes[i:i + 10] for i in range(0, len(self.xml_bytes), 10))
+        self.assertListEqual(self.get_teams(chunks), self.expected_teams)
+
+    def test_read_xml_stream_from_socket(self):
+        """Reads records from a connected socket"""
+        reader, writer = socket.socketpair()
+        sender = threading.Thread(target=lambda: (writer.sendall(self.xml_bytes), writer.close()))
+        sender.start()
+
+        try:
+            self.assertListEqual(self.get_teams(reader, chunk_size=32), self.expected_teams)
+        finally:
+            sender.join()
+            reader.close()
+
+    def test_read_xml_stream_from_subprocess_pipe(self):
+        """Reads records from the stdout pipe of a subprocess"""
+        command = [sys.executable, '-c', 'import sys; sys.stdout.buffer.write(open(sys.argv[1], "rb").read())',
+                   self.small_mock_file_path]
+
+        with subprocess.Popen(command, stdout=subprocess.PIPE) as process:
+            self.assertListEqual(self.get_teams(process.stdout), self.expected_teams)
+
+    def test_read_xml_stream_reads_chunk_size_bytes_at_a_time(self):
+        """Reads from readable sources using a read buffer of chunk_size bytes"""
+        read_sizes = []
+        source = io.BytesIO(self.xml_bytes)
+        original_read = source.read
+        source.read = lambda size=-1: read_sizes.append(size) or original_read(size)
+
+        self.assertListEqual(self.get_teams(source, chunk_size=100), self.expected_teams)
+        self.assertTrue(all(size == 100 for size in read_sizes))
+        self.assertEqual(len(read_sizes), len(self.xml_bytes) // 100 + 2)
+
+    def test_read_xml_stream_to_dict(self):
+        """Converts the records to dicts when to_dict=True"""
+        for element in read_xml_stream(io.BytesIO(self.xml_bytes), records_tag='location', to_dict=True):
+            self.assertIsInstance(element, dict)
+            self.assertEqual(element['address'], 'Kampala, Uganda')
+
+        for element in read_xml_stream(io.BytesIO(self.xml_bytes), records_tag='location'):
+            self.assertIsInstance(element, Element)
+
+    def test_read_xml_stream_to_dict_matches_converted_elements(self):
+        """Builds the same dicts straight from the parser events as when converting the parsed elements"""
+        xml_bytes = (
+            b'<root>text<item id="1">one<item id="2"><name>a</name><name>b</name>tail</item>'
+            b'<price currency="UGX">100</price><empty/></item>'
+            b'<other><item id="3"><![CDATA[x &lt; y]]>&amp; more</item></other></root>')
+
+        for chunk_size in (1, 5, 1024):
+            expected_output = [XmlDictElement(element) for element in read_xml_stream(
+                xml_bytes, records_tag='item', chunk_size=chunk_size)]
+            output = list(read_xml_stream(xml_bytes, records_tag='item', to_dict=True, chunk_size=chunk_size))
+            self.assertListEqual(output, expected_output)
+            self.assertEqual(len(output), 3)
+
+        for element in read_xml_stream(xml_bytes, records_tag='item', to_dict=True):
+            self.assertIsInstance(element, XmlDictElement)
+
+    def test_read_xml_stream_with_fields_skips_unselected_sub_elements(self):
+        """Memory used per record depends on the selected fields, not on the whole record"""
+        def chunks():
+            yield b'<entries>'
+            for index in range(10):
+                yield '<entry id="{}"><name>Entry</name><references>'.format(index).encode('utf-8')
+                for _ in range(100):
+                    yield b'<reference><author>Someone</author><title>Something</title></reference>' * 10
+                yield b'</references></entry>'
+            yield b'</entries>'
+
+        peaks = {}
+        for fields in (None, ['@id', 'name']):
+            for to_dict in (True, False):
+                tracemalloc.start()
+                output = [(record.get('id'), record.get('name')) if to_dict else (record.get('id'), len(record))
+                          for record in read_xml_stream(chunks(), records_tag='entry', to_dict=to_dict, fields=fields)]
+                peaks[(fields is None, to_dict)] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+                if fields is not None:
+                    self.assertEqual(output[3], ('3', 'Entry') if to_dict else ('3', 1))
+
+        self.assertLess(peaks[(False, True)] * 10, peaks[(True, True)])
+        self.assertLess(peaks[(False, False)] * 3, peaks[(True, False)])
+
+
+if __name__ == '__main__':
+    main()
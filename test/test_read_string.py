@@ -1,6 +1,7 @@
 """Tests for the read_xml_string function"""
+import tracemalloc
 from unittest import TestCase, main
-from xml.etree import cElementTree as ElementTree
+from xml.etree import ElementTree
 from xml.etree.ElementTree import Element
 
 from xml_stream import read_xml_string
@@ -171,6 +172,61 @@ class TestReadXmlString(TestCase):
             self.assertIsInstance(element, Element)
             self.assertEqual(ElementTree.tostring(element), ElementTree.tostring(expected_element))
 
+    def test_read_xml_string_from_bytes_and_memoryview(self):
+        """Reads XML passed as bytes or memoryview, in chunks as small as one byte"""
+        xml_bytes = self.xml_string.encode('utf-8')
+
+        for xml_data in (xml_bytes, memoryview(xml_bytes)):
+            for chunk_size in (1, 7, 1024):
+                employees_output = [element['bio'] for element in read_xml_string(
+                    xml_data, records_tag='employees', to_dict=True, chunk_size=chunk_size)]
+                self.assertListEqual(
+                    employees_output, self.expected_output['operations_department']['employees'])
+
+    def test_read_xml_string_from_iterable_of_chunks(self):
+        """Reads XML passed as an iterable of str or bytes chunks that split tags at arbitrary points"""
+        xml_bytes = self.xml_string.encode('utf-8')
+
+        for chunks in ((self.xml_string[i:i + 5] for i in range(0, len(self.xml_string), 5)),
+                       [xml_bytes[i:i + 13] for i in range(0, len(xml_bytes), 13)]):
+            staff_output = list(read_xml_string(chunks, records_tag='staff', to_dict=True))
+            self.assertListEqual(staff_output, [self.expected_output])
+
+    def test_read_xml_string_yields_records_before_input_is_exhausted(self):
+        """Yields each record as soon as its end tag has been fed, without waiting for the rest of the input"""
+        fed_chunks = []
+
+        def chunks():
+            for chunk in ('<company><staff id="1"/>', '<staff id="2"/>', '</company>'):
+                fed_chunks.append(chunk)
+                yield chunk
+
+        records = read_xml_string(chunks(), records_tag='staff')
+        self.assertEqual(next(records).get('id'), '1')
+        self.assertEqual(len(fed_chunks), 1)
+        self.assertEqual(next(records).get('id'), '2')
+        self.assertEqual(len(fed_chunks), 2)
+
+    def test_read_xml_string_releases_finished_records(self):
+        """Peak memory stays flat however many records are streamed through"""
+        record = b'<item id="1"><name>Some name</name><value>12345</value></item>'
+
+        def chunks(number_of_records):
+            yield b'<items>'
+            for _ in range(number_of_records):
+                yield record
+            yield b'</items>'
+
+        peaks = []
+        for number_of_records in (1000, 20000):
+            tracemalloc.start()
+            for _ in read_xml_string(chunks(number_of_records), records_tag='item', to_dict=True):
+                pass
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+        self.assertLess(peaks[1], peaks[0] * 2)
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,101 @@
+"""Tests for records_tag given as an anchored path or as a collection of tags and paths"""
+import asyncio
+import os
+from unittest import TestCase, main
+
+from xml_stream import read_xml_string, read_xml_file, aread_xml_stream, build_index, read_xml_file_parallel
+
+
+class TestRecordsSelection(TestCase):
+    """Test class for the selection of the records by paths and by several tags"""
+
+    def setUp(self) -> None:
+        """Initialize some variables"""
+        test_folder_path = os.path.dirname(__file__)
+        self.small_mock_file_path = os.path.join(test_folder_path, 'small_mock.xml')
+        self.catalog_xml = (
+            '<catalog>'
+            '<items><item id="1"><item id="1.1"/></item><item id="2"/></items>'
+            '<orders><order id="o1"><item id="o1.1"/></order></orders>'
+            '<item id="3"/>'
+            '</catalog>')
+
+    def get_ids(self, records):
+        """Returns the ids of the records, or (tag or path, id) for pairs of records"""
+        ids = []
+        for record in records:
+            if isinstance(record, tuple):
+                ids.append((record[0], record[1].get('id')))
+            else:
+                ids.append(record.get('id'))
+        return ids
+
+    def test_anchored_path(self):
+        """Only yields the elements at the anchored path, not those of the same tag elsewhere"""
+        for kwargs in ({}, {'to_dict': True}, {'fields': ['@id']}, {'to_dict': True, 'where': {'@id': '2'}}):
+            for chunk_size in (5, 1024):
+                records = list(read_xml_string(self.catalog_xml, records_tag='/catalog/items/item',
+                                               chunk_size=chunk_size, **kwargs))
+                expected_ids = ['2'] if 'where' in kwargs else ['1', '2']
+                self.assertListEqual(self.get_ids(records), expected_ids)
+
+    def test_several_tags_and_paths(self):
+        """Yields (tag or path, record) pairs of every kind of record in one pass, in document order"""
+        for kwargs in ({}, {'to_dict': True}, {'fields': ['@id']}, {'fields': ['@id'], 'to_dict': True}):
+            records = list(read_xml_string(self.catalog_xml, records_tag={'/catalog/items/item', 'order'},
+                                           chunk_size=7, **kwargs))
+            self.assertListEqual(self.get_ids(records), [
+                ('/catalog/items/item', '1'), ('/catalog/items/item', '2'), ('order', 'o1')])
+
+    def test_several_tags_in_batches(self):
+        """Batches hold (tag or path, record) pairs"""
+        batches = list(read_xml_string(self.catalog_xml, records_tag=['order', '/catalog/item'], batch_size=1))
+        self.assertListEqual([self.get_ids(batch) for batch in batches], [[('order', 'o1')], [('/catalog/item', '3')]])
+
+        with self.assertRaises(ValueError):
+            list(read_xml_string(self.catalog_xml, records_tag=['order', 'item'], batch_size=1, columnar=True))
+
+    def test_several_tags_in_file(self):
+        """Reads several kinds of records of a file in one pass"""
+        pairs = list(read_xml_file(self.small_mock_file_path, records_tag=('employees', 'bio'), to_dict=True))
+        expected_bios = list(read_xml_file(self.small_mock_file_path, records_tag='bio', to_dict=True))
+        expected_employees = list(read_xml_file(self.small_mock_file_path, records_tag='employees', to_dict=True))
+
+        self.assertListEqual([record for tag, record in pairs if tag == 'bio'], expected_bios)
+        self.assertListEqual([record for tag, record in pairs if tag == 'employees'], expected_employees)
+
+    def test_aread_xml_stream(self):
+        """Yields (tag or path, record) pairs asynchronously, converting them in the executor if asked"""
+        async def collect_records(**kwargs):
+            return [record async for record in aread_xml_stream(
+                [self.catalog_xml], records_tag={'/catalog/items/item', 'order'}, **kwargs)]
+
+        loop = asyncio.new_event_loop()
+        try:
+            for kwargs in ({}, {'to_dict': True}, {'to_dict': True, 'convert_in_executor': True}):
+                records = loop.run_until_complete(collect_records(**kwargs))
+                self.assertListEqual(self.get_ids(records), [
+                    ('/catalog/items/item', '1'), ('/catalog/items/item', '2'), ('order', 'o1')])
+        finally:
+            loop.close()
+
+    def test_invalid_records_tag(self):
+        """Raises a ValueError for empty paths and for the features that need a single tag"""
+        with self.assertRaises(ValueError):
+            list(read_xml_string(self.catalog_xml, records_tag='/'))
+
+        with self.assertRaises(ValueError):
+            list(read_xml_string(self.catalog_xml, records_tag=set()))
+
+        with self.assertRaises(ValueError):
+            list(read_xml_file(self.small_mock_file_path, records_tag={'employees', 'bio'}, checkpoints=True))
+
+        with self.assertRaises(ValueError):
+            build_index(self.small_mock_file_path, records_tag='/company/staff')
+
+        with self.assertRaises(ValueError):
+            list(read_xml_file_parallel(self.small_mock_file_path, records_tag={'employees'}))
+
+
+if __name__ == '__main__':
+    main()
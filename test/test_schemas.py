@@ -0,0 +1,179 @@
+"""Tests for the record schemas passed as the schema argument of the readers"""
+import asyncio
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from typing import List, NamedTuple, Optional
+from unittest import TestCase, main, skipIf
+
+from xml_stream import read_xml_file, read_xml_string, aread_xml_stream, RecordSchema, ReaderStats
+
+try:
+    from dataclasses import dataclass, field
+except ImportError:  # Python 3.6
+    dataclass = None
+
+
+class Price(NamedTuple):
+    name: str
+    price: Decimal
+    currency: str = 'EUR'
+
+
+if dataclass is not None:
+    @dataclass
+    class Product:
+        id: int = field(metadata={'path': '@id'})
+        name: str
+        price: Optional[float] = None
+        in_stock: bool = False
+        added: Optional[datetime] = None
+        tags: List[str] = field(default_factory=list)
+
+    @dataclass
+    class Employee:
+        team: str
+        first_name: str = field(metadata={'path': 'bio/@first_name'})
+        office: Optional[str] = None
+        bio: List[str] = field(default_factory=list)
+
+
+class TestRecordSchema(TestCase):
+    """Test class for the RecordSchema and the schema argument of the readers"""
+
+    def setUp(self) -> None:
+        """Initialize some variables"""
+        test_folder_path = os.path.dirname(__file__)
+        self.small_mock_file_path = os.path.join(test_folder_path, 'small_mock.xml')
+        self.products_xml = (
+            '<products>'
+            '<product id="1"><name>Pen</name><price> 1.5 </price><in_stock>true</in_stock>'
+            '<added>2021-03-04T05:06:07Z</added><tags><tag>office</tag><tag>school</tag></tags>'
+            '<tag>ignored</tag><description><p>Long <b>text</b></p></description></product>'
+            '<product id="2"><name></name><price/><in_stock>0</in_stock></product>'
+            '</products>')
+
+    @skipIf(dataclass is None, "dataclasses need Python 3.7+")
+    def test_dataclass_schema(self):
+        """Reads the records into dataclass instances with their fields converted according to their types"""
+        output = list(read_xml_string(self.products_xml, records_tag='product', schema=Product))
+
+        self.assertListEqual(output, [
+            Product(id=1, name='Pen', price=1.5, in_stock=True,
+                    added=datetime(2021, 3, 4, 5, 6, 7, tzinfo=timezone.utc), tags=[]),
+            Product(id=2, name='', price=None, in_stock=False),
+        ])
+
+    @skipIf(dataclass is None, "dataclasses need Python 3.7+")
+    def test_list_fields(self):
+        """Collects every sub element matching the last tag of the path of a list field"""
+        schema = RecordSchema(Product, paths={'tags': 'tags/tag'})
+        output = [product.tags for product in read_xml_string(self.products_xml, records_tag='product', schema=schema)]
+
+        self.assertListEqual(output, [['office', 'school'], []])
+
+    def test_named_tuple_schema(self):
+        """Reads the records into NamedTuples, missing fields getting their default values"""
+        output = list(read_xml_string(self.products_xml, records_tag='product', schema=Price,
+                                      where={'price': lambda price: bool(price)}))
+
+        self.assertListEqual(output, [Price(name='Pen', price=Decimal('1.5'))])
+
+    def test_mapping_schema(self):
+        """Reads the records into namedtuples made for a mapping of fields to paths and converters"""
+        schema = {
+            'id': ('@id', int),
+            'name': 'name',
+            'first_tag': 'tags/tag',
+            'price_in_cents': ('price', lambda price: round(float(price) * 100)),
+            'text': '.',
+        }
+        output = list(read_xml_string(self.products_xml, records_tag='product', schema=schema))
+
+        self.assertEqual(output[0], (1, 'Pen', 'office', 150, ''))
+        self.assertEqual(output[1].id, 2)
+        self.assertEqual(output[1].first_tag, None)
+        self.assertEqual(output[1].price_in_cents, None)
+        self.assertEqual(type(output[0]).__slots__, ())
+
+    def test_date_and_time_fields(self):
+        """Converts the ISO 8601 texts of the date, time and datetime fields, on every Python version"""
+        xml_string = ('<a><event><day>2021-03-04</day><at>05:06:07.250+01:30</at><added>2021-03-04 05:06:07</added>'
+                      '</event></a>')
+        schema = {'day': ('day', date), 'at': ('at', time), 'added': ('added', datetime)}
+        output = list(read_xml_string(xml_string, records_tag='event', schema=schema))
+
+        self.assertEqual(tuple(output[0]), (
+            date(2021, 3, 4), time(5, 6, 7, 250000, tzinfo=timezone(timedelta(hours=1, minutes=30))),
+            datetime(2021, 3, 4, 5, 6, 7)))
+        with self.assertRaisesRegex(ValueError, "Invalid value '2021-3-4' for the field 'day'"):
+            list(read_xml_string('<a><event><day>2021-3-4</day></event></a>', records_tag='event', schema=schema))
+
+    @skipIf(dataclass is None, "dataclasses need Python 3.7+")
+    def test_schema_with_file_and_stats(self):
+        """Reads files into typed records, timing the typing as conversion"""
+        stats = ReaderStats()
+        schema = RecordSchema(Employee, paths={'office': 'location/@name'})
+        output = list(read_xml_file(self.small_mock_file_path, records_tag='employees', schema=schema, stats=stats))
+
+        self.assertListEqual(output, [
+            Employee(team='Marketing', first_name='John', office='head office',
+                     bio=['John Doe', 'Jane Doe', 'Peter Doe']),
+            Employee(team='Customer Service', first_name='Mary', office='Kampala branch',
+                     bio=['Mary Doe', 'Harry Doe', 'Paul Doe']),
+        ])
+        self.assertEqual(stats.records_yielded, 2)
+        self.assertGreater(stats.convert_seconds, 0)
+
+    def test_schema_with_checkpoints_and_async(self):
+        """Reads typed records with checkpoints and asynchronously too"""
+        expected_output = list(read_xml_string(self.products_xml, records_tag='product', schema=Price))
+
+        async def read_all():
+            return [record async for record in aread_xml_stream(
+                iter_async_chunks(), records_tag='product', schema=Price)]
+
+        async def iter_async_chunks():
+            yield self.products_xml
+
+        loop = asyncio.new_event_loop()
+        try:
+            self.assertListEqual(loop.run_until_complete(read_all()), expected_output)
+        finally:
+            loop.close()
+
+        schema = {'team': 'team', 'bios': ('bio/@first_name', List[str])}
+        checkpointed_output = list(read_xml_file(
+            self.small_mock_file_path, records_tag='employees', schema=schema, checkpoints=True))
+        self.assertEqual(checkpointed_output[0][0], ('Marketing', ['John', 'Jane', 'Peter']))
+        resumed_output = list(read_xml_file(self.small_mock_file_path, records_tag='employees', schema=schema,
+                                            resume_from=checkpointed_output[0][1]))
+        self.assertListEqual(resumed_output, [checkpointed_output[1][0]])
+
+    def test_compiled_once(self):
+        """Compiles the schemas of types once and reuses them"""
+        self.assertIs(RecordSchema.from_schema(Price), RecordSchema.from_schema(Price))
+        schema = RecordSchema(Price)
+        self.assertIs(RecordSchema.from_schema(schema), schema)
+
+    def test_invalid_schemas(self):
+        """Raises a ValueError for invalid schemas, values and combinations of arguments"""
+        with self.assertRaisesRegex(ValueError, "Invalid schema"):
+            RecordSchema(int)
+        with self.assertRaisesRegex(ValueError, "Unknown fields"):
+            RecordSchema(Price, paths={'cost': 'price'})
+        with self.assertRaisesRegex(ValueError, "Unsupported type"):
+            RecordSchema({'value': ('value', Optional[List[List[int]]])})
+        with self.assertRaisesRegex(ValueError, "needs a path to sub elements"):
+            RecordSchema({'ids': ('@id', List[int])})
+        with self.assertRaisesRegex(ValueError, "Invalid value 'abc' for the field 'in_stock'"):
+            list(read_xml_string('<a><product id="1"><in_stock>abc</in_stock></product></a>', records_tag='product',
+                                 schema={'in_stock': ('in_stock', bool)}))
+        with self.assertRaisesRegex(ValueError, "to_dict"):
+            list(read_xml_string(self.products_xml, records_tag='product', schema=Price, to_dict=True))
+        with self.assertRaisesRegex(ValueError, "fields"):
+            list(read_xml_string(self.products_xml, records_tag='product', schema=Price, fields=['name']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Tests for the ReaderStats collected by the readers"""
+import os
+from unittest import TestCase, main
+
+from xml_stream import read_xml_file, read_xml_string, ReaderStats
+
+
+class TestReaderStats(TestCase):
+    """Test class for the statistics of the readers"""
+
+    def setUp(self) -> None:
+        """Initialize some variables"""
+        test_folder_path = os.path.dirname(__file__)
+        self.small_mock_file_path = os.path.join(test_folder_path, 'small_mock.xml')
+        self.products_xml = '<shop><products>{}</products></shop>'.format(''.join(
+            '<product id="{0}"><name>Product {0}</name>{1}</product>'.format(
+                index, '<size unit="cm">{}</size>'.format(index) if index % 2 else '')
+            for index in range(7)))
+
+    def test_counts(self):
+        """Counts the bytes read, the records seen and yielded and the elements of the records"""
+        arguments = [{}, {'to_dict': True}, {'fields': ['@id']}, {'batch_size': 3}, {'to_dict': True, 'batch_size': 3},
+                     {'batch_size': 3, 'columnar': True}]
+
+        for kwargs in arguments:
+            for chunk_size in (16, 1024):
+                stats = ReaderStats()
+                list(read_xml_string(self.products_xml, records_tag='product', chunk_size=chunk_size, stats=stats,
+                                     **kwargs))
+
+                self.assertEqual(stats.bytes_read, len(self.products_xml))
+                self.assertEqual(stats.records_seen, 7)
+                self.assertEqual(stats.records_yielded, 7)
+                self.assertEqual(stats.largest_record_elements, 3)
+                # the shop and products ancestors, and the 3 elements of the largest record at least
+                self.assertGreaterEqual(stats.peak_live_elements, 5)
+                self.assertGreater(stats.parse_seconds, 0)
+                self.assertGreater(stats.read_seconds, 0)
+
+    def test_where(self):
+        """Counts the records rejected by where as seen but not yielded"""
+        stats = ReaderStats()
+        records = list(read_xml_string(self.products_xml, records_tag='product', to_dict=True,
+                                       where={'size/@unit': 'cm'}, stats=stats))
+
+        self.assertEqual(len(records), 3)
+        self.assertEqual(stats.records_seen, 7)
+        self.assertEqual(stats.records_yielded, 3)
+
+    def test_peak_live_elements(self):
+        """The peak number of live elements stays at one record and its ancestors when records are yielded one by one"""
+        for to_dict in (False, True):
+            stats = ReaderStats()
+            for _ in read_xml_string(self.products_xml, records_tag='product', to_dict=to_dict, chunk_size=1,
+                                     stats=stats):
+                pass
+
+            self.assertEqual(stats.peak_live_elements, 5)
+
+    def test_convert_seconds(self):
+        """Times the conversion to dicts apart from the parsing"""
+        stats = ReaderStats()
+        list(read_xml_file(self.small_mock_file_path, records_tag='employees', to_dict=True, stats=stats))
+        self.assertGreater(stats.convert_seconds, 0)
+
+        stats = ReaderStats()
+        list(read_xml_file(self.small_mock_file_path, records_tag='employees', stats=stats))
+        self.assertEqual(stats.convert_seconds, 0)
+        self.assertEqual(stats.bytes_read, os.path.getsize(self.small_mock_file_path))
+
+    def test_context_manager_and_callback(self):
+        """Calls the callback with the stats on exit, having accumulated the statistics of every read"""
+        reported = []
+        with ReaderStats(callback=reported.append) as stats:
+            list(read_xml_string(self.products_xml, records_tag='product', stats=stats))
+            list(read_xml_string(self.products_xml, records_tag='product', stats=stats))
+
+        self.assertListEqual(reported, [stats])
+        self.assertEqual(stats.records_yielded, 14)
+        self.assertGreater(stats.total_seconds, 0)
+        self.assertEqual(stats.as_dict()['records_seen'], 14)
+        self.assertNotIn('callback', stats.as_dict())
+
+        stats.reset()
+        self.assertEqual(stats.records_yielded, 0)
+
+    def test_checkpoints(self):
+        """Stats are not supported with checkpoints"""
+        with self.assertRaises(ValueError):
+            list(read_xml_file(self.small_mock_file_path, records_tag='bar', checkpoints=True, stats=ReaderStats()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Module containing the protected implementation of the asyncio readers"""
+import asyncio
+from concurrent.futures import Executor
+from typing import Optional, Union, AsyncIterator, Any, Mapping, Callable, Iterable, List, Tuple
+from xml.etree.ElementTree import Element
+
+from .backends import AUTO_BACKEND
+from .data_types import XmlDictElement
+from .filters import RecordFilter
+from .schemas import RecordSchema
+from ._namespaces import KEEP_NAMESPACES
+from ._readers import create_chunks_parser
+from ._sources import aiter_xml_chunks, DEFAULT_CHUNK_SIZE
+
+
+def _convert_records(elements: List[Union[Element, Tuple[str, Element]]]
+                     ) -> List[Union[XmlDictElement, Tuple[str, XmlDictElement]]]:
+    """Converts the elements, or the elements of (tag or path, element) pairs, to dicts"""
+    return [(element[0], XmlDictElement(element[1])) if isinstance(element, tuple) else XmlDictElement(element)
+            for element in elements]
+
+
+async def aread_xml_stream(source: Any, records_tag: Optional[Union[str, Iterable[str]]],
+                           to_dict: Optional[bool] = False, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                           fields: Optional[Iterable[str]] = None,
+                           where: Optional[Union[RecordFilter, Mapping[str, Any], Callable[[Any], bool]]] = None,
+                           convert_in_executor: bool = False, executor: Optional[Executor] = None,
+                           max_buffered_elements: Optional[int] = None, backend: str = AUTO_BACKEND,
+                           schema: Optional[Union[RecordSchema, type, Mapping[str, Any]]] = None,
+                           namespaces: Optional[Mapping[str, str]] = None, namespace_mode: str = KEEP_NAMESPACES
+                           ) -> Union[AsyncIterator[Element], AsyncIterator[XmlDictElement]]:
+    """
+    Reads XML from an asynchronous source element by element and returns an asynchronous iterator
+    of either dicts or XML elements, to be used with `async for`.
+
+    The source can be an object with a coroutine read method (an asyncio.StreamReader, an aiohttp response's
+    content...), which is read chunk_size bytes at a time, or any asynchronous iterable of str/bytes chunks.
+    Each chunk is fed to the parser as soon as it arrives, and the records that ended in it are yielded.
+
+    If convert_in_executor is True, the records are parsed as elements and converted to dicts in the executor
+    (or the event loop's default executor), a chunk's records at a time, so that converting very large records
+    does not block the event loop. fields, where, max_buffered_elements, backend, schema, namespaces and
+    namespace_mode are as in read_xml_stream, but batches and stats are not supported
+    """
+    to_dict_in_executor = to_dict and convert_in_executor
+    parser = create_chunks_parser(records_tag, to_dict=to_dict and not to_dict_in_executor, fields=fields, where=where,
+                                  max_buffered_elements=max_buffered_elements, backend=backend, schema=schema,
+                                  namespaces=namespaces, namespace_mode=namespace_mode)
+    loop = asyncio.get_event_loop()
+
+    async for chunk in aiter_xml_chunks(source, chunk_size=chunk_size):
+        records = parser.feed(chunk)
+        if records and to_dict_in_executor:
+            records = await loop.run_in_executor(executor, _convert_records, records)
+
+        for record in records:
+            yield record
+
+    records = parser.close()
+    if records and to_dict_in_executor:
+        records = await loop.run_in_executor(executor, _convert_records, records)
+
+    for record in records:
+        yield record
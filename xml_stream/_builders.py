@@ -0,0 +1,461 @@
+"""Module containing protected parser targets that build records straight from the parser's events"""
+from typing import Dict, List, Optional, Union, Iterator, Iterable, Tuple, Callable
+from xml.etree.ElementTree import Element
+
+from .data_types import XmlDictElement
+from .filters import RecordFilter, REJECTED_AT_START, REJECTED_WHILE_PARSING, REJECTED_AT_END, _ConditionsTree
+from ._namespaces import OutputNames
+from ._paths import FieldsTree, split_steps, get_records_selector
+
+
+class _Node(list):
+    """
+    A light-weight stand-in for xml.etree.ElementTree.Element holding only what the dict conversion needs:
+    the tag, attributes, text and (as the list items) sub elements
+    """
+    __slots__ = ('tag', 'attrib', 'text',)
+
+    def __init__(self, tag: str, attrib: Dict[str, str]):
+        # list.__new__ already returns an empty list so list.__init__ is not called
+        self.tag = tag
+        self.attrib = attrib
+        self.text: Optional[str] = None
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        """Returns the value of the attribute called key, or default if there is no such attribute"""
+        return self.attrib.get(key, default)
+
+    def findall(self, path: str) -> List['_Node']:
+        """Returns the sub elements at the path made of tags (or '*') separated by '/'"""
+        nodes = [self]
+        for tag in split_steps(path):
+            nodes = [child for node in nodes for child in node if tag == '*' or child.tag == tag]
+        return nodes
+
+    def find(self, path: str) -> Optional['_Node']:
+        """Returns the first sub element at the path, or None if there is none"""
+        nodes = self.findall(path)
+        return nodes[0] if nodes else None
+
+    def findtext(self, path: str, default: Optional[str] = None) -> Optional[str]:
+        """Returns the text of the first sub element at the path, or default if there is none"""
+        node = self.find(path)
+        return default if node is None else node.text or ''
+
+
+class DictRecordsBuilder:
+    """
+    A target for xml.etree.ElementTree.XMLParser that converts every element called records_tag into
+    an XmlDictElement as soon as it ends, without building xml.etree.ElementTree.Element objects.
+    Everything outside the records is ignored. The finished records are collected in the records list,
+    as (tag or path, record) pairs if records_tag is a collection of tags and anchored paths.
+    The names of the elements and attributes of the records are replaced with their output names if given
+    """
+
+    def __init__(self, records_tag: Union[str, Iterable[str]], output_names: Optional[OutputNames] = None):
+        self.records_tag = records_tag
+        self._output_names = output_names
+        self.records: List[Union[XmlDictElement, Tuple[str, XmlDictElement]]] = []
+        self._selector = get_records_selector(records_tag)
+        self._is_paired = self._selector is not None and self._selector.is_multiple
+        # the function converting the finished records, replaceable e.g. to time the conversions
+        self.convert: Callable[[_Node], XmlDictElement] = XmlDictElement
+        self._stack: List[_Node] = []
+        self._record_depths: List[int] = []
+        self._text_parts: List[str] = []
+        # the node whose text is being received i.e. the last started node, until it gets a sub element or ends
+        self._text_node: Optional[_Node] = None
+
+    def _flush_text(self):
+        """Sets the data received so far as the text of the node receiving text, if any"""
+        if self._text_node is not None:
+            self._text_node.text = ''.join(self._text_parts)
+        self._text_parts.clear()
+
+    def _push(self, node: _Node):
+        """Adds a started node to the record being built"""
+        if self._text_parts:
+            self._flush_text()
+
+        if self._stack:
+            self._stack[-1].append(node)
+
+        self._text_node = node
+        self._stack.append(node)
+
+    def start(self, tag: str, attrib: Dict[str, str]):
+        """Called by the parser for each start tag"""
+        if self._selector is None:
+            is_record = tag == self.records_tag
+        else:
+            is_record = self._selector.start(tag) is not None
+
+        if not self._stack and not is_record:
+            return
+
+        output_names = self._output_names
+        if output_names is not None:
+            tag = output_names[tag]
+            attrib = output_names.rename_attributes(attrib)
+
+        self._push(_Node(tag, attrib))
+        if is_record:
+            self._record_depths.append(len(self._stack))
+
+    def data(self, data: str):
+        """Called by the parser for each piece of text"""
+        if self._text_node is not None:
+            self._text_parts.append(data)
+
+    def end(self, tag: str):
+        """Called by the parser for each end tag"""
+        selection = self._selector.end() if self._selector is not None else None
+        stack = self._stack
+
+        if not stack:
+            return
+
+        if self._text_parts:
+            self._flush_text()
+        self._text_node = None
+
+        if self._record_depths and self._record_depths[-1] == len(stack):
+            self._record_depths.pop()
+            record = self.convert(stack[-1])
+            self.records.append((selection, record) if self._is_paired else record)
+
+        stack.pop()
+
+    def close(self):
+        """Called by the parser when the document is closed"""
+        return None
+
+
+# the selections of the sub elements that are fully selected and of those that are not selected at all
+_ALL_SELECTED = FieldsTree()
+_NOT_SELECTED = FieldsTree()
+
+
+class SelectiveRecordsBuilder:
+    """
+    A target for xml.etree.ElementTree.XMLParser that builds the elements called records_tag, keeping only the
+    selected fields and dropping the records rejected by the record filter as early as possible. Sub elements that
+    are neither on the path of a selected field nor of a filter condition are skipped without being built.
+    The finished records are collected in the records list, as XmlDictElements if to_dict else as Elements, in
+    (tag or path, record) pairs if records_tag is a collection of tags and anchored paths.
+    Records nested in other records are built apart, by nested builders, and come before the outer record, unless
+    outermost_only is True in which case they are only part of the outer record.
+    The names of the elements and attributes of the records are replaced with their output names if given,
+    once the fields and conditions are matched
+    """
+
+    def __init__(self, records_tag: Union[str, Iterable[str]], fields: Optional[FieldsTree] = None,
+                 record_filter: Optional[RecordFilter] = None, to_dict: bool = False,
+                 output_names: Optional[OutputNames] = None, outermost_only: bool = False):
+        self.records_tag = records_tag
+        self._output_names = output_names
+        self._outermost_only = outermost_only
+        # the tag or path of the records of a builder of nested records, which follows a single tag
+        self._record_label: Optional[str] = None
+        self.records: List[Union[Element, XmlDictElement, Tuple[str, Union[Element, XmlDictElement]]]] = []
+        self._selector = get_records_selector(records_tag)
+        self._is_paired = self._selector is not None and self._selector.is_multiple
+        self._fields = fields if fields is not None else _ALL_SELECTED
+        self._record_filter = record_filter
+        self._conditions = record_filter.conditions_tree if record_filter is not None else None
+        self._evaluated_conditions: List[bool] = []
+        self._to_dict = to_dict
+        self._new_node = _Node if to_dict else Element
+        # the function converting the finished records to dicts, replaceable e.g. to time the conversions
+        self.convert: Callable[[_Node], XmlDictElement] = XmlDictElement
+
+        # the open elements of the record, whether each is part of the record (else it is only there for
+        # the filter's conditions), its selection and its conditions tree
+        self._stack: List[Union[_Node, Element]] = []
+        self._is_kept: List[bool] = []
+        self._selections: List[FieldsTree] = []
+        self._conditions_stack: List[Optional[_ConditionsTree]] = []
+        self._skipped_depth = 0
+        # the builders of the records nested in the record being built, which are still open
+        self._nested_builders: List['SelectiveRecordsBuilder'] = []
+
+        self._text_parts: List[str] = []
+        self._text_node: Optional[Union[_Node, Element]] = None
+        self._tail_node: Optional[Element] = None
+
+    def _flush_text(self):
+        """Sets the data received so far as the text of the node receiving text, or the tail of the last ended node"""
+        if self._text_node is not None:
+            self._text_node.text = ''.join(self._text_parts)
+        elif self._tail_node is not None:
+            self._tail_node.tail = ''.join(self._text_parts)
+            self._tail_node = None
+        self._text_parts.clear()
+
+    def _reject(self, rejection_point: str, number_of_open_elements: int):
+        """Drops the current record, skipping the end tags of its open elements"""
+        self._record_filter.rejected[rejection_point] += 1
+        self._skipped_depth = number_of_open_elements
+        self._stack.clear()
+        self._is_kept.clear()
+        self._selections.clear()
+        self._conditions_stack.clear()
+        self._text_node = None
+
+    def _check(self, index: int, predicate: Callable[[Optional[str]], bool], value: Optional[str]) -> bool:
+        """Checks a condition of the filter if it has not yet been checked for the current record"""
+        if self._evaluated_conditions[index]:
+            return True
+
+        self._evaluated_conditions[index] = True
+        return predicate(value)
+
+    def _start_nested_record(self, tag: str, attrib: Dict[str, str], record_selection: Optional[str]):
+        """Starts a record nested in the record being built with a builder of its own, adding it to the same records"""
+        nested_builder = SelectiveRecordsBuilder(tag, fields=self._fields, record_filter=self._record_filter,
+                                                 to_dict=self._to_dict, output_names=self._output_names,
+                                                 outermost_only=True)
+        nested_builder.records = self.records
+        nested_builder.convert = self.convert
+        nested_builder._is_paired = self._is_paired
+        nested_builder._record_label = record_selection
+        nested_builder.start(tag, attrib)
+        self._nested_builders.append(nested_builder)
+
+    def start(self, tag: str, attrib: Dict[str, str]):
+        """Called by the parser for each start tag"""
+        record_selection = self._selector.start(tag) if self._selector is not None else None
+        is_record = (tag == self.records_tag) if self._selector is None else record_selection is not None
+
+        if self._nested_builders:
+            for nested_builder in self._nested_builders:
+                nested_builder.start(tag, attrib)
+
+        if self._text_parts:
+            self._flush_text()
+        self._tail_node = None
+
+        if self._skipped_depth:
+            self._skipped_depth += 1
+            if is_record and not self._outermost_only:
+                self._start_nested_record(tag, attrib, record_selection)
+            return
+
+        stack = self._stack
+        if stack:
+            if is_record and not self._outermost_only:
+                self._start_nested_record(tag, attrib, record_selection)
+
+            selection = self._selections[-1]
+            if selection is not _ALL_SELECTED and selection is not _NOT_SELECTED:
+                selection = selection.children.get(tag, _NOT_SELECTED)
+                if selection.is_selected:
+                    selection = _ALL_SELECTED
+
+            conditions = self._conditions_stack[-1]
+            if conditions is not None:
+                conditions = conditions.children.get(tag)
+
+            if selection is _NOT_SELECTED and conditions is None:
+                # the element is neither on the path of a selected field nor of a condition
+                self._text_node = None
+                self._skipped_depth = 1
+                return
+
+        elif is_record:
+            selection = self._fields
+            conditions = self._conditions
+            if self._record_filter is not None:
+                self._record_filter.seen += 1
+                self._evaluated_conditions = [False] * self._record_filter.number_of_conditions
+
+        else:
+            return
+
+        if conditions is not None:
+            for name, index, predicate in conditions.attribute_conditions:
+                if not self._check(index, predicate, attrib.get(name)):
+                    self._reject(REJECTED_WHILE_PARSING if stack else REJECTED_AT_START, len(stack) + 1)
+                    return
+
+        if selection is not _ALL_SELECTED:
+            attrib = selection.select_attributes(attrib)
+
+        output_names = self._output_names
+        if output_names is not None:
+            tag = output_names[tag]
+            attrib = output_names.rename_attributes(attrib)
+
+        node = self._new_node(tag, attrib)
+        is_kept = selection is not _NOT_SELECTED
+        if stack and is_kept:
+            stack[-1].append(node)
+
+        stack.append(node)
+        self._is_kept.append(is_kept)
+        self._selections.append(selection)
+        self._conditions_stack.append(conditions)
+        self._text_node = node
+
+    def data(self, data: str):
+        """Called by the parser for each piece of text"""
+        if self._text_node is not None or self._tail_node is not None:
+            self._text_parts.append(data)
+
+        if self._nested_builders:
+            for nested_builder in self._nested_builders:
+                nested_builder.data(data)
+
+    def end(self, tag: str):
+        """Called by the parser for each end tag"""
+        record_selection = self._selector.end() if self._selector is not None else self._record_label
+
+        if self._nested_builders:
+            for nested_builder in self._nested_builders:
+                nested_builder.end(tag)
+            self._nested_builders = [nested_builder for nested_builder in self._nested_builders
+                                     if nested_builder._stack or nested_builder._skipped_depth]
+
+        if self._text_parts:
+            self._flush_text()
+        self._text_node = None
+        self._tail_node = None
+
+        if self._skipped_depth:
+            self._skipped_depth -= 1
+            return
+
+        stack = self._stack
+        if not stack:
+            return
+
+        node = stack[-1]
+        conditions = self._conditions_stack[-1]
+
+        if conditions is not None and conditions.text_condition is not None:
+            index, predicate = conditions.text_condition
+            if not self._check(index, predicate, node.text):
+                self._reject(REJECTED_WHILE_PARSING if len(stack) > 1 else REJECTED_AT_END, len(stack) - 1)
+                return
+
+        stack.pop()
+        is_kept = self._is_kept.pop()
+        self._selections.pop()
+        self._conditions_stack.pop()
+
+        if not self._to_dict and is_kept:
+            self._tail_node = node
+
+        if not stack:
+            self._finish_record(node, record_selection)
+
+    def _finish_record(self, node: Union[_Node, Element], record_selection: Optional[str]):
+        """
+        Checks the conditions left and the predicate of the filter, and adds the record to the records if it passes
+        """
+        record_filter = self._record_filter
+
+        if record_filter is not None:
+            if not all(self._evaluated_conditions):
+                # the conditions on paths that are missing in the record are checked against None
+                for index, predicate in self._iter_conditions(record_filter.conditions_tree):
+                    if not self._check(index, predicate, None):
+                        record_filter.rejected[REJECTED_AT_END] += 1
+                        return
+
+            if record_filter.predicate is not None and not record_filter.predicate(node):
+                record_filter.rejected[REJECTED_AT_END] += 1
+                return
+
+            record_filter.accepted += 1
+
+        record = self.convert(node) if self._to_dict else node
+        self.records.append((record_selection, record) if self._is_paired else record)
+
+    def _iter_conditions(self, conditions: _ConditionsTree) -> Iterator[Tuple[int, Callable]]:
+        """Yields the (index, predicate) of every condition in the conditions tree"""
+        for _, index, predicate in conditions.attribute_conditions:
+            yield index, predicate
+
+        if conditions.text_condition is not None:
+            yield conditions.text_condition
+
+        for child in conditions.children.values():
+            yield from self._iter_conditions(child)
+
+    def close(self):
+        """Called by the parser when the document is closed"""
+        return None
+
+
+class BufferLimit:
+    """
+    Follows the parser's events to count the elements buffered for the record being parsed (its open ancestors and
+    its elements so far, or the open elements outside of any record) and raises a ValueError as soon as there are more
+    than max_buffered_elements of them
+    """
+
+    def __init__(self, records_tag: Union[str, Iterable[str]], max_buffered_elements: int):
+        if max_buffered_elements < 1:
+            raise ValueError("max_buffered_elements should be at least 1, got {}".format(max_buffered_elements))
+
+        self.records_tag = records_tag
+        self.max_buffered_elements = max_buffered_elements
+        self._selector = get_records_selector(records_tag)
+        self._number_of_open_elements = 0
+        # the number of open elements when the outermost record being parsed started, 0 when outside of any record
+        self._record_depth = 0
+        self._record_elements = 0
+
+    def start(self, tag: str):
+        """Called for the start tag of every element"""
+        self._number_of_open_elements += 1
+        if self._selector is None:
+            is_record = tag == self.records_tag
+        else:
+            is_record = self._selector.start(tag) is not None
+
+        if self._record_depth:
+            self._record_elements += 1
+            number_of_buffered_elements = self._record_depth - 1 + self._record_elements
+        else:
+            if is_record:
+                self._record_depth = self._number_of_open_elements
+                self._record_elements = 1
+            number_of_buffered_elements = self._number_of_open_elements
+
+        if number_of_buffered_elements > self.max_buffered_elements:
+            raise ValueError(
+                "More than max_buffered_elements={} elements are buffered at <{}>: {} is too large".format(
+                    self.max_buffered_elements, tag,
+                    'the record being parsed' if self._record_depth else 'the nesting of the elements'))
+
+    def end(self):
+        """Called for the end tag of every element"""
+        if self._selector is not None:
+            self._selector.end()
+
+        if self._record_depth == self._number_of_open_elements:
+            self._record_depth = self._record_elements = 0
+        self._number_of_open_elements -= 1
+
+
+class LimitedTarget:
+    """A parser target passing the parser's events on to a records builder, within the BufferLimit given"""
+
+    def __init__(self, builder: Union[DictRecordsBuilder, SelectiveRecordsBuilder], limit: BufferLimit):
+        self._builder = builder
+        self._limit = limit
+        self.records = builder.records
+        self.data = builder.data
+        self.close = builder.close
+
+    def start(self, tag: str, attrib: Dict[str, str]):
+        """Called by the parser for each start tag"""
+        self._limit.start(tag)
+        self._builder.start(tag, attrib)
+
+    def end(self, tag: str):
+        """Called by the parser for each end tag"""
+        self._builder.end(tag)
+        self._limit.end()
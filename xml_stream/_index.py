@@ -0,0 +1,329 @@
+"""
+Module containing the protected implementation of the record index: a compact sidecar file holding the byte offset,
+length and key of every record of an XML file, so that records can be read without scanning the file
+"""
+import json
+import mmap
+import os
+import sys
+from array import array
+from bisect import bisect_left
+from itertools import repeat
+from typing import Optional, Union, Iterator, Iterable, Callable, Tuple, Dict, List, Any
+from xml.etree.ElementTree import Element
+
+from .data_types import XmlDictElement, Checkpoint
+from ._builders import SelectiveRecordsBuilder
+from ._paths import compile_fields, split_path, check_single_tag
+from ._readers import read_xml_stream, ChunksParser, _iter_records
+from ._scanner import iter_record_spans, get_closing_tags, ScanContext
+from ._sources import iter_xml_chunks, map_xml_buffer, detect_compression
+
+INDEX_FILE_EXTENSION = '.xsidx'
+
+_MAGIC = b'XSIDX\x00\x00\x01'
+# the item sizes of the sections following the header: offsets, lengths, context ids, key offsets, key lengths and
+# the record numbers sorted by key, followed by the keys
+_SECTION_TYPECODES = ('Q', 'Q', 'I', 'Q', 'I', 'Q',)
+# the key length of the records without a key
+_NO_KEY = 0xFFFFFFFF
+
+
+def get_index_path(file_path: str) -> str:
+    """Returns the default path of the index of an XML file, next to the file"""
+    return file_path + INDEX_FILE_EXTENSION
+
+
+def _get_key(record: Element, tags: List[str], attribute: Optional[str]) -> Optional[str]:
+    """Returns the text or attribute at the path made of the tags and attribute in the record, or None if missing"""
+    node = record.find('/'.join(tags)) if tags else record
+    if node is None:
+        return None
+
+    return node.get(attribute) if attribute is not None else node.text or ''
+
+
+def _iter_keys(xml_file, records_tag: str, key: Union[str, Callable[[Element], Any]]) -> Iterator[Optional[str]]:
+    """Yields the key of every outermost record of the file, in file order"""
+    if callable(key):
+        builder = SelectiveRecordsBuilder(records_tag, outermost_only=True)
+        get_key = key
+    else:
+        tags, attribute = split_path(key)
+        builder = SelectiveRecordsBuilder(records_tag, fields=compile_fields([key]), outermost_only=True)
+
+        def get_key(record: Element) -> Optional[str]:
+            return _get_key(record, tags, attribute)
+
+    for record in _iter_records(iter_xml_chunks(xml_file), parser=ChunksParser(records_tag, builder=builder)):
+        record_key = get_key(record)
+        yield None if record_key is None else str(record_key)
+
+
+def build_index(file_path: str, records_tag: str, key: Optional[Union[str, Callable[[Element], Any]]] = None,
+                index_path: Optional[str] = None) -> str:
+    """
+    Builds the index of the records called records_tag of an (uncompressed) XML file and returns its path.
+
+    The index holds the byte offset and length of every record, the namespace context of its ancestors, and its key
+    if key is given: either a path relative to the record like '@id' or 'Ref/Id' (the first element it matches,
+    '' for empty elements), or a callable taking the record as an xml.etree.ElementTree.Element.
+    It is saved at index_path, by default next to the file with the '.xsidx' extension.
+    An empty file, which has no records, gets an empty index
+    """
+    check_single_tag(records_tag, "Indexes")
+    if detect_compression(file_path) is not None:
+        raise ValueError("Compressed files can not be indexed as they can not be read at random offsets")
+
+    index_path = index_path or get_index_path(file_path)
+    file_stat = os.stat(file_path)
+
+    offsets, lengths, context_ids, key_offsets, key_lengths = (array(typecode) for typecode in _SECTION_TYPECODES[:5])
+    contexts: Dict[ScanContext, int] = {}
+    keys_blob = bytearray()
+    keyed_records: List[Tuple[bytes, int]] = []
+
+    with open(file_path, 'rb') as xml_file, map_xml_buffer(file_path) as buffer:
+        keys = _iter_keys(xml_file, records_tag, key) if key is not None else repeat(None)
+
+        for record_number, ((start, end, context), record_key) in enumerate(
+                zip(iter_record_spans(buffer, records_tag), keys)):
+            context_id = contexts.get(context)
+            if context_id is None:
+                contexts[context] = context_id = len(contexts)
+
+            offsets.append(start)
+            lengths.append(end - start)
+            context_ids.append(context_id)
+            key_offsets.append(len(keys_blob))
+
+            if record_key is None:
+                key_lengths.append(_NO_KEY)
+            else:
+                encoded_key = record_key.encode('utf-8')
+                keys_blob += encoded_key
+                key_lengths.append(len(encoded_key))
+                keyed_records.append((encoded_key, record_number))
+
+    # sorting is stable so records with the same key stay in file order
+    keyed_records.sort(key=lambda keyed_record: keyed_record[0])
+    key_order = array(_SECTION_TYPECODES[5], (record_number for _, record_number in keyed_records))
+
+    header = json.dumps({
+        'records_tag': records_tag,
+        'key': key if isinstance(key, str) else None,
+        'file_size': file_stat.st_size,
+        'file_mtime_ns': file_stat.st_mtime_ns,
+        'byteorder': sys.byteorder,
+        'number_of_records': len(offsets),
+        'number_of_keys': len(key_order),
+        'contexts': [[prolog.decode('latin-1'), [start_tag.decode('latin-1') for start_tag in ancestors]]
+                     for prolog, ancestors in contexts],
+    }).encode('utf-8')
+    # pad the header so that the sections are aligned
+    header += b' ' * (-len(header) % 8)
+
+    temporary_path = index_path + '.tmp'
+    with open(temporary_path, 'wb') as index_file:
+        index_file.write(_MAGIC)
+        index_file.write(len(header).to_bytes(8, 'little'))
+        index_file.write(header)
+        for section in (offsets, lengths, context_ids, key_offsets, key_lengths, key_order):
+            section.tofile(index_file)
+        index_file.write(keys_blob)
+
+    os.replace(temporary_path, index_path)
+    return index_path
+
+
+class RecordIndex:
+    """
+    A read-only view of an index built by build_index, memory-mapped so that opening it and looking records up
+    do not load the whole index. It is a context manager closing the index on exit
+    """
+
+    def __init__(self, index_path: str):
+        self._file = open(index_path, 'rb')
+        self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views: List[memoryview] = []
+
+        if self._buffer[:len(_MAGIC)] != _MAGIC:
+            self.close()
+            raise ValueError("'{}' is not an xml_stream index".format(index_path))
+
+        header_length = int.from_bytes(self._buffer[8:16], 'little')
+        header = json.loads(self._buffer[16:16 + header_length].decode('utf-8'))
+
+        if header['byteorder'] != sys.byteorder:
+            self.close()
+            raise ValueError("The index '{}' was built on a machine of another byte order".format(index_path))
+
+        self.records_tag: str = header['records_tag']
+        self.key: Optional[str] = header['key']
+        self.number_of_records: int = header['number_of_records']
+        self._file_size = header['file_size']
+        self._file_mtime_ns = header['file_mtime_ns']
+        self.contexts: List[ScanContext] = [
+            (prolog.encode('latin-1'), tuple(start_tag.encode('latin-1') for start_tag in ancestors))
+            for prolog, ancestors in header['contexts']]
+
+        view = memoryview(self._buffer)
+        self._views.append(view)
+        sections = []
+        position = 16 + header_length
+        for typecode, length in zip(_SECTION_TYPECODES, (self.number_of_records,) * 5 + (header['number_of_keys'],)):
+            size = array(typecode).itemsize * length
+            section = view[position:position + size].cast(typecode)
+            self._views.append(section)
+            sections.append(section)
+            position += size
+
+        self.offsets, self.lengths, self.context_ids, self._key_offsets, self._key_lengths, self._key_order = sections
+        self._keys = view[position:]
+        self._views.append(self._keys)
+
+    def close(self):
+        """Releases the memory-mapped index"""
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        self._buffer.close()
+        self._file.close()
+
+    def __enter__(self) -> 'RecordIndex':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def check(self, file_path: str):
+        """Raises a ValueError if the XML file has changed since the index was built"""
+        file_stat = os.stat(file_path)
+        if (file_stat.st_size, file_stat.st_mtime_ns) != (self._file_size, self._file_mtime_ns):
+            raise ValueError("The index of '{}' is out of date, rebuild it with build_index".format(file_path))
+
+    def get_key(self, record_number: int) -> Optional[str]:
+        """Returns the key of a record, or None if it has none"""
+        key_length = self._key_lengths[record_number]
+        if key_length == _NO_KEY:
+            return None
+
+        key_offset = self._key_offsets[record_number]
+        return bytes(self._keys[key_offset:key_offset + key_length]).decode('utf-8')
+
+    def find_key(self, key: str) -> Optional[int]:
+        """Returns the number of the first record with the given key, or None if there is none"""
+        encoded_key = key.encode('utf-8')
+        key_order, key_offsets, key_lengths, keys = self._key_order, self._key_offsets, self._key_lengths, self._keys
+        low, high = 0, len(key_order)
+
+        while low < high:
+            middle = (low + high) // 2
+            key_offset = key_offsets[key_order[middle]]
+            if keys[key_offset:key_offset + key_lengths[key_order[middle]]].tobytes() < encoded_key:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low < len(key_order):
+            record_number = key_order[low]
+            key_offset = key_offsets[record_number]
+            if keys[key_offset:key_offset + key_lengths[record_number]].tobytes() == encoded_key:
+                return record_number
+
+        return None
+
+    def find_offset(self, offset: int) -> Optional[int]:
+        """Returns the number of the record starting at the given byte offset, or None if there is none"""
+        record_number = bisect_left(self.offsets, offset)
+        if record_number < self.number_of_records and self.offsets[record_number] == offset:
+            return record_number
+
+        return None
+
+    def iter_spans(self, first_record_number: int = 0) -> Iterator[Tuple[int, int, ScanContext]]:
+        """Yields (start, end, context) for every record from the given one, like iter_record_spans does"""
+        offsets, lengths, context_ids, contexts = self.offsets, self.lengths, self.context_ids, self.contexts
+
+        for record_number in range(first_record_number, self.number_of_records):
+            start = offsets[record_number]
+            yield start, start + lengths[record_number], contexts[context_ids[record_number]]
+
+
+def _open_index(file_path: str, index_path: Optional[str]) -> RecordIndex:
+    """Opens the index of the XML file, checking that it is up to date"""
+    index = RecordIndex(index_path or get_index_path(file_path))
+    try:
+        index.check(file_path)
+    except ValueError:
+        index.close()
+        raise
+
+    return index
+
+
+def _read_indexed_record(buffer, index: RecordIndex, record_number: int, to_dict: bool,
+                         kwargs: Dict[str, Any]) -> Optional[Union[Element, XmlDictElement]]:
+    """Parses a single record found in the index, with the namespace context of its ancestors"""
+    start, end, (prolog, ancestors) = next(index.iter_spans(record_number))
+    chunks = (prolog + b''.join(ancestors), buffer[start:end], get_closing_tags(ancestors))
+    records = list(read_xml_stream(chunks, records_tag=index.records_tag, to_dict=to_dict, **kwargs))
+
+    # records nested in the record are yielded before it
+    return records[-1] if records else None
+
+
+def read_index(file_path: str, index_path: Optional[str] = None) -> Iterator[Tuple[int, int, Optional[str]]]:
+    """Yields the (byte offset, length, key) of every record of the index of the XML file, in file order"""
+    with _open_index(file_path, index_path) as index:
+        for record_number in range(index.number_of_records):
+            yield index.offsets[record_number], index.lengths[record_number], index.get_key(record_number)
+
+
+def get_checkpoint(file_path: str, record_number: int, index_path: Optional[str] = None) -> Checkpoint:
+    """
+    Returns the checkpoint just before the record_number-th record (from 0) of the index of the XML file,
+    from which read_xml_file can be resumed with resume_from, e.g. to split the reading of a file across jobs
+    """
+    with _open_index(file_path, index_path) as index:
+        if not 0 <= record_number < index.number_of_records:
+            raise IndexError("The index has no record number {}".format(record_number))
+
+        prolog, ancestors = index.contexts[index.context_ids[record_number]]
+        return Checkpoint(index.offsets[record_number], prolog=prolog, ancestors=ancestors)
+
+
+def get_record(file_path: str, key: Any, to_dict: Optional[bool] = False, index_path: Optional[str] = None,
+               **kwargs) -> Optional[Union[Element, XmlDictElement]]:
+    """
+    Returns the first record of the XML file with the given key, looked up in the index built by build_index
+    and read straight from its byte offset, as an XML element or as a dict if to_dict. Returns None if there is no
+    such record. Any other keyword argument of read_xml_stream (e.g. fields) is used to parse the record
+    """
+    with _open_index(file_path, index_path) as index:
+        record_number = index.find_key(str(key))
+        if record_number is None:
+            return None
+
+        with map_xml_buffer(file_path) as buffer:
+            return _read_indexed_record(buffer, index, record_number, to_dict=to_dict, kwargs=kwargs)
+
+
+def read_records_at(file_path: str, offsets: Iterable[int], to_dict: Optional[bool] = False,
+                    index_path: Optional[str] = None,
+                    **kwargs) -> Union[Iterator[Element], Iterator[XmlDictElement]]:
+    """
+    Reads the records starting at the given byte offsets (as given by read_index) of the XML file, straight from
+    the file without scanning it, and returns an iterator of either dicts or XML elements in the order of the offsets.
+    Raises a KeyError for offsets at which no indexed record starts.
+    Any other keyword argument of read_xml_stream (e.g. fields) is used to parse the records
+    """
+    with _open_index(file_path, index_path) as index, map_xml_buffer(file_path) as buffer:
+        for offset in offsets:
+            record_number = index.find_offset(offset)
+            if record_number is None:
+                raise KeyError("No indexed record starts at offset {}".format(offset))
+
+            record = _read_indexed_record(buffer, index, record_number, to_dict=to_dict, kwargs=kwargs)
+            if record is not None:
+                yield record
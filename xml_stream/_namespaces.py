@@ -0,0 +1,120 @@
+"""
+Module containing protected helpers for the namespaces: resolving prefixed names like 'shop:item' into the
+'{uri}item' names of the parsers, and the names the records are output with
+"""
+import sys
+from typing import Dict, Iterable, List, Mapping, Optional, Union
+
+from ._paths import split_steps
+
+# the namespace modes of the readers: keeping the '{uri}' of the names, stripping it, or replacing it with its prefix
+KEEP_NAMESPACES = 'keep'
+STRIP_NAMESPACES = 'strip'
+PREFIX_NAMESPACES = 'prefix'
+NAMESPACE_MODES = (KEEP_NAMESPACES, STRIP_NAMESPACES, PREFIX_NAMESPACES,)
+
+
+class QualifiedName(str):
+    """A '{uri}item' name of records_tag, with the name it was given as e.g. 'shop:item', as its label"""
+    __slots__ = ('label',)
+
+    def __new__(cls, name: str, label: str):
+        qualified_name = super().__new__(cls, name)
+        qualified_name.label = label
+        return qualified_name
+
+
+def resolve_name(name: str, namespaces: Optional[Mapping[str, str]], is_attribute: bool = False) -> str:
+    """
+    Returns the '{uri}item' name of a prefixed name like 'shop:item', the name of an element without prefix being
+    in the default namespace if namespaces has one (under the '' prefix), unlike the name of an attribute
+    """
+    if not namespaces or name.startswith('{') or name in ('.', '*'):
+        return name
+
+    prefix, separator, local_name = name.rpartition(':')
+    if not separator:
+        if is_attribute or '' not in namespaces:
+            return name
+        prefix, local_name = '', name
+
+    uri = namespaces.get(prefix)
+    if uri is None:
+        raise ValueError("Unknown namespace prefix {!r} in {!r}, expected one of {}".format(
+            prefix, name, sorted(namespaces)))
+
+    return '{{{}}}{}'.format(uri, local_name) if uri else local_name
+
+
+def resolve_path(path: str, namespaces: Optional[Mapping[str, str]]) -> str:
+    """Returns a path like 'shop:ref/@shop:type' or '/shop:catalog/shop:item' with its names resolved"""
+    if not namespaces:
+        return path
+
+    steps = [
+        '@' + resolve_name(step[1:], namespaces, is_attribute=True) if step.startswith('@')
+        else resolve_name(step, namespaces)
+        for step in split_steps(path.strip())]
+    return ('/' if path.strip().startswith('/') else '') + '/'.join(steps)
+
+
+def resolve_records_tag(records_tag: Optional[Union[str, Iterable[str]]], namespaces: Optional[Mapping[str, str]]
+                        ) -> Optional[Union[str, List[str]]]:
+    """
+    Returns records_tag with its names resolved. The tags and paths of a collection become QualifiedNames, so that
+    the records are paired with the tags and paths as they were given
+    """
+    if not namespaces or records_tag is None:
+        return records_tag
+
+    if isinstance(records_tag, str):
+        return resolve_path(records_tag, namespaces)
+
+    return [QualifiedName(resolve_path(selection, namespaces), selection)
+            if isinstance(selection, str) and not isinstance(selection, QualifiedName) else selection
+            for selection in records_tag]
+
+
+class OutputNames(dict):
+    """
+    The names of the elements and attributes of the records, by their '{uri}item' names, computed (and interned)
+    once per name so that all the records share the same strings: without the '{uri}' if namespace_mode is 'strip',
+    or with the prefix of the uri in namespaces instead if it is 'prefix' (no prefix for the uri of the '' prefix,
+    and the '{uri}' kept for the uris not in namespaces)
+    """
+
+    def __init__(self, namespace_mode: str, namespaces: Optional[Mapping[str, str]] = None):
+        super().__init__()
+        self._is_stripped = namespace_mode == STRIP_NAMESPACES
+        self._prefixes: Dict[str, str] = {uri: prefix for prefix, uri in (namespaces or {}).items()}
+
+    def __missing__(self, name: str) -> str:
+        output_name = name
+        if name.startswith('{'):
+            uri, local_name = name[1:].split('}', 1)
+            if self._is_stripped:
+                output_name = local_name
+            else:
+                prefix = self._prefixes.get(uri)
+                if prefix is not None:
+                    output_name = '{}:{}'.format(prefix, local_name) if prefix else local_name
+
+        self[name] = output_name = sys.intern(output_name)
+        return output_name
+
+    def rename_attributes(self, attrib: Dict[str, str]) -> Dict[str, str]:
+        """Returns the attributes with their output names"""
+        if not attrib:
+            return attrib
+
+        return {self[key]: value for key, value in attrib.items()}
+
+
+def get_output_names(namespace_mode: str, namespaces: Optional[Mapping[str, str]] = None) -> Optional[OutputNames]:
+    """Returns the OutputNames of the namespace mode, or None if the names are kept as they are"""
+    if namespace_mode not in NAMESPACE_MODES:
+        raise ValueError("Unknown namespace_mode {!r}, expected one of {}".format(namespace_mode, NAMESPACE_MODES))
+    if namespace_mode == PREFIX_NAMESPACES and not namespaces:
+        raise ValueError("namespace_mode 'prefix' needs the namespaces mapping the prefixes to their uris")
+
+    return None if namespace_mode == KEEP_NAMESPACES else OutputNames(namespace_mode, namespaces)
@@ -0,0 +1,367 @@
+"""Module containing the protected implementation of the parallel readers of a file and of many files"""
+import glob
+import mmap
+import multiprocessing
+import os
+import pickle
+import queue
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Optional, Union, Iterator, Iterable, Tuple, List, Any, Callable
+from xml.etree.ElementTree import Element
+
+from .data_types import XmlDictElement
+from .filters import RecordFilter
+from ._index import RecordIndex
+from ._namespaces import resolve_records_tag
+from ._paths import check_single_tag
+from ._readers import read_xml_stream, read_xml_file
+from ._scanner import iter_record_spans, get_closing_tags, ScanContext
+from ._sources import detect_compression
+
+DEFAULT_TASK_SIZE = 4 * 1024 * 1024
+DEFAULT_QUEUE_SIZE = 64
+DEFAULT_MESSAGE_SIZE = 256
+
+# the kinds of the messages sent by the workers of read_xml_files, as (file path, kind, payload)
+_RECORDS_MESSAGE = 'records'
+_FILTER_COUNTS_MESSAGE = 'filter_counts'
+_ERROR_MESSAGE = 'error'
+_DONE_MESSAGE = 'done'
+# how long the workers and the reader of read_xml_files wait on the queue before checking whether to give up
+_POLL_SECONDS = 0.1
+
+# the queue of the messages and the event telling to stop, of a worker process of read_xml_files
+_worker_queue: Optional[multiprocessing.Queue] = None
+_worker_stop_event: Optional[multiprocessing.Event] = None
+
+
+def _find_tail_end(buffer, position: int) -> int:
+    """Returns the position of the next markup after position i.e. the end of the text trailing an element"""
+    tail_end = buffer.find(b'<', position)
+    return len(buffer) if tail_end == -1 else tail_end
+
+
+def iter_record_batches(buffer, record_spans: Iterable[Tuple[int, int, ScanContext]],
+                        task_size: int = DEFAULT_TASK_SIZE) -> Iterator[Tuple[bytes, int, int, bytes]]:
+    """
+    Groups consecutive records of the buffer, given as the (start, end, context) spans found by iter_record_spans
+    or read from an index, into batches of about task_size bytes and yields
+    (prefix, start, end, suffix) for each, where prefix + buffer[start:end] + suffix is a well formed document.
+    Each batch ends where the markup following its last record starts, so that the record keeps its tail text
+    """
+    batch_start = batch_end = None
+    batch_prefix = batch_suffix = b''
+
+    for start, end, (prolog, ancestors) in record_spans:
+        if batch_start is None:
+            batch_start = start
+            batch_prefix = prolog + b''.join(ancestors)
+
+        batch_end = end
+        batch_suffix = ancestors
+
+        if batch_end - batch_start >= task_size:
+            yield batch_prefix, batch_start, _find_tail_end(buffer, batch_end), get_closing_tags(batch_suffix)
+            batch_start = None
+
+    if batch_start is not None:
+        yield batch_prefix, batch_start, _find_tail_end(buffer, batch_end), get_closing_tags(batch_suffix)
+
+
+def _get_record_filter(kwargs: dict) -> Optional[RecordFilter]:
+    """
+    Returns the RecordFilter passed as where in the keyword arguments of a worker process, with its counts set to 0
+    so that only the records of the worker are counted, or None if where is not a RecordFilter
+    """
+    record_filter = kwargs.get('where')
+    if not isinstance(record_filter, RecordFilter):
+        return None
+
+    record_filter._reset_counts()
+    return record_filter
+
+
+def _read_byte_range(file_path: str, prefix: bytes, start: int, end: int, suffix: bytes, records_tag: str,
+                     to_dict: bool, kwargs: dict) -> Tuple[List[Union[Element, XmlDictElement]], Optional[Tuple]]:
+    """
+    Parses the records found between the start and end offsets of the file, in a worker process, and returns them
+    with the counts of the RecordFilter passed as where, if any
+    """
+    record_filter = _get_record_filter(kwargs)
+    with open(file_path, 'rb') as xml_file:
+        xml_file.seek(start)
+        data = xml_file.read(end - start)
+
+    records = list(read_xml_stream((prefix, data, suffix), records_tag=records_tag, to_dict=to_dict, **kwargs))
+    return records, record_filter._get_counts() if record_filter is not None else None
+
+
+def _pop_finished_results(pending_tasks: deque, ordered: bool,
+                          record_filter: Optional[RecordFilter] = None) -> List[Union[Element, XmlDictElement]]:
+    """
+    Waits for the oldest pending task if ordered, else for any pending task to finish,
+    removes the finished task(s) from the pending tasks and returns their records,
+    adding the counts of their copies of the record filter to it if given
+    """
+    done = [pending_tasks.popleft()] if ordered else wait(pending_tasks, return_when=FIRST_COMPLETED)[0]
+    results = []
+    for task in done:
+        if not ordered:
+            pending_tasks.remove(task)
+        records, filter_counts = task.result()
+        if record_filter is not None:
+            record_filter._add_counts(filter_counts)
+        results.extend(records)
+
+    return results
+
+
+def read_xml_file_parallel(file_path: str, records_tag: str, to_dict: Optional[bool] = False,
+                           workers: Optional[int] = None, ordered: Optional[bool] = True,
+                           task_size: int = DEFAULT_TASK_SIZE, index_path: Optional[str] = None,
+                           **kwargs) -> Union[Iterator[Element], Iterator[XmlDictElement]]:
+    """
+    Reads an XML file using a pool of worker processes and returns an iterator of either dicts or XML elements.
+
+    The file is scanned for the byte ranges of the records, which are handed out in batches of about task_size bytes
+    to the workers, each parsing (and converting to dict if to_dict) its records with the namespace declarations
+    of the records' ancestors. Records are yielded in file order if ordered, else as soon as their batch is done.
+    Compressed files are not supported as they can not be read at random offsets.
+    Any other keyword argument of read_xml_stream (e.g. fields) is passed on to the workers, but for stats which can
+    not be collected across processes. The counts of a RecordFilter passed as where are those of all the workers.
+    With batch_size, each worker batches its own records, so batches may be shorter at the end of every task.
+    index_path is the optional path of an index of the records_tag records built by build_index, whose byte ranges
+    are used instead of scanning the file.
+    """
+    if kwargs.get('stats') is not None:
+        raise ValueError("read_xml_file_parallel does not support stats, which can not be collected across processes")
+    records_tag = resolve_records_tag(records_tag, kwargs.get('namespaces'))
+    check_single_tag(records_tag, "Parallel reads")
+    if detect_compression(file_path) is not None:
+        raise ValueError("read_xml_file_parallel can not read compressed files, use read_xml_file instead")
+    if os.path.getsize(file_path) == 0:
+        # an empty file can not be memory-mapped, it is read as read_xml_file does to raise the same error
+        yield from read_xml_file(file_path, records_tag, to_dict=to_dict, **kwargs)
+        return
+
+    index = None
+    if index_path is not None:
+        index = RecordIndex(index_path)
+        if index.records_tag != records_tag:
+            index.close()
+            raise ValueError("The index '{}' is an index of '{}' records, not of '{}' records".format(
+                index_path, index.records_tag, records_tag))
+
+    workers = workers or os.cpu_count() or 1
+    max_pending_tasks = 2 * workers
+    record_filter = kwargs.get('where') if isinstance(kwargs.get('where'), RecordFilter) else None
+
+    with open(file_path, 'rb') as xml_file, \
+            mmap.mmap(xml_file.fileno(), 0, access=mmap.ACCESS_READ) as buffer, \
+            ProcessPoolExecutor(max_workers=workers) as executor:
+        pending_tasks = deque()
+
+        try:
+            if index is not None:
+                index.check(file_path)
+                record_spans = index.iter_spans()
+            else:
+                record_spans = iter_record_spans(buffer, records_tag)
+
+            for prefix, start, end, suffix in iter_record_batches(buffer, record_spans, task_size=task_size):
+                pending_tasks.append(executor.submit(
+                    _read_byte_range, file_path, prefix, start, end, suffix, records_tag, to_dict, kwargs))
+
+                while len(pending_tasks) >= max_pending_tasks:
+                    yield from _pop_finished_results(pending_tasks, ordered=ordered, record_filter=record_filter)
+
+            while pending_tasks:
+                yield from _pop_finished_results(pending_tasks, ordered=ordered, record_filter=record_filter)
+        finally:
+            for task in pending_tasks:
+                task.cancel()
+            if index is not None:
+                index.close()
+
+
+class _Stopped(Exception):
+    """Raised in the workers of read_xml_files when the reader has been closed"""
+
+
+def _init_files_worker(messages_queue: multiprocessing.Queue, stop_event: multiprocessing.Event):
+    """Sets the queue and the stop event of a worker process of read_xml_files"""
+    global _worker_queue, _worker_stop_event
+    _worker_queue = messages_queue
+    _worker_stop_event = stop_event
+    # the workers only exit once their messages are read or no longer wanted
+    messages_queue.cancel_join_thread()
+
+
+def _put_message(file_path: str, kind: str, payload: Any):
+    """
+    Puts a message on the queue, pickled here so that unpicklable records fail in the worker, waiting while the
+    queue is full unless the reader has been closed
+    """
+    message = pickle.dumps((file_path, kind, payload), protocol=pickle.HIGHEST_PROTOCOL)
+    while True:
+        if _worker_stop_event.is_set():
+            raise _Stopped()
+        try:
+            _worker_queue.put(message, timeout=_POLL_SECONDS)
+            return
+        except queue.Full:
+            continue
+
+
+def _read_file_into_queue(file_path: str, records_tag: Any, to_dict: bool, message_size: int, kwargs: dict):
+    """
+    Reads the records of a file in a worker process, putting them on the queue message_size at a time, followed by
+    the counts of the RecordFilter passed as where, if any
+    """
+    record_filter = _get_record_filter(kwargs)
+    records = []
+    try:
+        try:
+            for record in read_xml_file(file_path, records_tag=records_tag, to_dict=to_dict, **kwargs):
+                records.append(record)
+                if len(records) >= message_size:
+                    message_records, records = records, []
+                    _put_message(file_path, _RECORDS_MESSAGE, message_records)
+
+            if records:
+                message_records, records = records, []
+                _put_message(file_path, _RECORDS_MESSAGE, message_records)
+        except _Stopped:
+            raise
+        except Exception as error:
+            try:
+                if records:
+                    _put_message(file_path, _RECORDS_MESSAGE, records)
+                if record_filter is not None:
+                    _put_message(file_path, _FILTER_COUNTS_MESSAGE, record_filter._get_counts())
+                _put_message(file_path, _ERROR_MESSAGE, error)
+            except (pickle.PicklingError, TypeError, AttributeError):
+                _put_message(file_path, _ERROR_MESSAGE, RuntimeError(repr(error)))
+            return
+
+        if record_filter is not None:
+            _put_message(file_path, _FILTER_COUNTS_MESSAGE, record_filter._get_counts())
+        _put_message(file_path, _DONE_MESSAGE, None)
+    except _Stopped:
+        return
+
+
+def list_xml_files(paths_or_glob: Union[str, os.PathLike, Iterable[Union[str, os.PathLike]]]) -> List[str]:
+    """
+    Returns the paths of the files to read: the files of a directory or matching a glob pattern (in which '**' matches
+    any number of sub directories), sorted, or the given paths
+    """
+    if not isinstance(paths_or_glob, (str, os.PathLike)):
+        return [os.fspath(path) for path in paths_or_glob]
+
+    path = os.fspath(paths_or_glob)
+    if os.path.isdir(path):
+        return sorted(entry.path for entry in os.scandir(path) if entry.is_file())
+    if glob.has_magic(path):
+        return sorted(file_path for file_path in glob.glob(path, recursive=True) if os.path.isfile(file_path))
+
+    return [path]
+
+
+def read_xml_files(paths_or_glob: Union[str, os.PathLike, Iterable[Union[str, os.PathLike]]], records_tag: Any,
+                   to_dict: Optional[bool] = False, workers: Optional[int] = None,
+                   queue_size: int = DEFAULT_QUEUE_SIZE, message_size: int = DEFAULT_MESSAGE_SIZE,
+                   continue_on_error: bool = False, on_error: Optional[Callable[[str, Exception], Any]] = None,
+                   **kwargs) -> Iterator[Tuple[str, Any]]:
+    """
+    Reads many XML files using a pool of worker processes, each reading whole files with read_xml_file, and returns
+    an iterator of (file path, record) pairs, the record being either a dict or an XML element.
+
+    paths_or_glob is a directory (whose files are read), a glob pattern like 'drops/**/*.xml.gz' or an iterable of
+    paths. The records of every file come in order, but those of the files being read at the same time are
+    interleaved. Any other keyword argument of read_xml_file (e.g. fields, where, schema or batch_size, whose
+    batches then take the place of the records) is passed on to the workers. The counts of a RecordFilter passed as
+    where are those of all the workers.
+
+    The workers send their records message_size at a time through a queue of at most queue_size messages and wait
+    while it is full, so the records held in memory stay bounded however fast the files are read and however slowly
+    the records are consumed.
+
+    A file that can not be read raises its error, unless continue_on_error is True in which case the rest of that
+    file is skipped (its records read until then having been yielded) and on_error, if given, is called with the
+    path of the file and the error.
+
+    read_xml_files needs Python 3.7+, whose process pools can hand the queue over to their workers
+    """
+    if sys.version_info < (3, 7):
+        raise RuntimeError("read_xml_files needs Python 3.7+, use read_xml_file or read_xml_file_parallel instead")
+    if kwargs.get('stats') is not None:
+        raise ValueError("read_xml_files does not support stats, which can not be collected across processes")
+    if queue_size < 1 or message_size < 1:
+        raise ValueError("queue_size and message_size should be at least 1, got {} and {}".format(
+            queue_size, message_size))
+
+    file_paths = iter(list_xml_files(paths_or_glob))
+    record_filter = kwargs.get('where') if isinstance(kwargs.get('where'), RecordFilter) else None
+    workers = workers or os.cpu_count() or 1
+    if kwargs.get('batch_size') is not None:
+        message_size = 1
+
+    messages_queue = multiprocessing.Queue(maxsize=queue_size)
+    stop_event = multiprocessing.Event()
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_files_worker,
+                                   initargs=(messages_queue, stop_event))
+    tasks = []
+
+    def submit_next_file() -> bool:
+        """Hands the next file to the workers, returns False if there are no files left"""
+        file_path = next(file_paths, None)
+        if file_path is None:
+            return False
+
+        tasks.append(executor.submit(_read_file_into_queue, file_path, records_tag, to_dict, message_size, kwargs))
+        return True
+
+    try:
+        number_of_open_files = sum(submit_next_file() for _ in range(2 * workers))
+
+        while number_of_open_files:
+            try:
+                file_path, kind, payload = pickle.loads(messages_queue.get(timeout=_POLL_SECONDS))
+            except queue.Empty:
+                # a worker process that died can not send anything
+                for task in tasks:
+                    if task.done() and task.exception() is not None:
+                        raise task.exception()
+                continue
+
+            if kind == _RECORDS_MESSAGE:
+                for record in payload:
+                    yield file_path, record
+                continue
+
+            if kind == _FILTER_COUNTS_MESSAGE:
+                record_filter._add_counts(payload)
+                continue
+
+            if kind == _ERROR_MESSAGE:
+                if not continue_on_error:
+                    raise payload
+                if on_error is not None:
+                    on_error(file_path, payload)
+
+            number_of_open_files += submit_next_file() - 1
+            tasks = [task for task in tasks if not task.done()]
+    finally:
+        stop_event.set()
+        for task in tasks:
+            task.cancel()
+        while not all(task.done() for task in tasks):
+            try:
+                messages_queue.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                pass
+        executor.shutdown(wait=True)
+        messages_queue.close()
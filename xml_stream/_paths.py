@@ -0,0 +1,153 @@
+"""
+Module containing protected helpers for the relative paths (e.g. 'Ref/Author' or 'Ref/@type') of record fields,
+and for the anchored paths (e.g. '/catalog/items/item') selecting the records
+"""
+import re
+from typing import Dict, Iterable, Set, Optional, List, Tuple, Union
+
+# a step of a path: anything up to the next '/' that is not part of the '{uri}' of a namespaced tag
+_STEP_PATTERN = re.compile(r'(?:\{[^}]*\}|[^/])+')
+
+
+class FieldsTree:
+    """
+    The tree of the fields selected in a record: the sub elements on the way to selected fields,
+    the selected attributes and whether the whole element (with all its sub elements) is selected
+    """
+    __slots__ = ('children', 'attributes', 'is_selected',)
+
+    def __init__(self):
+        self.children: Dict[str, 'FieldsTree'] = {}
+        self.attributes: Set[str] = set()
+        self.is_selected = False
+
+    def select_attributes(self, attrib: Dict[str, str]) -> Dict[str, str]:
+        """Returns only the selected attributes out of the given attributes"""
+        if not attrib:
+            return attrib
+
+        attributes = self.attributes
+        return {key: value for key, value in attrib.items() if key in attributes}
+
+
+def split_steps(path: str) -> List[str]:
+    """Splits a path like 'Ref/Author' or '{https://example.com/ns}Ref/@type' into its steps"""
+    return _STEP_PATTERN.findall(path)
+
+
+def split_path(path: str) -> Tuple[List[str], Optional[str]]:
+    """
+    Splits a path relative to a record e.g. 'Ref/Author' or 'Ref/@type' into
+    its tags e.g. ['Ref', 'Author'] and the attribute it points to, if any, e.g. 'type'
+    """
+    steps = [step for step in split_steps(path.strip()) if step != '.']
+    if not steps and '@' not in path:
+        raise ValueError("Invalid field path '{}'".format(path))
+
+    if steps and steps[-1].startswith('@'):
+        return steps[:-1], steps[-1][1:]
+
+    return steps, None
+
+
+def compile_fields(fields: Iterable[str]) -> FieldsTree:
+    """Compiles paths relative to a record like 'Ref/Author' or '@id' into a FieldsTree"""
+    if isinstance(fields, str):
+        fields = [fields]
+
+    root = FieldsTree()
+
+    for path in fields:
+        tags, attribute = split_path(path)
+        node = root
+        for tag in tags:
+            child = node.children.get(tag)
+            if child is None:
+                node.children[tag] = child = FieldsTree()
+            node = child
+
+        if attribute is not None:
+            node.attributes.add(attribute)
+        else:
+            node.is_selected = True
+
+    return root
+
+
+class RecordsSelector:
+    """
+    The selection of the records out of records_tag when it is more than a single tag: an anchored path from the root
+    like '/catalog/items/item', or a collection of tags and anchored paths. It follows the start and end events of
+    every element to keep the path of the open elements, and tells which of records_tag each element matches, if any
+    (by its label, if it has one, e.g. the prefixed name it was given as). Anchored paths are matched before tags
+    """
+
+    def __init__(self, records_tag: Union[str, Iterable[str]]):
+        self.is_multiple = not isinstance(records_tag, str)
+        self._tags: Dict[str, str] = {}
+        # the anchored paths, as tuples of tags, by number of tags
+        self._paths: Dict[int, Dict[Tuple[str, ...], str]] = {}
+        self._open_tags: List[str] = []
+        self._selections: List[Optional[str]] = []
+
+        for selection in ([records_tag] if not self.is_multiple else records_tag):
+            if not isinstance(selection, str) or not selection.strip('/'):
+                raise ValueError("Invalid records tag {!r}".format(selection))
+
+            label = getattr(selection, 'label', selection)
+            if selection.startswith('/'):
+                tags = tuple(split_steps(selection))
+                self._paths.setdefault(len(tags), {})[tags] = label
+            else:
+                self._tags[str(selection)] = label
+
+        if not self._tags and not self._paths:
+            raise ValueError("records_tag should hold at least one tag or path")
+
+        # the tags of records_tag if it has no anchored paths, else None
+        self.tags: Optional[List[str]] = None if self._paths else list(self._tags)
+
+    def start(self, tag: str) -> Optional[str]:
+        """Called for the start tag of every element, returns the tag or path of records_tag it matches, if any"""
+        open_tags = self._open_tags
+        open_tags.append(tag)
+
+        paths = self._paths.get(len(open_tags))
+        selection = paths.get(tuple(open_tags)) if paths is not None else None
+        if selection is None:
+            selection = self._tags.get(tag)
+
+        self._selections.append(selection)
+        return selection
+
+    def get_tag_label(self, tag: str) -> str:
+        """Returns the label of a tag of records_tag, i.e. the tag as it was given"""
+        return self._tags.get(tag, tag)
+
+    def end(self) -> Optional[str]:
+        """Called for the end tag of every element, returns the tag or path of records_tag it matched, if any"""
+        self._open_tags.pop()
+        return self._selections.pop()
+
+
+def get_records_selector(records_tag: Optional[Union[str, Iterable[str]]]) -> Optional[RecordsSelector]:
+    """Returns the RecordsSelector of records_tag, or None if it is a single tag, best matched by comparing tags"""
+    if records_tag is None or (isinstance(records_tag, str) and not records_tag.startswith('/')):
+        return None
+
+    return RecordsSelector(records_tag)
+
+
+def get_plain_tags(records_tag: Optional[Union[str, Iterable[str]]]) -> Optional[List[str]]:
+    """Returns the tags of records_tag if it is a tag or a collection of tags, None if it has anchored paths"""
+    if records_tag is None:
+        return None
+
+    selector = get_records_selector(records_tag)
+    return [records_tag] if selector is None else selector.tags
+
+
+def check_single_tag(records_tag: Optional[Union[str, Iterable[str]]], feature: str):
+    """Raises a ValueError if records_tag is not a single tag, which the given feature needs"""
+    if get_records_selector(records_tag) is not None:
+        raise ValueError("{} need records_tag to be a single tag, got {!r}".format(feature, records_tag))
@@ -0,0 +1,481 @@
+"""Module containing the protected implementation of the streaming readers"""
+from typing import Optional, Union, Iterator, Iterable, Any, Mapping, Callable, List, Dict, Tuple
+from xml.etree.ElementTree import Element
+
+from .backends import ParserBackend, get_backend, AUTO_BACKEND
+from .data_types import XmlDictElement, Checkpoint
+from .filters import RecordFilter
+from .schemas import RecordSchema
+from ._builders import DictRecordsBuilder, SelectiveRecordsBuilder, BufferLimit, LimitedTarget
+from ._namespaces import OutputNames, KEEP_NAMESPACES, resolve_path, resolve_records_tag, get_output_names
+from ._paths import compile_fields, get_records_selector, get_plain_tags, check_single_tag
+from ._scanner import iter_record_spans
+from ._sources import (iter_xml_chunks, open_xml_file, map_xml_file, map_xml_buffer, detect_compression,
+                       DEFAULT_CHUNK_SIZE)
+from ._utils import records_to_columns
+from .stats import ReaderStats, InstrumentedTarget
+
+
+class ChunksParser:
+    """
+    Parses chunks of XML pushed one at a time with the backend's parsers, returning the records that ended in each
+    chunk, with a builder as the parser's target or as elements from the backend's pull parser.
+    If records_tag is a collection of tags and anchored paths, (tag or path, record) pairs are returned.
+
+    Elements are dropped from their parent as soon as they end outside of a record (records included,
+    once they are returned), so that the tree built by the pull parser never holds more than the open elements
+    and the record being parsed. If max_buffered_elements is given, a ValueError is raised as soon as they make more
+    elements than that. The events are counted in stats if given.
+
+    If filtered_tags is given, the backend must filter tags: its pull parser only reports the end of the records,
+    which are converted to dicts if to_dict, and the backend drops the elements before them
+    """
+
+    def __init__(self, records_tag: Optional[Union[str, Iterable[str]]],
+                 builder: Optional[Union[DictRecordsBuilder, SelectiveRecordsBuilder]],
+                 stats: Optional[ReaderStats] = None, max_buffered_elements: Optional[int] = None,
+                 backend: Optional[ParserBackend] = None, filtered_tags: Optional[List[str]] = None,
+                 to_dict: bool = False):
+        self._records_tag = records_tag
+        self._builder = builder
+        self._selector = get_records_selector(records_tag)
+        self._is_paired = self._selector is not None and self._selector.is_multiple
+        self._stats = stats
+        self._limit = BufferLimit(records_tag, max_buffered_elements) if max_buffered_elements is not None else None
+        self._backend = backend = backend or get_backend()
+        self._filtered_tags = filtered_tags
+        self._convert = XmlDictElement if to_dict else None
+        self._open_elements: List[Element] = []
+        # the number of open elements when the outermost record being parsed started, 0 when outside of any record
+        self._record_depth = 0
+
+        if builder is not None:
+            target = builder
+            if self._limit is not None:
+                target = LimitedTarget(target, self._limit)
+            if stats is not None:
+                builder.convert = stats._timed_convert(builder.convert)
+                target = InstrumentedTarget(target, stats)
+            self._parser = backend.create_target_parser(target)
+        elif filtered_tags is not None:
+            self._parser = backend.create_pull_parser(tags=filtered_tags)
+        else:
+            self._parser = backend.create_pull_parser()
+
+        self._feed = self._parser.feed if stats is None else stats._timed_feed(self._parser.feed)
+        self._flush = getattr(self._parser, 'flush', None)
+
+    def feed(self, chunk: Union[str, bytes]) -> List[Union[Element, XmlDictElement, Tuple]]:
+        """Parses the chunk and returns the records that ended in it"""
+        self._feed(chunk)
+        return self._take_records()
+
+    def flush(self) -> List[Union[Element, XmlDictElement, Tuple]]:
+        """
+        Makes the parser report the events of all the data fed so far, which expat 2.6+ may otherwise defer until more
+        data comes, and returns the records that ended in it. Parsers without a flush method report them as they go
+        """
+        if self._flush is not None:
+            self._flush()
+        return self._take_records()
+
+    def close(self) -> List[Union[Element, XmlDictElement, Tuple]]:
+        """Finishes parsing and returns the records that ended last"""
+        self._parser.close()
+        return self._take_records()
+
+    def _take_records(self) -> List[Union[Element, XmlDictElement, Tuple]]:
+        """Returns the records finished since the last call"""
+        if self._builder is not None:
+            records = self._builder.records[:]
+            self._builder.records.clear()
+            return records
+
+        if self._filtered_tags is not None:
+            return self._take_filtered_records()
+
+        records = []
+        records_tag = self._records_tag
+        selector = self._selector
+        stats = self._stats
+        limit = self._limit
+        open_elements = self._open_elements
+        record_depth = self._record_depth
+
+        for event, element in self._parser.read_events():
+            if stats is not None:
+                if event == 'start':
+                    stats._on_start(element.tag)
+                else:
+                    stats._on_end(element.tag)
+
+            if event == 'start':
+                if limit is not None:
+                    limit.start(element.tag)
+
+                open_elements.append(element)
+                if selector is None:
+                    is_record = element.tag == records_tag
+                else:
+                    is_record = selector.start(element.tag) is not None
+
+                if is_record and not record_depth:
+                    record_depth = len(open_elements)
+                continue
+
+            if limit is not None:
+                limit.end()
+
+            depth = len(open_elements)
+            open_elements.pop()
+            if selector is None:
+                selection = records_tag if element.tag == records_tag else None
+            else:
+                selection = selector.end()
+
+            if record_depth == depth:
+                record_depth = 0
+            elif record_depth:
+                # a sub element of the record being parsed, kept as part of it even if it is a record itself
+                if selection is not None:
+                    records.append((selection, element) if self._is_paired else element)
+                continue
+
+            if selection is not None:
+                records.append((selection, element) if self._is_paired else element)
+
+            # the element ended outside of any record: drop it, and its predecessors, from its parent
+            if open_elements:
+                del open_elements[-1][:]
+
+        self._record_depth = record_depth
+        return records
+
+    def _take_filtered_records(self) -> List[Union[Element, XmlDictElement, Tuple]]:
+        """Returns the records finished since the last call, from a pull parser filtering their tags"""
+        records = []
+        convert = self._convert
+        release = self._backend.release
+        tags = self._filtered_tags
+
+        for _, element in self._parser.read_events():
+            record = element if convert is None else convert(element)
+            records.append((self._selector.get_tag_label(element.tag), record) if self._is_paired else record)
+            release(element, tags, clear=convert is not None)
+
+        return records
+
+
+def create_chunks_parser(records_tag: Optional[Union[str, Iterable[str]]], to_dict: Optional[bool] = False,
+                         fields: Optional[Iterable[str]] = None,
+                         where: Optional[Union[RecordFilter, Mapping[str, Any], Callable[[Any], bool]]] = None,
+                         stats: Optional[ReaderStats] = None, max_buffered_elements: Optional[int] = None,
+                         backend: str = AUTO_BACKEND,
+                         schema: Optional[Union[RecordSchema, type, Mapping[str, Any]]] = None,
+                         namespaces: Optional[Mapping[str, str]] = None,
+                         namespace_mode: str = KEEP_NAMESPACES) -> ChunksParser:
+    """
+    Returns the ChunksParser for the given arguments of the readers. If records_tag is made of tags and the records
+    are neither typed, trimmed, filtered, renamed, instrumented nor capped, a backend filtering tags reports only
+    their end events
+    """
+    records_tag = resolve_records_tag(records_tag, namespaces)
+    output_names = get_output_names(namespace_mode, namespaces)
+
+    filtered_tags = None
+    if (fields is None and where is None and schema is None and output_names is None and stats is None
+            and max_buffered_elements is None):
+        filtered_tags = get_plain_tags(records_tag)
+
+    parser_backend = get_backend(backend, filters_tags=filtered_tags is not None)
+    if filtered_tags is not None and parser_backend.filters_tags:
+        return ChunksParser(records_tag, builder=None, backend=parser_backend, filtered_tags=filtered_tags,
+                            to_dict=bool(to_dict))
+
+    builder = get_records_builder(records_tag, to_dict=to_dict, fields=fields, where=where, schema=schema,
+                                  namespaces=namespaces, output_names=output_names)
+    return ChunksParser(records_tag, builder=builder,
+                        stats=stats, max_buffered_elements=max_buffered_elements, backend=parser_backend)
+
+
+def _iter_records(chunks: Iterable[Union[str, bytes]], parser: ChunksParser, batch_size: Optional[int] = None,
+                  stats: Optional[ReaderStats] = None) -> Iterator[Union[Element, XmlDictElement, Tuple, List]]:
+    """
+    Feeds the chunks to the parser and yields the records as they end, or lists of batch_size records
+    if batch_size is given. The records yielded are released in stats if given
+    """
+    records: List = []
+
+    for chunk in chunks:
+        records += parser.feed(chunk)
+
+        if batch_size is None:
+            if records:
+                yield from records
+                records.clear()
+        elif len(records) >= batch_size:
+            number_of_full_batches = len(records) // batch_size
+            for index in range(0, number_of_full_batches * batch_size, batch_size):
+                yield records[index:index + batch_size]
+            del records[:number_of_full_batches * batch_size]
+
+        if stats is not None:
+            stats._on_records_released(len(records))
+
+    records += parser.close()
+    if batch_size is None:
+        yield from records
+    elif records:
+        yield records
+
+
+def get_records_builder(records_tag: Optional[Union[str, Iterable[str]]], to_dict: Optional[bool] = False,
+                        fields: Optional[Iterable[str]] = None,
+                        where: Optional[Union[RecordFilter, Mapping[str, Any], Callable[[Any], bool]]] = None,
+                        schema: Optional[Union[RecordSchema, type, Mapping[str, Any]]] = None,
+                        namespaces: Optional[Mapping[str, str]] = None, output_names: Optional[OutputNames] = None
+                        ) -> Optional[Union[DictRecordsBuilder, SelectiveRecordsBuilder]]:
+    """
+    Returns the parser target building the records for the given arguments of the readers,
+    or None if the records are plain elements, best left to xml.etree.ElementTree.XMLPullParser.
+    The paths of fields, where and schema can use the prefixes of namespaces
+    """
+    record_filter = RecordFilter.from_where(where, namespaces=namespaces) if where is not None else None
+
+    if schema is not None:
+        if to_dict:
+            raise ValueError("to_dict can not be combined with a schema")
+        if fields is not None:
+            raise ValueError("fields can not be combined with a schema, whose paths are the fields")
+
+        record_schema = RecordSchema.from_schema(schema, namespaces=namespaces)
+        builder = SelectiveRecordsBuilder(records_tag, fields=record_schema.fields, record_filter=record_filter,
+                                          to_dict=True)
+        builder.convert = record_schema.build
+        return builder
+
+    if fields is None and where is None:
+        if to_dict:
+            return DictRecordsBuilder(records_tag, output_names=output_names)
+        if output_names is None:
+            return None
+
+    if fields is not None:
+        fields = [resolve_path(path, namespaces) for path in ([fields] if isinstance(fields, str) else fields)]
+
+    return SelectiveRecordsBuilder(
+        records_tag,
+        fields=compile_fields(fields) if fields is not None else None,
+        record_filter=record_filter,
+        to_dict=to_dict,
+        output_names=output_names)
+
+
+def read_xml_stream(source: Any, records_tag: Optional[Union[str, Iterable[str]]],
+                    to_dict: Optional[bool] = False, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    fields: Optional[Iterable[str]] = None,
+                    where: Optional[Union[RecordFilter, Mapping[str, Any], Callable[[Any], bool]]] = None,
+                    batch_size: Optional[int] = None, columnar: bool = False, stats: Optional[ReaderStats] = None,
+                    max_buffered_elements: Optional[int] = None, backend: str = AUTO_BACKEND,
+                    schema: Optional[Union[RecordSchema, type, Mapping[str, Any]]] = None,
+                    namespaces: Optional[Mapping[str, str]] = None, namespace_mode: str = KEEP_NAMESPACES,
+                    **kwargs) -> Union[Iterator[Element], Iterator[XmlDictElement], Iterator[List], Iterator[Dict],
+                                       Iterator[Any]]:
+    """
+    Reads XML from any source of chunks element by element and returns an iterator of either dicts or XML elements.
+
+    The source can be a binary file object (an open file, stdin's buffer, a gzip.GzipFile, a subprocess pipe...),
+    a socket, a str/bytes/memoryview or any iterable of str/bytes chunks.
+    Readable sources are read chunk_size bytes at a time.
+
+    records_tag is the tag of the records, or an anchored path from the root like '/catalog/items/item' matching
+    only the item elements at that place. It can also be a collection (e.g. a set) of tags and anchored paths, to
+    read several kinds of records in one pass, in which case (tag or path, record) pairs are yielded.
+
+    fields is an optional list of paths relative to the record, like 'Ref/Author' (the Author sub elements of the
+    Ref sub elements) or '@id' (the id attribute), to which the records are trimmed while they are being parsed.
+
+    where is an optional filter of the records, checked while they are being parsed: a RecordFilter, a mapping of
+    paths relative to the record to expected values or predicates, or a predicate taking the unconverted record.
+    Pass a RecordFilter to get the counts of records it accepted and rejected.
+
+    schema is an optional RecordSchema, dataclass, NamedTuple or mapping of field names to paths (or to (path, type
+    or converter) pairs) by which the records are read into typed objects instead of elements or dicts, their fields
+    already converted into int, float, bool, datetime... The records are trimmed to the paths of the schema while
+    they are being parsed, and where sees them before they are typed. See RecordSchema.
+
+    Records nested in other records are yielded before the outer record, of which they are also part, whether or not
+    fields, where or schema are given.
+
+    namespaces optionally maps prefixes to namespace uris (the '' prefix being the default namespace of the tags),
+    so that records_tag and the paths of fields, where and schema can use prefixed names like 'shop:item' instead
+    of '{https://example.com/shop}item'. namespace_mode sets the names of the elements and attributes of the records
+    (the keys of the dicts, or the tags of the elements): 'keep' (the default) keeps their '{uri}', 'strip' drops it,
+    and 'prefix' replaces it with its prefix in namespaces. Each distinct name is renamed once per read, so the
+    records share the same name strings.
+
+    Elements are released as soon as they end outside of a record, so the reader only holds the open elements and
+    the records being parsed whatever the shape of the document. max_buffered_elements is an optional cap on their
+    number, beyond which a ValueError is raised instead of using up the memory on a huge record or nesting.
+
+    backend is the name of the parser backend to use: 'etree' (the standard library's), 'lxml' (if installed, its
+    pull parser filters the tags of the records in C when they are neither trimmed, filtered, instrumented nor capped,
+    and the records are lxml elements) or any registered one. By default ('auto'), the most preferred backend is used
+    for the reads it can filter, the standard library's otherwise.
+
+    batch_size is the optional number of records to yield at a time, as lists (the last one may be shorter).
+    If columnar is True, each batch is instead yielded as a dict of lists keyed by the paths of the fields of
+    the dict records, e.g. 'location/name', with None for the fields a record does not have. It implies to_dict.
+
+    stats is an optional ReaderStats in which the bytes read, the records seen and yielded, the time spent reading,
+    parsing and converting, the size of the largest record and the peak number of live elements are collected.
+    Without it, nothing is collected
+    """
+    if columnar:
+        if batch_size is None:
+            raise ValueError("columnar batches need a batch_size")
+        if records_tag is not None and not isinstance(records_tag, str):
+            raise ValueError("columnar batches need a single records_tag")
+        if schema is not None:
+            raise ValueError("columnar batches are not supported with a schema")
+        to_dict = True
+
+    if batch_size is not None and batch_size < 1:
+        raise ValueError("batch_size should be at least 1, got {}".format(batch_size))
+
+    records_tag = resolve_records_tag(records_tag, namespaces)
+    chunks = iter_xml_chunks(source, chunk_size=chunk_size)
+    parser = create_chunks_parser(records_tag, to_dict=to_dict, fields=fields, where=where, stats=stats,
+                                  max_buffered_elements=max_buffered_elements, backend=backend, schema=schema,
+                                  namespaces=namespaces, namespace_mode=namespace_mode)
+
+    if stats is not None:
+        stats._start_reading(records_tag)
+        chunks = stats._iter_timed_chunks(chunks)
+
+    batches = _iter_records(chunks, parser=parser, batch_size=batch_size, stats=stats)
+
+    if stats is not None:
+        batches = stats._iter_counted_records(batches, is_batched=batch_size is not None)
+
+    if columnar:
+        return map(records_to_columns, batches)
+
+    return batches
+
+
+def _iter_checkpointed_records(file_path: str, records_tag: str, to_dict: bool, chunk_size: int,
+                               resume_from: Optional[Checkpoint], fields: Optional[Iterable[str]] = None,
+                               where: Optional[Union[RecordFilter, Mapping[str, Any], Callable[[Any], bool]]] = None,
+                               **kwargs) -> Iterator[Tuple[Union[Element, XmlDictElement], Checkpoint]]:
+    """
+    Yields (record, checkpoint) for every record of an uncompressed XML file, starting at the resume_from checkpoint
+    if given. The file is scanned for the byte spans of the outermost records, and the parser is fed up to the end of
+    each one in turn, and flushed there, so that the checkpoint after its records is the end of the span and the
+    context of its ancestors. Records nested in the outermost record come first and keep the previous checkpoint,
+    so resuming from it never skips a record
+    """
+    if kwargs.get('batch_size') is not None or kwargs.get('columnar'):
+        raise ValueError("Checkpoints are not supported with batches")
+    if kwargs.get('stats') is not None:
+        raise ValueError("Checkpoints are not supported with stats")
+    records_tag = resolve_records_tag(records_tag, kwargs.get('namespaces'))
+    check_single_tag(records_tag, "Checkpoints")
+
+    parser = create_chunks_parser(records_tag, to_dict=to_dict, fields=fields, where=where,
+                                  max_buffered_elements=kwargs.get('max_buffered_elements'),
+                                  backend=kwargs.get('backend', AUTO_BACKEND), schema=kwargs.get('schema'),
+                                  namespaces=kwargs.get('namespaces'),
+                                  namespace_mode=kwargs.get('namespace_mode', KEEP_NAMESPACES))
+    checkpoint = resume_from or Checkpoint(0)
+    context = None
+
+    if checkpoint.offset:
+        # the start tags of the open ancestors carry the namespace declarations
+        context = (resume_from.prolog, resume_from.ancestors)
+        parser.feed(resume_from.prolog + b''.join(resume_from.ancestors))
+
+    with map_xml_buffer(file_path) as buffer:
+        position = checkpoint.offset
+
+        for _, end, (prolog, ancestors) in iter_record_spans(buffer, records_tag, position=position, context=context):
+            records = []
+            for chunk_start in range(position, end, chunk_size):
+                records.extend(parser.feed(buffer[chunk_start:min(chunk_start + chunk_size, end)]))
+            # the end of the last record of the span must be reported before the data after the span is fed
+            records.extend(parser.flush())
+            position = end
+
+            if records:
+                for record in records[:-1]:
+                    yield record, checkpoint
+
+                checkpoint = Checkpoint(end, prolog=prolog, ancestors=ancestors)
+                yield records[-1], checkpoint
+
+        for chunk_start in range(position, len(buffer), chunk_size):
+            for record in parser.feed(buffer[chunk_start:chunk_start + chunk_size]):
+                yield record, checkpoint
+
+    for record in parser.close():
+        yield record, checkpoint
+
+
+def read_xml_file(file_path: str, records_tag: Optional[Union[str, Iterable[str]]],
+                  to_dict: Optional[bool] = False, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  compression: Optional[str] = 'infer',
+                  checkpoints: bool = False, resume_from: Optional[Checkpoint] = None, use_mmap: bool = False,
+                  **kwargs) -> Union[Iterator[Element], Iterator[XmlDictElement],
+                                     Iterator[Tuple[Union[Element, XmlDictElement], Checkpoint]]]:
+    """
+    Reads an XML file element by element and returns an iterator of either dicts or XML elements.
+
+    gzip, bz2, xz and zstd (needs the zstandard package) compressed files are decompressed while they are parsed.
+    The compression is detected from the file's magic bytes or extension unless it is passed explicitly
+
+    If checkpoints is True, (record, checkpoint) pairs are yielded instead, the checkpoint being the position just
+    after the record (and the elements open there) from which reading can be resumed by passing it as resume_from,
+    without parsing the file up to it. Checkpoints are only supported for uncompressed files
+
+    If use_mmap is True, the (uncompressed) file is memory-mapped and slices of chunk_size bytes of it are fed
+    to the parser without being read into bytes objects first
+    """
+    is_compressed = compression is not None and (compression != 'infer' or detect_compression(file_path) is not None)
+
+    if checkpoints or resume_from is not None:
+        if is_compressed:
+            raise ValueError("Checkpoints are not supported for compressed files")
+
+        checkpointed_records = _iter_checkpointed_records(
+            file_path, records_tag, to_dict=to_dict, chunk_size=chunk_size, resume_from=resume_from, **kwargs)
+        if checkpoints:
+            yield from checkpointed_records
+        else:
+            for record, _ in checkpointed_records:
+                yield record
+        return
+
+    if use_mmap:
+        if is_compressed:
+            raise ValueError("Compressed files can not be memory-mapped")
+
+        with map_xml_file(file_path) as xml_data:
+            yield from read_xml_stream(xml_data, records_tag=records_tag, to_dict=to_dict, chunk_size=chunk_size,
+                                       **kwargs)
+        return
+
+    with open_xml_file(file_path, compression=compression, buffer_size=chunk_size) as xml_file:
+        yield from read_xml_stream(xml_file, records_tag=records_tag, to_dict=to_dict, chunk_size=chunk_size, **kwargs)
+
+
+def read_xml_string(xml_string: Union[str, bytes, memoryview, Iterable[Union[str, bytes]]],
+                    records_tag: Optional[Union[str, Iterable[str]]], to_dict: Optional[bool] = False,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    **kwargs) -> Union[Iterator[Element], Iterator[XmlDictElement]]:
+    """
+    Reads an XML string element by element and returns an iterator of either dicts or XML elements.
+
+    The string (or bytes, memoryview, or iterable of str/bytes chunks) is fed to the parser chunk by chunk
+    so that each record is yielded as soon as its end tag is parsed, and finished records are released
+    """
+    return read_xml_stream(xml_string, records_tag=records_tag, to_dict=to_dict, chunk_size=chunk_size, **kwargs)
@@ -0,0 +1,153 @@
+"""
+Module containing a protected byte-level scanner that finds the byte spans of records in raw XML
+without parsing them, so that records can be handed out to workers or looked up by offset.
+
+Only ASCII-compatible encodings (e.g. UTF-8, ISO-8859-1) are supported.
+"""
+import re
+from typing import Iterator, Tuple, Dict, Optional, Pattern
+
+# any markup that starts with '<': comments, CDATA sections, doctypes, processing instructions,
+# or start/end tags whose name is group 2, the '/' of an end tag being group 1 and the attributes group 3
+_MARKUP_PATTERN = re.compile(
+    rb'<(?:!--.*?-->|!\[CDATA\[.*?\]\]>|!DOCTYPE(?:[^\[>]*\[.*?\])?[^>]*>|\?.*?\?>'
+    rb'|(/)?([^\s/>!?]+)((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>)', re.DOTALL)
+
+_NAMESPACE_DECLARATION_PATTERN = re.compile(rb'xmlns(?::([^\s=]+))?\s*=\s*(["\'])(.*?)\2', re.DOTALL)
+
+_record_markup_patterns: Dict[bytes, Pattern] = {}
+
+# (prolog, start tags of the open ancestors) of a record, enough to parse the record on its own
+ScanContext = Tuple[bytes, Tuple[bytes, ...]]
+
+
+def _get_record_markup_pattern(qualified_name: bytes) -> Pattern:
+    """
+    Returns the pattern of the markup to look out for inside a record whose tag is qualified_name:
+    comments, CDATA sections, processing instructions and start/end tags of the same name (for nesting)
+    """
+    pattern = _record_markup_patterns.get(qualified_name)
+
+    if pattern is None:
+        pattern = re.compile(
+            rb'<(?:!--.*?-->|!\[CDATA\[.*?\]\]>|\?.*?\?>|(/)?' + re.escape(qualified_name) +
+            rb'(?=[\s/>])((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>)', re.DOTALL)
+        _record_markup_patterns[qualified_name] = pattern
+
+    return pattern
+
+
+def _split_tag(tag: str) -> Tuple[bytes, bytes]:
+    """Splits a tag in Clark notation i.e. '{uri}local' into (uri, local) bytes"""
+    if tag.startswith('{'):
+        uri, local_name = tag[1:].split('}', 1)
+        return uri.encode('utf-8'), local_name.encode('utf-8')
+
+    return b'', tag.encode('utf-8')
+
+
+def _get_namespaces(attributes: bytes, parent_namespaces: Dict[bytes, bytes]) -> Dict[bytes, bytes]:
+    """Returns the prefix -> uri map in scope for an element, given its raw attributes"""
+    if b'xmlns' not in attributes:
+        return parent_namespaces
+
+    namespaces = dict(parent_namespaces)
+    for prefix, _, uri in _NAMESPACE_DECLARATION_PATTERN.findall(attributes):
+        namespaces[prefix] = uri
+
+    return namespaces
+
+
+def _resolve(qualified_name: bytes, namespaces: Dict[bytes, bytes]) -> Tuple[bytes, bytes]:
+    """Returns the (uri, local name) of a qualified name like b'prefix:local'"""
+    prefix, _, local_name = qualified_name.rpartition(b':')
+    return namespaces.get(prefix, b''), local_name
+
+
+def iter_record_spans(buffer, records_tag: str, position: int = 0,
+                      context: Optional[ScanContext] = None) -> Iterator[Tuple[int, int, ScanContext]]:
+    """
+    Yields (start, end, context) for every outermost element called records_tag in the buffer (bytes or mmap)
+    where buffer[start:end] is the raw record. The context is the prolog of the document (XML declaration,
+    doctype...) and the raw start tags of the record's open ancestors, which carry the namespace declarations
+    the record may rely on. Records nested in records are part of the outer record's span.
+
+    Scanning can start mid-document at a position between records, given the context at that position.
+    """
+    expected_uri, expected_local_name = _split_tag(records_tag)
+    prolog, ancestors = context if context is not None else (None, ())
+    ancestors = list(ancestors)
+    namespaces_stack = [{}]
+    for start_tag in ancestors:
+        namespaces_stack.append(_get_namespaces(_MARKUP_PATTERN.match(start_tag).group(3), namespaces_stack[-1]))
+
+    current_context = (prolog or b'', tuple(ancestors))
+    search = _MARKUP_PATTERN.search
+    match = search(buffer, position)
+
+    while match is not None:
+        qualified_name = match.group(2)
+
+        if qualified_name is None:
+            # comments, CDATA sections, processing instructions...
+            match = search(buffer, match.end())
+            continue
+
+        if match.group(1):
+            namespaces_stack.pop()
+            ancestors.pop()
+            current_context = (prolog, tuple(ancestors))
+            match = search(buffer, match.end())
+            continue
+
+        if prolog is None:
+            # the first start tag is that of the root element
+            prolog = bytes(buffer[0:match.start()])
+            current_context = (prolog, ())
+
+        attributes = match.group(3)
+        namespaces = _get_namespaces(attributes, namespaces_stack[-1])
+        is_self_closing = attributes.endswith(b'/')
+
+        if _resolve(qualified_name, namespaces) == (expected_uri, expected_local_name):
+            record_start = match.start()
+            record_end = match.end()
+
+            if not is_self_closing:
+                record_end = _find_record_end(buffer, qualified_name, record_end)
+
+            yield record_start, record_end, current_context
+            match = search(buffer, record_end)
+            continue
+
+        if not is_self_closing:
+            namespaces_stack.append(namespaces)
+            ancestors.append(bytes(buffer[match.start():match.end()]))
+            current_context = (prolog, tuple(ancestors))
+
+        match = search(buffer, match.end())
+
+
+def _find_record_end(buffer, qualified_name: bytes, position: int) -> int:
+    """Returns the position just after the end tag that closes the record whose start tag ends at position"""
+    search = _get_record_markup_pattern(qualified_name).search
+    depth = 1
+
+    while depth:
+        match = search(buffer, position)
+        if match is None:
+            raise ValueError("Record '{}' is not closed".format(qualified_name.decode('utf-8', 'replace')))
+
+        position = match.end()
+        if match.group(2) is not None:
+            if match.group(1):
+                depth -= 1
+            elif not match.group(2).endswith(b'/'):
+                depth += 1
+
+    return position
+
+
+def get_closing_tags(ancestors: Tuple[bytes, ...]) -> bytes:
+    """Returns the end tags that close the given raw start tags of open ancestors, innermost first"""
+    return b''.join(b'</' + _MARKUP_PATTERN.match(start_tag).group(2) + b'>' for start_tag in reversed(ancestors))
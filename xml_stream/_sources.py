@@ -0,0 +1,177 @@
+"""Module containing protected helpers that turn the different XML sources into chunks of XML"""
+import bz2
+import gzip
+import inspect
+import lzma
+import mmap
+import os
+from contextlib import contextmanager
+from typing import Union, Iterator, Any, Optional, BinaryIO, AsyncIterator
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# the first bytes of a file compressed in each of the supported formats
+_COMPRESSION_MAGIC_BYTES = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+)
+
+_COMPRESSION_EXTENSIONS = {
+    '.gz': 'gzip',
+    '.gzip': 'gzip',
+    '.bz2': 'bz2',
+    '.xz': 'xz',
+    '.lzma': 'xz',
+    '.zst': 'zstd',
+    '.zstd': 'zstd',
+}
+
+
+def iter_xml_chunks(xml_data: Any, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Union[str, bytes, memoryview]]:
+    """
+    Turns the XML source into an iterator of chunks of at most chunk_size items.
+
+    Readable objects (files, pipes...) are read chunk by chunk, sockets are received chunk by chunk and
+    bytes-like data is sliced without copying. Any other iterable is assumed to already be an iterable of
+    str/bytes chunks and is passed through
+    """
+    if isinstance(xml_data, (str, bytes, bytearray, memoryview)):
+        if isinstance(xml_data, (bytes, bytearray)):
+            xml_data = memoryview(xml_data)
+
+        for start in range(0, len(xml_data), chunk_size):
+            yield xml_data[start:start + chunk_size]
+
+    elif hasattr(xml_data, 'read'):
+        read = xml_data.read
+        chunk = read(chunk_size)
+        while chunk:
+            yield chunk
+            chunk = read(chunk_size)
+
+    elif hasattr(xml_data, 'recv'):
+        receive = xml_data.recv
+        chunk = receive(chunk_size)
+        while chunk:
+            yield chunk
+            chunk = receive(chunk_size)
+
+    else:
+        yield from xml_data
+
+
+async def aiter_xml_chunks(xml_data: Any, chunk_size: int = DEFAULT_CHUNK_SIZE
+                           ) -> AsyncIterator[Union[str, bytes, memoryview]]:
+    """
+    Turns the asynchronous XML source into an asynchronous iterator of chunks.
+
+    Objects with a coroutine read method (asyncio.StreamReader, aiohttp's response.content...) are read
+    chunk_size bytes at a time. Any other asynchronous iterable is assumed to be an asynchronous iterable
+    of str/bytes chunks and is passed through, and synchronous sources are turned into chunks by iter_xml_chunks
+    """
+    if inspect.iscoroutinefunction(getattr(xml_data, 'read', None)):
+        read = xml_data.read
+        chunk = await read(chunk_size)
+        while chunk:
+            yield chunk
+            chunk = await read(chunk_size)
+
+    elif hasattr(xml_data, '__aiter__'):
+        async for chunk in xml_data:
+            yield chunk
+
+    else:
+        for chunk in iter_xml_chunks(xml_data, chunk_size=chunk_size):
+            yield chunk
+
+
+def detect_compression(file_path: str) -> Optional[str]:
+    """
+    Returns the compression format ('gzip', 'bz2', 'xz' or 'zstd') of the file, or None if it is not compressed.
+    The magic bytes at the start of the file are checked first and the file extension is used as a fallback
+    """
+    with open(file_path, 'rb') as xml_file:
+        head = xml_file.read(6)
+
+    for magic_bytes, compression in _COMPRESSION_MAGIC_BYTES:
+        if head.startswith(magic_bytes):
+            return compression
+
+    _, extension = os.path.splitext(file_path)
+    return _COMPRESSION_EXTENSIONS.get(extension.lower())
+
+
+def open_xml_file(file_path: str, compression: Optional[str] = 'infer',
+                  buffer_size: int = DEFAULT_CHUNK_SIZE) -> BinaryIO:
+    """
+    Opens the XML file for binary reading, decompressing it on the fly if it is compressed.
+    compression can be 'infer' (the default), None, 'gzip', 'bz2', 'xz' or 'zstd'
+    """
+    if compression == 'infer':
+        compression = detect_compression(file_path)
+
+    if compression is None:
+        return open(file_path, 'rb', buffering=buffer_size)
+
+    if compression == 'gzip':
+        return gzip.open(file_path, 'rb')
+
+    if compression == 'bz2':
+        return bz2.open(file_path, 'rb')
+
+    if compression == 'xz':
+        return lzma.open(file_path, 'rb')
+
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ImportError("The 'zstandard' package is required to read zstd compressed files")
+
+        raw_file = open(file_path, 'rb', buffering=buffer_size)
+        return zstandard.ZstdDecompressor().stream_reader(raw_file, read_size=buffer_size, closefd=True)
+
+    raise ValueError("Unsupported compression '{}'".format(compression))
+
+
+@contextmanager
+def map_xml_file(file_path: str) -> Iterator[memoryview]:
+    """
+    Memory-maps the (uncompressed) XML file and returns a read-only memoryview of it, whose slices can be fed to
+    the parser without being copied into bytes objects first. The kernel is told the file is read sequentially
+    so that it reads ahead and drops the pages already parsed, even for files larger than the RAM
+    """
+    with open(file_path, 'rb') as xml_file:
+        if os.fstat(xml_file.fileno()).st_size == 0:
+            yield memoryview(b'')
+            return
+
+        with mmap.mmap(xml_file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            if hasattr(buffer, 'madvise'):
+                buffer.madvise(mmap.MADV_SEQUENTIAL)
+
+            view = memoryview(buffer)
+            try:
+                yield view
+            finally:
+                view.release()
+
+
+@contextmanager
+def map_xml_buffer(file_path: str) -> Iterator[Union[mmap.mmap, bytes]]:
+    """
+    Memory-maps the (uncompressed) XML file and returns the mmap, whose bytes can be searched and sliced.
+    An empty file cannot be mapped, so empty bytes are returned for it instead
+    """
+    with open(file_path, 'rb') as xml_file:
+        if os.fstat(xml_file.fileno()).st_size == 0:
+            yield b''
+            return
+
+        with mmap.mmap(xml_file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer
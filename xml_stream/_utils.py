@@ -1,6 +1,5 @@
 """Module containing protected utility functions for the package"""
-import copy
-from typing import Dict, List
+from typing import Dict, List, Any, Iterator, Tuple, Mapping, Sequence
 from xml.etree.ElementTree import Element
 
 
@@ -8,13 +7,13 @@ def get_unique_and_repeated_sub_elements(element: Element):
     """Returns a tuple of (unique_elements_map: Dict, repeated_elements: List,) """
     unique_elements_map: Dict[str, Element] = {}
     repeated_elements: List[Element] = []
-    all_tags = []
+    all_tags = set()
 
     for sub_element in element:
         tag = sub_element.tag
 
         if tag not in all_tags:
-            all_tags.append(tag)
+            all_tags.add(tag)
             unique_elements_map[tag] = sub_element
         else:
             previously_saved_sub_element = unique_elements_map.pop(tag, None)
@@ -26,21 +25,31 @@ def get_unique_and_repeated_sub_elements(element: Element):
     return unique_elements_map, repeated_elements
 
 
-def get_xml_element_attributes_as_dict(xml_element: Element):
-    """Add the XML element's attributes as a dictionary"""
-    element_attributes = xml_element.items()
-    return dict(element_attributes) if element_attributes else {}
+def iter_flattened_items(record: Mapping[str, Any], prefix: str = '') -> Iterator[Tuple[str, Any]]:
+    """
+    Yields the (path, value) of every leaf of a dict record, the path being the keys leading to it joined by '/'
+    e.g. 'location/name'. Lists are leaves, as they have no fixed paths
+    """
+    for key, value in record.items():
+        if isinstance(value, dict) and value:
+            yield from iter_flattened_items(value, prefix=prefix + key + '/')
+        else:
+            yield prefix + key, value
 
 
-def add_common_sub_elements(
-        elements: List[Element], common_sub_elements: List[Element]) -> List[Element]:
-    """Adds the common sub elements to each element in the list and returns that list"""
-    for repeated_element in elements:
-        # in order not to lose the text
-        if repeated_element.text:
-            repeated_element.set('_value', repeated_element.text)
+def records_to_columns(records: Sequence[Mapping[str, Any]]) -> Dict[str, List[Any]]:
+    """
+    Returns the dict records as a dict of columns keyed by the paths of their flattened fields,
+    in the order they first appear, with None where a record does not have the field
+    """
+    number_of_records = len(records)
+    columns: Dict[str, List[Any]] = {}
 
-        for common_sub_element in common_sub_elements:
-            repeated_element.append(copy.deepcopy(common_sub_element))
+    for index, record in enumerate(records):
+        for path, value in iter_flattened_items(record):
+            column = columns.get(path)
+            if column is None:
+                columns[path] = column = [None] * number_of_records
+            column[index] = value
 
-    return elements
\ No newline at end of file
+    return columns
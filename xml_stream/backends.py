@@ -0,0 +1,190 @@
+"""
+Module containing the parser backends of the readers: the standard library's xml.etree.ElementTree, lxml if it is
+installed, and any other backend registered with register_backend
+"""
+from itertools import chain
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union
+from xml.etree import ElementTree
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:  # pragma: no cover
+    lxml_etree = None
+
+AUTO_BACKEND = 'auto'
+
+
+class ParserBackend:
+    """
+    A parser the readers can use, creating the pull parsers of the element records and the parsers feeding the
+    targets that build the other records. Both only need feed and close methods, and the pull parsers a read_events
+    method yielding (event, element) pairs, like xml.etree.ElementTree.XMLPullParser. Parsers that may defer the
+    events of the data fed (like those of expat 2.6+) should also have a flush method reporting them all.
+
+    A backend whose filters_tags is True creates pull parsers filtering the end events of the records by tag, and
+    its elements know their parent, so that release can drop the elements that ended before a record without the
+    reader following every event
+    """
+    name = ''
+    filters_tags = False
+
+    def is_available(self) -> bool:
+        """Checks whether the backend can be used e.g. if its package is installed"""
+        return True
+
+    def create_pull_parser(self, tags: Optional[Sequence[str]] = None) -> Any:
+        """
+        Returns a pull parser of the start and end events of every element or,
+        if the backend filters tags and tags are given, of the end events of the elements with those tags
+        """
+        raise NotImplementedError
+
+    def create_target_parser(self, target: Any) -> Any:
+        """Returns a parser calling the start, end, data and close methods of the target"""
+        raise NotImplementedError
+
+    def release(self, element: Any, tags: Sequence[str], clear: bool = False):
+        """
+        Drops the elements that ended before the record element from the tree, and the record's own sub elements if
+        clear, unless it is nested in another record with one of the tags. Only called if the backend filters tags
+        """
+        raise NotImplementedError
+
+    def __repr__(self):
+        return '{}(name={!r})'.format(self.__class__.__name__, self.name)
+
+
+class ElementTreeBackend(ParserBackend):
+    """The backend of the standard library's xml.etree.ElementTree, always available"""
+    name = 'etree'
+
+    def create_pull_parser(self, tags: Optional[Sequence[str]] = None) -> ElementTree.XMLPullParser:
+        """Returns a pull parser of the start and end events of every element"""
+        return ElementTree.XMLPullParser(events=('start', 'end',))
+
+    def create_target_parser(self, target: Any) -> ElementTree.XMLParser:
+        """Returns an expat parser calling the methods of the target"""
+        return ElementTree.XMLParser(target=target)
+
+
+class _LxmlParser:
+    """An lxml parser fed with memoryviews too, which lxml only takes as bytes"""
+
+    def __init__(self, parser: Any):
+        self._parser = parser
+        self.close = parser.close
+        self.read_events = getattr(parser, 'read_events', None)
+
+    def feed(self, data: Union[str, bytes, memoryview]):
+        """Parses the chunk"""
+        self._parser.feed(data.tobytes() if isinstance(data, memoryview) else data)
+
+
+class _LxmlTarget:
+    """A parser target passing the events of lxml on to a target, with the attributes as a dict"""
+
+    def __init__(self, target: Any):
+        self._target = target
+        self.end = target.end
+        self.data = target.data
+        self.close = target.close
+
+    def start(self, tag: str, attrib: Mapping[str, str]):
+        """Called by the parser for each start tag"""
+        self._target.start(tag, dict(attrib))
+
+
+class LxmlBackend(ParserBackend):
+    """
+    The backend of lxml.etree, if lxml is installed. Its pull parsers filter the records' end events by tag in C,
+    and drop comments and processing instructions as xml.etree.ElementTree does
+    """
+    name = 'lxml'
+    filters_tags = True
+
+    def is_available(self) -> bool:
+        """Checks whether lxml is installed"""
+        return lxml_etree is not None
+
+    def create_pull_parser(self, tags: Optional[Sequence[str]] = None) -> _LxmlParser:
+        """Returns a pull parser of the start and end events of every element, or of the end events of the tags"""
+        if tags is None:
+            return _LxmlParser(lxml_etree.XMLPullParser(
+                events=('start', 'end',), remove_comments=True, remove_pis=True, huge_tree=True))
+
+        return _LxmlParser(lxml_etree.XMLPullParser(
+            events=('end',), tag=list(tags), remove_comments=True, remove_pis=True, huge_tree=True))
+
+    def create_target_parser(self, target: Any) -> _LxmlParser:
+        """Returns a parser calling the methods of the target"""
+        return _LxmlParser(lxml_etree.XMLParser(
+            target=_LxmlTarget(target), remove_comments=True, remove_pis=True, huge_tree=True))
+
+    def release(self, element: 'lxml_etree._Element', tags: Sequence[str], clear: bool = False):
+        """Drops the preceding siblings of the record and of its ancestors, and its sub elements if clear"""
+        if next(element.iterancestors(*tags), None) is not None:
+            # the record is part of an outer record that is still being parsed
+            return
+
+        if clear:
+            element.clear(keep_tail=False)
+
+        for node in chain((element,), element.iterancestors()):
+            while node.getprevious() is not None:
+                del node.getparent()[0]
+
+
+# the registered backends, from the most to the least preferred
+_BACKENDS: Dict[str, ParserBackend] = {}
+
+
+def register_backend(backend: ParserBackend, preferred: bool = False):
+    """
+    Registers a parser backend under its name, replacing any backend of the same name, so that it can be passed
+    to the readers as backend. The automatic selection prefers the backends registered as preferred
+    """
+    if not backend.name or backend.name == AUTO_BACKEND:
+        raise ValueError("Invalid backend name {!r}".format(backend.name))
+
+    _BACKENDS.pop(backend.name, None)
+    if preferred:
+        backends = {backend.name: backend, **_BACKENDS}
+        _BACKENDS.clear()
+        _BACKENDS.update(backends)
+    else:
+        _BACKENDS[backend.name] = backend
+
+
+def get_available_backends() -> List[str]:
+    """Returns the names of the registered backends that can be used, from the most to the least preferred"""
+    return [name for name, backend in _BACKENDS.items() if backend.is_available()]
+
+
+def get_backend(name: str = AUTO_BACKEND, filters_tags: bool = False) -> ParserBackend:
+    """
+    Returns the backend called name or, if it is 'auto', the standard library's unless another backend was registered
+    as preferred. The most preferred available backend is then used if filters_tags (i.e. if the read can use a pull
+    parser filtering tags), and the standard library's otherwise, its expat parser being the fastest at feeding the
+    builders' targets
+    """
+    if name == AUTO_BACKEND:
+        if filters_tags:
+            for backend in _BACKENDS.values():
+                if backend.is_available():
+                    return backend
+        return _BACKENDS[ElementTreeBackend.name]
+
+    backend = _BACKENDS.get(name)
+    if backend is None:
+        raise ValueError("Unknown backend {!r}, expected 'auto' or one of {}".format(name, list(_BACKENDS)))
+    if not backend.is_available():
+        raise ImportError("The {!r} backend is not available, install its package e.g. "
+                          "'pip install xml_stream[{}]'".format(name, name))
+
+    return backend
+
+
+# the standard library's backend comes first, so 'auto' is 'etree' unless another backend is registered as preferred:
+# the records stay xml.etree.ElementTree.Element objects, and lxml builds most dicts more slowly
+register_backend(ElementTreeBackend())
+register_backend(LxmlBackend())
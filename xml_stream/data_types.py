@@ -1,26 +1,160 @@
 """Module containing the data types needed for the module to work"""
-from typing import Iterable, List, Dict, Union, Any
+import json
+from typing import Iterable, List, Dict, Union, Any, Optional, Iterator, Tuple, NamedTuple
 from xml.etree.ElementTree import Element
 
-from ._utils import get_unique_and_repeated_sub_elements, \
-    get_xml_element_attributes_as_dict, add_common_sub_elements
+from ._utils import get_unique_and_repeated_sub_elements
+
+
+class _CommonSubElements:
+    """
+    The sub elements that are not repeated among the children of an element. They are shared by each
+    of the repeated children, and their converted values are computed only once for all of them
+    """
+    __slots__ = ('elements', 'tags', '_values',)
+
+    def __init__(self, elements: List[Element]):
+        self.elements = elements
+        self.tags = {element.tag for element in elements}
+        self._values: Optional[List[Tuple[str, Any]]] = None
+
+    def iter_values(self) -> Iterator[Tuple[str, Any]]:
+        """Yields the (tag, converted value) of each element, copying only the values that are mutable"""
+        if self._values is None:
+            self._values = [(element.tag, _convert_sub_element(element)) for element in self.elements]
+
+        for tag, value in self._values:
+            yield tag, value if value is None or value.__class__ is str else _copy_value(value)
+
+
+class _RepeatedElement:
+    """
+    A read-only view of a repeated element as if the common sub elements were appended to its children
+    and its text was set as its '_value' attribute
+    """
+    __slots__ = ('element', 'common_sub_elements', 'tag', 'text', 'attrib',)
+
+    def __init__(self, element: Element, common_sub_elements: _CommonSubElements):
+        self.element = element
+        self.common_sub_elements = common_sub_elements
+        self.tag = element.tag
+        self.text = text = element.text
+        self.attrib = {**element.attrib, '_value': text} if text else element.attrib
+
+    def __len__(self) -> int:
+        return len(self.element) + len(self.common_sub_elements.elements)
+
+    def __iter__(self) -> Iterator[Element]:
+        yield from self.element
+        yield from self.common_sub_elements.elements
+
+
+def _copy_value(value: Any) -> Any:
+    """Returns a copy of a converted value, sharing its immutable (str or None) parts"""
+    if value is None or value.__class__ is str:
+        return value
+
+    if isinstance(value, list):
+        copied_list = list.__new__(XmlListElement)
+        copied_list.extend(_copy_value(item) for item in value)
+        return copied_list
+
+    copied_dict = _new_xml_dict_element() if isinstance(value, XmlDictElement) else {}
+    copied_dict.update(value)
+    for key, item in value.items():
+        if item is not None and item.__class__ is not str:
+            copied_dict[key] = _copy_value(item)
+
+    return copied_dict
+
+
+def _has_repeated_sub_elements(element: Union[Element, _RepeatedElement]) -> bool:
+    """Checks whether some sub elements of the element share the same tag"""
+    if isinstance(element, _RepeatedElement):
+        tags = [sub_element.tag for sub_element in element.element]
+        return len(set(tags)) != len(tags) or not element.common_sub_elements.tags.isdisjoint(tags)
+
+    tags = [sub_element.tag for sub_element in element]
+    return len(set(tags)) != len(tags)
+
+
+def _fill_with_unique_sub_elements(target: Dict[str, Any], element: Union[Element, _RepeatedElement]):
+    """Adds the converted value of each sub element of an element whose sub elements all have different tags"""
+    if isinstance(element, _RepeatedElement):
+        for sub_element in element.element:
+            target[sub_element.tag] = _convert_sub_element(sub_element)
+
+        target.update(element.common_sub_elements.iter_values())
+    else:
+        for sub_element in element:
+            target[sub_element.tag] = _convert_sub_element(sub_element)
+
+
+def _fill_with_repeated_sub_elements(target: Dict[str, Any], repeated_elements: List[Element],
+                                     unique_elements_map: Dict[str, Element]):
+    """
+    Adds a list for each tag of the repeated sub elements, each repeated element also getting
+    the sub elements that are not repeated
+    """
+    common_sub_elements = _CommonSubElements(list(unique_elements_map.values()))
+    grouped_elements: Dict[str, List[_RepeatedElement]] = {}
+
+    for repeated_element in repeated_elements:
+        group = grouped_elements.get(repeated_element.tag)
+        if group is None:
+            grouped_elements[repeated_element.tag] = group = []
+        group.append(_RepeatedElement(repeated_element, common_sub_elements))
+
+    for tag, group in grouped_elements.items():
+        target[tag] = XmlListElement(group)
+
+
+def _convert_sub_element(item: Element) -> Union[str, None, Dict[str, Any]]:
+    """Converts a sub element of an element whose sub elements all have different tags"""
+    item_attributes_dict = item.attrib
+
+    # if the item has sub elements
+    if len(item):
+        if not _has_repeated_sub_elements(item):
+            value = _new_xml_dict_element()
+            value.update(item_attributes_dict)
+            _fill_with_unique_sub_elements(value, item)
+        else:
+            unique_elements_map, repeated_elements = get_unique_and_repeated_sub_elements(item)
+            value = {
+                key: XmlDictElement(sub_element) if len(sub_element) or sub_element.attrib else sub_element.text
+                for key, sub_element in unique_elements_map.items()
+            }
+            value.update(group_elements_by_tag(elements=repeated_elements))
+
+        if item_attributes_dict:
+            value.update(item_attributes_dict)
+
+        return value
+
+    # if item has attributes but no sub elements
+    if item_attributes_dict:
+        value = dict(item_attributes_dict)
+        if item.text:
+            value['_value'] = item.text
+
+        return value
+
+    # if item has no attributes and no sub elements
+    return item.text
 
 
 def group_elements_by_tag(elements: List[Element]) -> Dict[str, List[Element]]:
     """Returns a dictionary with elements of the same tag grouped together in lists"""
-    unique_tags = set([sub_element.tag for sub_element in elements])
-    return {
-        tag: XmlListElement(filter((lambda x: x.tag == tag), elements))
-        for tag in unique_tags
-    }
+    grouped_elements: Dict[str, List[Element]] = {}
 
+    for element in elements:
+        group = grouped_elements.get(element.tag)
+        if group is None:
+            grouped_elements[element.tag] = group = []
+        group.append(element)
 
-def _convert_to_dict_or_str(elements_map: Dict[str, Element]) -> Dict[str, Union[str, Dict[Any, Any]]]:
-    """Combines a dictionary of xml elements into a dictionary of dicts or str"""
-    return {
-        key: XmlDictElement(value) if value or value.items() else value.text
-        for key, value in elements_map.items()
-    }
+    return {tag: XmlListElement(group) for tag, group in grouped_elements.items()}
 
 
 class XmlListElement(list):
@@ -30,18 +164,20 @@ class XmlListElement(list):
         super().__init__()
 
         for item in items:
-            # items without SubElements return False as __nonzero__method is not defined on Element
-            if item:
-                unique_elements_map, repeated_elements = get_unique_and_repeated_sub_elements(item)
-
-                if len(repeated_elements) == 0:
+            if len(item):
+                if not _has_repeated_sub_elements(item):
                     # append a dict
-                    self.append(XmlDictElement(item))
+                    value = _new_xml_dict_element()
+                    value.update(item.attrib)
+                    _fill_with_unique_sub_elements(value, item)
+                    self.append(value)
                 else:
                     # append a list
-                    repeated_elements = add_common_sub_elements(
-                        elements=repeated_elements, common_sub_elements=unique_elements_map.values())
-                    self.append(XmlListElement(repeated_elements))
+                    unique_elements_map, repeated_elements = get_unique_and_repeated_sub_elements(item)
+                    common_sub_elements = _CommonSubElements(list(unique_elements_map.values()))
+                    self.append(XmlListElement(
+                        _RepeatedElement(repeated_element, common_sub_elements)
+                        for repeated_element in repeated_elements))
 
             elif item.text:
                 # append a text/number
@@ -53,43 +189,47 @@ class XmlListElement(list):
 class XmlDictElement(dict):
     """An XML dict element"""
 
-    def __init__(self, xml_element: Element):
+    def __init__(self, xml_element: Optional[Element] = None):
         super().__init__()
-        self.update(get_xml_element_attributes_as_dict(xml_element))
 
-        unique_root_elements_map, repeated_root_elements = get_unique_and_repeated_sub_elements(xml_element)
+        if xml_element is None:
+            return
 
-        if len(repeated_root_elements) > 0:
-            repeated_root_elements = add_common_sub_elements(
-                elements=repeated_root_elements, common_sub_elements=unique_root_elements_map.values())
+        self.update(xml_element.attrib)
 
-            grouped_elements = group_elements_by_tag(elements=repeated_root_elements)
-            self.update(grouped_elements)
+        if _has_repeated_sub_elements(xml_element):
+            unique_root_elements_map, repeated_root_elements = get_unique_and_repeated_sub_elements(xml_element)
+            _fill_with_repeated_sub_elements(self, repeated_root_elements, unique_root_elements_map)
         else:
-            for item in xml_element:
-                item_attributes_dict = get_xml_element_attributes_as_dict(item)
-
-                # if the item has sub elements
-                if item:
-                    unique_elements_map, repeated_elements = get_unique_and_repeated_sub_elements(item)
-
-                    if len(repeated_elements) == 0:
-                        value = XmlDictElement(item)
-                    else:
-                        unique_elements_dict = _convert_to_dict_or_str(unique_elements_map)
-                        value = {**unique_elements_dict, **group_elements_by_tag(elements=repeated_elements)}
-
-                    value.update(item_attributes_dict)
-
-                    # if item has attributes but no sub elements
-                elif len(item_attributes_dict) > 0:
-                    if item.text:
-                        item_attributes_dict['_value'] = item.text
-
-                    value = item_attributes_dict
-
-                # if item has no attributes and no sub elements
-                else:
-                    value = item.text
-
-                self.update({item.tag: value})
+            _fill_with_unique_sub_elements(self, xml_element)
+
+
+def _new_xml_dict_element() -> XmlDictElement:
+    """Returns an empty XmlDictElement, skipping the overhead of calling its __init__"""
+    return dict.__new__(XmlDictElement)
+
+
+class Checkpoint(NamedTuple):
+    """
+    The position in an XML file just after a record, from which reading can be resumed: the byte offset,
+    the prolog of the document (XML declaration, doctype...) and the raw start tags of the elements still open
+    at that offset, which carry the namespace declarations in scope
+    """
+    offset: int
+    prolog: bytes = b''
+    ancestors: Tuple[bytes, ...] = ()
+
+    def to_json(self) -> str:
+        """Returns the checkpoint as a JSON string, to be saved and loaded with Checkpoint.from_json"""
+        return json.dumps({
+            'offset': self.offset,
+            'prolog': self.prolog.decode('latin-1'),
+            'ancestors': [start_tag.decode('latin-1') for start_tag in self.ancestors],
+        })
+
+    @classmethod
+    def from_json(cls, json_string: str) -> 'Checkpoint':
+        """Returns the checkpoint saved as a JSON string by Checkpoint.to_json"""
+        data = json.loads(json_string)
+        return cls(offset=data['offset'], prolog=data['prolog'].encode('latin-1'),
+                   ancestors=tuple(start_tag.encode('latin-1') for start_tag in data['ancestors']))
@@ -0,0 +1,178 @@
+"""
+Module containing the exporters that stream the records of XML files into Parquet, CSV or JSON lines files.
+
+The records are read and written a batch at a time, so memory use is bounded by the batch (or row group) size
+however large the XML file is. For the tabular formats, the dict records are flattened into columns keyed by the
+paths of their fields e.g. 'location/name', either the declared ones or those of the first batch of records.
+"""
+import csv
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+from ._readers import read_xml_file
+from ._utils import records_to_columns
+
+DEFAULT_BATCH_SIZE = 10000
+
+
+def _iter_column_batches(file_path: str, records_tag: str, columns: Optional[Sequence[str]], batch_size: int,
+                         kwargs: Dict[str, Any]) -> Iterator[Tuple[List[str], Dict[str, List[Any]], int]]:
+    """
+    Yields (columns, batch, number of records) for every batch of the records of the XML file, the batch being
+    a dict of lists with one list of number of records values for each of the columns.
+    Declared columns are the only ones kept, with None for the records that do not have them. Else the columns
+    are those of the first batch, and any other field found in later batches raises a ValueError as it could
+    not be written
+    """
+    is_declared = columns is not None
+    columns = list(columns) if is_declared else None
+
+    for records in read_xml_file(file_path, records_tag=records_tag, to_dict=True, batch_size=batch_size, **kwargs):
+        number_of_records = len(records)
+        batch = records_to_columns(records)
+
+        if columns is None:
+            columns = list(batch)
+        elif not is_declared:
+            new_columns = [path for path in batch if path not in columns]
+            if new_columns:
+                raise ValueError("The fields {} are not in the columns inferred from the first {} records, "
+                                 "declare the columns to export instead".format(new_columns, batch_size))
+
+        yield columns, {path: batch.get(path) or [None] * number_of_records for path in columns}, number_of_records
+
+
+def _remove_output(output_path: str) -> None:
+    """Removes the partially written output file, if any, of an export that failed"""
+    try:
+        os.remove(output_path)
+    except OSError:
+        pass
+
+
+def _to_text(value: Any) -> Optional[str]:
+    """Returns the value as text, lists and dicts of repeated or nested sub elements being encoded as JSON"""
+    if value is None or value.__class__ is str:
+        return value
+
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _to_arrow_array(values: List[Any], data_type: 'pyarrow.DataType') -> 'pyarrow.Array':
+    """Returns the values of a column as an arrow array of the given type, casting the texts to it if need be"""
+    if pyarrow.types.is_nested(data_type):
+        return pyarrow.array(values, type=data_type)
+
+    array = pyarrow.array([_to_text(value) for value in values], type=pyarrow.string())
+    return array if pyarrow.types.is_string(data_type) else array.cast(data_type)
+
+
+def to_parquet(file_path: str, records_tag: str, output_path: str, schema: Optional['pyarrow.Schema'] = None,
+               columns: Optional[Sequence[str]] = None, row_group_size: int = DEFAULT_BATCH_SIZE,
+               parquet_compression: str = 'snappy', **kwargs) -> int:
+    """
+    Writes the records of an XML file to a Parquet file, a row group of row_group_size records at a time,
+    and returns the number of records written.
+
+    schema is an optional pyarrow.Schema whose field names are the paths of the columns e.g. 'location/name'.
+    The texts are cast to the types of its fields, and nested types (lists, structs) get the lists and dicts
+    of repeated or nested sub elements as they are. Without a schema, the columns (or those of the first row
+    group if not given) are all strings, lists and dicts being encoded as JSON.
+    parquet_compression is the compression codec of the Parquet file e.g. 'snappy', 'zstd' or 'none'.
+    Any other keyword argument (e.g. fields, where or compression of the XML file) is passed on to read_xml_file.
+    The partially written Parquet file is removed if the export fails. Needs the pyarrow package
+    """
+    if pyarrow is None:
+        raise ImportError("The 'pyarrow' package is required to export to Parquet")
+
+    if schema is not None:
+        columns = schema.names
+
+    writer = None
+    number_of_records = 0
+
+    try:
+        for columns, batch, batch_length in _iter_column_batches(
+                file_path, records_tag, columns=columns, batch_size=row_group_size, kwargs=kwargs):
+            if writer is None:
+                if schema is None:
+                    schema = pyarrow.schema([(path, pyarrow.string()) for path in columns])
+                writer = pyarrow.parquet.ParquetWriter(output_path, schema, compression=parquet_compression)
+
+            arrays = [_to_arrow_array(batch[field.name], field.type) for field in schema]
+            writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema), row_group_size=row_group_size)
+            number_of_records += batch_length
+
+        if writer is None:
+            # there were no records
+            schema = schema or pyarrow.schema([(path, pyarrow.string()) for path in columns or ()])
+            writer = pyarrow.parquet.ParquetWriter(output_path, schema, compression=parquet_compression)
+    except BaseException:
+        if writer is not None:
+            writer.close()
+            _remove_output(output_path)
+        raise
+
+    writer.close()
+
+    return number_of_records
+
+
+def to_csv(file_path: str, records_tag: str, output_path: str, columns: Optional[Sequence[str]] = None,
+           batch_size: int = DEFAULT_BATCH_SIZE, dialect: str = 'excel', **kwargs) -> int:
+    """
+    Writes the records of an XML file to a CSV file, batch_size records at a time, and returns the number
+    of records written. The header is the declared columns or else those of the first batch of records.
+    Missing fields are left empty, and lists and dicts of repeated or nested sub elements are encoded as JSON.
+    The partially written CSV file is removed if the export fails.
+    Any other keyword argument (e.g. fields, where or compression of the XML file) is passed on to read_xml_file
+    """
+    number_of_records = 0
+
+    try:
+        with open(output_path, 'w', newline='', encoding='utf-8') as csv_file:
+            writer = csv.writer(csv_file, dialect=dialect)
+            is_header_written = False
+
+            if columns is not None:
+                writer.writerow(columns)
+                is_header_written = True
+
+            for columns, batch, batch_length in _iter_column_batches(
+                    file_path, records_tag, columns=columns, batch_size=batch_size, kwargs=kwargs):
+                if not is_header_written:
+                    writer.writerow(columns)
+                    is_header_written = True
+
+                writer.writerows(zip(*(
+                    ['' if value is None else _to_text(value) for value in batch[path]] for path in columns)))
+                number_of_records += batch_length
+    except BaseException:
+        _remove_output(output_path)
+        raise
+
+    return number_of_records
+
+
+def to_jsonl(file_path: str, records_tag: str, output_path: str, batch_size: int = DEFAULT_BATCH_SIZE,
+             **kwargs) -> int:
+    """
+    Writes the dict records of an XML file to a JSON lines file, one record per line and batch_size records
+    at a time, and returns the number of records written. The records are not flattened.
+    Any other keyword argument (e.g. fields, where or compression of the XML file) is passed on to read_xml_file
+    """
+    number_of_records = 0
+
+    with open(output_path, 'w', encoding='utf-8') as jsonl_file:
+        for batch in read_xml_file(file_path, records_tag=records_tag, to_dict=True, batch_size=batch_size, **kwargs):
+            jsonl_file.write(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in batch))
+            number_of_records += len(batch)
+
+    return number_of_records
@@ -0,0 +1,123 @@
+"""Module containing the record filters evaluated while the records are being parsed"""
+import operator
+from functools import partial
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Union
+
+from ._namespaces import resolve_path
+from ._paths import split_path
+
+# where a record can be rejected: on its start tag, on the end tag of one of its sub elements or on its end tag
+REJECTED_AT_START = 'start'
+REJECTED_WHILE_PARSING = 'parsing'
+REJECTED_AT_END = 'end'
+
+
+class _ConditionsTree:
+    """
+    The tree of the conditions of a RecordFilter: the conditions on the attributes and on the text
+    of an element (as (index, predicate) pairs) and the conditions trees of its sub elements
+    """
+    __slots__ = ('children', 'attribute_conditions', 'text_condition',)
+
+    def __init__(self):
+        self.children: Dict[str, '_ConditionsTree'] = {}
+        self.attribute_conditions: List[Tuple[str, int, Callable[[Optional[str]], bool]]] = []
+        self.text_condition: Optional[Tuple[int, Callable[[Optional[str]], bool]]] = None
+
+
+def _to_predicate(expected_value: Any) -> Callable[[Optional[str]], bool]:
+    """
+    Returns the expected value if it is a predicate, else a predicate checking equality with it, which can be pickled
+    to the worker processes of the parallel readers
+    """
+    if callable(expected_value):
+        return expected_value
+
+    return partial(operator.eq, expected_value)
+
+
+class RecordFilter:
+    """
+    A filter deciding which records are yielded, evaluated as the records are being parsed.
+
+    conditions is a mapping of paths relative to the record (like '@status', 'Price' or 'Ref/@type') to either the
+    expected value (a str, or None for missing values) or a predicate taking the value (or None) and returning a bool.
+    A path refers to the first element it matches, like xml.etree.ElementTree.Element.findtext does.
+    Conditions are checked as soon as their value is parsed: those on the record's attributes on its start tag,
+    those on its sub elements when they end, so rejected records are dropped without being built any further.
+
+    predicate is an optional callable taking the whole record (an xml.etree.ElementTree.Element, or an element-like
+    object with tag, attrib, text, get(), find(), findtext() and findall() when reading to dicts) before it is
+    converted and returning a bool. It is checked once the record has ended and has passed the conditions.
+
+    namespaces optionally maps prefixes to namespace uris, so that paths can use prefixed names like 'shop:price'.
+
+    The filter counts the records it has seen, accepted and rejected, the rejected ones by where they were rejected,
+    including in the worker processes of read_xml_file_parallel and read_xml_files, whose counts are added to it
+    """
+
+    def __init__(self, conditions: Optional[Mapping[str, Any]] = None,
+                 predicate: Optional[Callable[[Any], bool]] = None, namespaces: Optional[Mapping[str, str]] = None):
+        self.predicate = predicate
+        self.conditions_tree = _ConditionsTree()
+        self.number_of_conditions = 0
+        paths: List[str] = []
+
+        for path, expected_value in (conditions or {}).items():
+            tags, attribute = split_path(resolve_path(path, namespaces))
+            node = self.conditions_tree
+            for tag in tags:
+                child = node.children.get(tag)
+                if child is None:
+                    node.children[tag] = child = _ConditionsTree()
+                node = child
+
+            condition = (self.number_of_conditions, _to_predicate(expected_value))
+            if attribute is not None:
+                node.attribute_conditions.append((attribute,) + condition)
+            elif node.text_condition is not None:
+                raise ValueError("The conditions on {!r} and {!r} are on the text of the same element, combine them "
+                                 "into one predicate".format(paths[node.text_condition[0]], path))
+            else:
+                node.text_condition = condition
+            paths.append(path)
+            self.number_of_conditions += 1
+
+        self._reset_counts()
+
+    def _reset_counts(self):
+        """Sets the counts of the records seen, accepted and rejected to 0"""
+        self.seen = 0
+        self.accepted = 0
+        self.rejected: Dict[str, int] = {REJECTED_AT_START: 0, REJECTED_WHILE_PARSING: 0, REJECTED_AT_END: 0}
+
+    def _get_counts(self) -> Tuple[int, int, Dict[str, int]]:
+        """Returns the counts of the records seen, accepted and rejected, e.g. to send them from a worker process"""
+        return self.seen, self.accepted, dict(self.rejected)
+
+    def _add_counts(self, counts: Tuple[int, int, Dict[str, int]]):
+        """Adds the counts returned by _get_counts, e.g. by the copy of the filter of a worker process, to the counts"""
+        seen, accepted, rejected = counts
+        self.seen += seen
+        self.accepted += accepted
+        for rejection_point, number_of_records in rejected.items():
+            self.rejected[rejection_point] += number_of_records
+
+    @classmethod
+    def from_where(cls, where: Union['RecordFilter', Mapping[str, Any], Callable[[Any], bool]],
+                   namespaces: Optional[Mapping[str, str]] = None) -> 'RecordFilter':
+        """
+        Returns the RecordFilter for the where argument of the readers: a RecordFilter, a mapping (whose paths can use
+        the prefixes of namespaces) or a callable
+        """
+        if isinstance(where, RecordFilter):
+            return where
+
+        if callable(where):
+            return cls(predicate=where)
+
+        return cls(conditions=where, namespaces=namespaces)
+
+    def __repr__(self):
+        return '{}(seen={}, accepted={}, rejected={})'.format(
+            self.__class__.__name__, self.seen, self.accepted, self.rejected)
@@ -0,0 +1,397 @@
+"""Module containing the record schemas, mapping the records into typed objects while they are being parsed"""
+import re
+import typing
+from collections import namedtuple
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Union
+
+try:
+    import dataclasses
+except ImportError:  # pragma: no cover
+    dataclasses = None
+
+from ._namespaces import resolve_path
+from ._paths import FieldsTree, compile_fields, split_path
+
+_TRUE_VALUES = frozenset(('true', '1', 'yes', 'y', 'on'))
+_FALSE_VALUES = frozenset(('false', '0', 'no', 'n', 'off'))
+
+
+def to_bool(value: str) -> bool:
+    """Converts XML text like 'true', '1', 'yes', 'false', '0' or 'no' (in any case) into a bool"""
+    lowered_value = value.lower()
+    if lowered_value in _TRUE_VALUES:
+        return True
+    if lowered_value in _FALSE_VALUES:
+        return False
+
+    raise ValueError("{!r} is not a boolean".format(value))
+
+
+# the ISO 8601 dates, times and UTC offsets, parsed with regular expressions on Python 3.6, which has no fromisoformat
+_ISO_DATE = r'(\d{4})-(\d{2})-(\d{2})'
+_ISO_TIME = r'(\d{2}):(\d{2})(?::(\d{2})(?:\.(\d{1,6}))?)?(?:([+-])(\d{2}):(\d{2}))?'
+_ISO_DATE_PATTERN = re.compile(_ISO_DATE + '$')
+_ISO_TIME_PATTERN = re.compile(_ISO_TIME + '$')
+_ISO_DATETIME_PATTERN = re.compile(_ISO_DATE + '(?:[T ]' + _ISO_TIME + ')?$')
+
+
+def _match_iso_format(pattern: typing.Pattern, value: str) -> typing.Match:
+    """Returns the match of the ISO 8601 pattern in the whole value, raising a ValueError if it does not match"""
+    match = pattern.match(value)
+    if match is None:
+        raise ValueError("Invalid isoformat string: {!r}".format(value))
+
+    return match
+
+
+def _to_time_arguments(hour: Optional[str], minute: Optional[str], second: Optional[str], fraction: Optional[str],
+                       sign: Optional[str], offset_hours: Optional[str], offset_minutes: Optional[str]) -> Tuple:
+    """Returns the (hour, minute, second, microsecond, tzinfo) of the groups of a match of an ISO 8601 time"""
+    tzinfo = None
+    if sign is not None:
+        offset = timedelta(hours=int(offset_hours), minutes=int(offset_minutes))
+        tzinfo = timezone(-offset if sign == '-' else offset)
+
+    return int(hour or 0), int(minute or 0), int(second or 0), int((fraction or '0').ljust(6, '0')), tzinfo
+
+
+def _parse_iso_date(value: str) -> date:
+    """Converts an ISO 8601 date like '2021-03-04' into a date, as date.fromisoformat does on Python 3.7+"""
+    return date(*map(int, _match_iso_format(_ISO_DATE_PATTERN, value).groups()))
+
+
+def _parse_iso_time(value: str) -> time:
+    """Converts an ISO 8601 time like '05:06:07' into a time, as time.fromisoformat does on Python 3.7+"""
+    groups = _match_iso_format(_ISO_TIME_PATTERN, value).groups()
+    hour, minute, second, microsecond, tzinfo = _to_time_arguments(*groups)
+    return time(hour, minute, second, microsecond, tzinfo=tzinfo)
+
+
+def _parse_iso_datetime(value: str) -> datetime:
+    """Converts an ISO 8601 date and time into a datetime, as datetime.fromisoformat does on Python 3.7+"""
+    groups = _match_iso_format(_ISO_DATETIME_PATTERN, value).groups()
+    hour, minute, second, microsecond, tzinfo = _to_time_arguments(*groups[3:])
+    return datetime(int(groups[0]), int(groups[1]), int(groups[2]), hour, minute, second, microsecond, tzinfo=tzinfo)
+
+
+_from_iso_date: Callable[[str], date] = getattr(date, 'fromisoformat', _parse_iso_date)
+_from_iso_time: Callable[[str], time] = getattr(time, 'fromisoformat', _parse_iso_time)
+_from_iso_datetime: Callable[[str], datetime] = getattr(datetime, 'fromisoformat', _parse_iso_datetime)
+
+
+def to_datetime(value: str) -> datetime:
+    """Converts an ISO 8601 date and time like '2021-03-04T05:06:07Z' or '2021-03-04 05:06:07+01:00' into a datetime"""
+    return _from_iso_datetime(value[:-1] + '+00:00' if value.endswith(('Z', 'z')) else value)
+
+
+def to_date(value: str) -> date:
+    """Converts an ISO 8601 date like '2021-03-04' into a date"""
+    return _from_iso_date(value)
+
+
+def to_time(value: str) -> time:
+    """Converts an ISO 8601 time like '05:06:07' or '05:06:07.250+01:00' into a time"""
+    return _from_iso_time(value)
+
+
+# the converters of the texts of the fields of the types that can not simply be called with them, None meaning
+# that the text is kept as it is
+CONVERTERS: Dict[Any, Optional[Callable[[str], Any]]] = {
+    str: None,
+    Any: None,
+    bool: to_bool,
+    datetime: to_datetime,
+    date: to_date,
+    time: to_time,
+}
+
+
+def _get_converter(field_type: Any) -> Tuple[Optional[Callable[[str], Any]], bool]:
+    """
+    Returns the converter of the texts of a field of the given type (None to keep them as they are)
+    and whether the field is a list
+    """
+    origin = getattr(field_type, '__origin__', None)
+    arguments = getattr(field_type, '__args__', None) or ()
+
+    if origin is list or origin is List:
+        converter, is_list = _get_converter(arguments[0] if arguments else str)
+        if is_list:
+            raise ValueError("Unsupported type {}: lists of lists can not be read".format(field_type))
+        return converter, True
+
+    if origin is Union or type(field_type).__name__ == 'UnionType':
+        types = [argument for argument in arguments if argument is not type(None)]
+        if len(types) != 1:
+            raise ValueError("Unsupported type {}: only Optional unions can be read".format(field_type))
+        return _get_converter(types[0])
+
+    if field_type in CONVERTERS:
+        return CONVERTERS[field_type], False
+
+    if isinstance(field_type, type):
+        return field_type, False
+
+    raise ValueError("Unsupported type {}: expected a type, an Optional type or a List of them".format(field_type))
+
+
+def _get_record_type(field_names: Tuple[str, ...]) -> type:
+    """Returns the namedtuple type of the records of the mapping schemas with the given field names, made once"""
+    record_type = _RECORD_TYPES.get(field_names)
+    if record_type is None:
+        record_type = namedtuple('Record', field_names)
+        record_type.__reduce__ = _reduce_record
+        _RECORD_TYPES[field_names] = record_type
+
+    return record_type
+
+
+def _reduce_record(record: tuple) -> Tuple[Callable, Tuple]:
+    """Pickles the records of mapping schemas, whose types are made at run time, as their field names and values"""
+    return _make_record, (record._fields, tuple(record))
+
+
+def _make_record(field_names: Tuple[str, ...], values: Tuple) -> tuple:
+    """Unpickles the records of mapping schemas"""
+    return _get_record_type(field_names)._make(values)
+
+
+# the namedtuple types of the records of mapping schemas, by field names
+_RECORD_TYPES: Dict[Tuple[str, ...], type] = {}
+
+
+class _PlanNode:
+    """
+    The plan of the fields read out of an element: the fields taking its text or one of its attributes as
+    (index, converter) and (index, attribute, converter), the plans of the first sub elements with each tag, and the
+    list fields collecting the text (or an attribute) of every sub element with each tag, as (index, attribute,
+    converter)
+    """
+    __slots__ = ('children', 'text_fields', 'attribute_fields', 'list_fields',)
+
+    def __init__(self):
+        self.children: Dict[str, '_PlanNode'] = {}
+        self.text_fields: List[Tuple[int, Optional[Callable]]] = []
+        self.attribute_fields: List[Tuple[int, str, Optional[Callable]]] = []
+        self.list_fields: Dict[str, List[Tuple[int, Optional[str], Optional[Callable]]]] = {}
+
+
+def _split_field_path(path: str) -> Tuple[List[str], Optional[str]]:
+    """Splits the path of a field like split_path does, '.' being the text of the record itself"""
+    if path.strip() in ('', '.'):
+        return [], None
+
+    return split_path(path)
+
+
+class RecordSchema:
+    """
+    The schema of typed records, passed to the readers as their schema argument, compiled once into the plan of
+    the fields to read out of every record. It is made from either:
+
+    - a dataclass, whose fields are read from the sub elements named after them, or from the path in their metadata
+      e.g. `field(metadata={'path': '@id'})`, and converted according to their types. Dataclasses with slots
+      (`@dataclass(slots=True)` on Python 3.10+) make the most compact records
+    - a NamedTuple (or namedtuple), whose fields are read and converted the same way
+    - a mapping of field names to paths relative to the record, or to (path, type or converter) pairs, whose records
+      are instances of a namedtuple type made for the schema's field names
+
+    paths optionally maps field names of a dataclass or NamedTuple to the paths they are read from, and namespaces
+    maps prefixes to namespace uris so that paths can use prefixed names like 'shop:price'.
+    Paths are like 'price', 'Ref/Author', '@id', 'Ref/@type' or '.' (the text of the record itself), and refer to the
+    first element they match, but for the fields typed as lists (e.g. List[int]) which collect every element matching
+    the last tag of the path, leaving the empty ones out. The texts are converted into int, float, bool ('true', '1',
+    'yes', 'false'...), datetime, date and time (ISO 8601) and any other type called with the text; missing fields,
+    and empty ones but for str fields, get their default value or None.
+
+    The records are trimmed to the paths of the schema while they are being parsed
+    """
+
+    def __init__(self, schema: Union[type, Mapping[str, Union[str, Tuple[str, Any]]]],
+                 paths: Optional[Mapping[str, str]] = None, namespaces: Optional[Mapping[str, str]] = None):
+        paths = paths or {}
+        self.schema = schema
+        self.field_names: List[str] = []
+        self._defaults: List[Any] = []
+        # the (index, factory) of the fields whose default value is made anew for every record
+        self._default_factories: List[Tuple[int, Callable[[], Any]]] = []
+        self._uses_keywords = False
+        field_specs: List[Tuple[str, str, Any]] = []
+
+        if isinstance(schema, Mapping):
+            for name, spec in schema.items():
+                path, converter = (spec, str) if isinstance(spec, str) else spec
+                field_specs.append((name, path, converter))
+                self._add_field(name)
+            self.record_type = _get_record_type(tuple(self.field_names))
+            self._make = self.record_type._make
+
+        elif dataclasses is not None and isinstance(schema, type) and dataclasses.is_dataclass(schema):
+            type_hints = typing.get_type_hints(schema)
+            for field in dataclasses.fields(schema):
+                if not field.init:
+                    continue
+                path = paths.get(field.name, field.metadata.get('path', field.name))
+                field_specs.append((field.name, path, field.metadata.get('converter', type_hints[field.name])))
+                self._add_field(field.name, default=field.default, default_factory=field.default_factory)
+                self._uses_keywords = self._uses_keywords or getattr(field, 'kw_only', False) is True
+            self.record_type = schema
+            self._make = self._make_dataclass
+
+        elif isinstance(schema, type) and issubclass(schema, tuple) and hasattr(schema, '_fields'):
+            type_hints = typing.get_type_hints(schema)
+            defaults = getattr(schema, '_field_defaults', {})
+            for name in schema._fields:
+                field_specs.append((name, paths.get(name, name), type_hints.get(name, str)))
+                self._add_field(name, default=defaults.get(name))
+            self.record_type = schema
+            self._make = schema._make
+
+        else:
+            raise ValueError("Invalid schema {!r}, expected a dataclass, a NamedTuple or a mapping of fields to "
+                             "paths".format(schema))
+
+        unknown_names = set(paths) - set(self.field_names)
+        if unknown_names:
+            raise ValueError("Unknown fields in paths: {}".format(sorted(unknown_names)))
+
+        self.plan = _PlanNode()
+        fields_paths = []
+        for index, (name, path, converter) in enumerate(field_specs):
+            path = resolve_path(path, namespaces)
+            self._add_to_plan(index, name, path, converter)
+            if path.strip() not in ('', '.'):
+                fields_paths.append(path)
+
+        self.fields: FieldsTree = compile_fields(fields_paths)
+
+    def _add_field(self, name: str, default: Any = None, default_factory: Optional[Callable[[], Any]] = None):
+        """Adds a field with its default value, or the factory of its default value"""
+        if dataclasses is not None and default is dataclasses.MISSING:
+            default = None
+        if dataclasses is not None and default_factory is not dataclasses.MISSING and default_factory is not None:
+            self._default_factories.append((len(self.field_names), default_factory))
+
+        self.field_names.append(name)
+        self._defaults.append(default)
+
+    def _add_to_plan(self, index: int, name: str, path: str, converter: Any):
+        """Adds the field at the index, read from the path with the converter (or type), to the plan"""
+        if isinstance(converter, type) or hasattr(converter, '__origin__') or converter is Any:
+            converter, is_list = _get_converter(converter)
+        elif callable(converter):
+            is_list = False
+        else:
+            raise ValueError("Invalid converter {!r} of field {!r}, expected a type or a callable".format(
+                converter, name))
+
+        tags, attribute = _split_field_path(path)
+        if is_list:
+            if not tags:
+                raise ValueError("The list field {!r} needs a path to sub elements, got {!r}".format(name, path))
+            self._default_factories.append((index, list))
+            tags, list_tag = tags[:-1], tags[-1]
+
+        node = self.plan
+        for tag in tags:
+            child = node.children.get(tag)
+            if child is None:
+                node.children[tag] = child = _PlanNode()
+            node = child
+
+        if is_list:
+            node.list_fields.setdefault(list_tag, []).append((index, attribute, converter))
+        elif attribute is not None:
+            node.attribute_fields.append((index, attribute, converter))
+        else:
+            node.text_fields.append((index, converter))
+
+    @classmethod
+    def from_schema(cls, schema: Union['RecordSchema', type, Mapping[str, Union[str, Tuple[str, Any]]]],
+                    namespaces: Optional[Mapping[str, str]] = None) -> 'RecordSchema':
+        """
+        Returns the RecordSchema for the schema argument of the readers: a RecordSchema, a dataclass, a NamedTuple
+        or a mapping, with the prefixes of namespaces. The schemas of types are compiled once (per namespaces) and
+        reused by the following reads
+        """
+        if isinstance(schema, RecordSchema):
+            return schema
+
+        if not isinstance(schema, type):
+            return cls(schema, namespaces=namespaces)
+
+        key = (schema, tuple(sorted(namespaces.items())) if namespaces else None)
+        record_schema = _COMPILED_SCHEMAS.get(key)
+        if record_schema is None:
+            _COMPILED_SCHEMAS[key] = record_schema = cls(schema, namespaces=namespaces)
+
+        return record_schema
+
+    def build(self, element: Any) -> Any:
+        """Returns the typed record of the element (or element-like object) of a record"""
+        values = self._defaults[:]
+        for index, factory in self._default_factories:
+            values[index] = factory()
+
+        self._read(element, self.plan, values)
+        return self._make(values)
+
+    def _make_dataclass(self, values: List[Any]) -> Any:
+        """Returns the dataclass record with the given values"""
+        if self._uses_keywords:
+            return self.record_type(**dict(zip(self.field_names, values)))
+
+        return self.record_type(*values)
+
+    def _convert(self, index: int, converter: Optional[Callable[[str], Any]], value: Optional[str]) -> Any:
+        """Returns the converted value of the field at the index, or its default value if the value is empty"""
+        if converter is None:
+            return value
+
+        value = value.strip()
+        if not value:
+            return self._defaults[index]
+
+        try:
+            return converter(value)
+        except (ValueError, TypeError, ArithmeticError) as error:
+            raise ValueError("Invalid value {!r} for the field {!r}: {}".format(
+                value, self.field_names[index], error)) from error
+
+    def _read(self, element: Any, plan: _PlanNode, values: List[Any]):
+        """Reads the values of the fields of the plan out of the element"""
+        for index, converter in plan.text_fields:
+            values[index] = self._convert(index, converter, element.text or '')
+
+        for index, name, converter in plan.attribute_fields:
+            value = element.attrib.get(name)
+            if value is not None:
+                values[index] = self._convert(index, converter, value)
+
+        children = plan.children
+        list_fields = plan.list_fields
+        if not children and not list_fields:
+            return
+
+        read_tags = set()
+        for sub_element in element:
+            tag = sub_element.tag
+            child = children.get(tag)
+            if child is not None and tag not in read_tags:
+                read_tags.add(tag)
+                self._read(sub_element, child, values)
+
+            fields = list_fields.get(tag)
+            if fields is not None:
+                for index, name, converter in fields:
+                    value = sub_element.text or '' if name is None else sub_element.attrib.get(name)
+                    if value is not None and value.strip():
+                        values[index].append(self._convert(index, converter, value))
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__name__, getattr(self.record_type, '__name__', self.record_type))
+
+
+# the schemas of the dataclasses and NamedTuples passed to the readers, compiled once, by type and namespaces
+_COMPILED_SCHEMAS: Dict[Tuple[type, Optional[Tuple]], RecordSchema] = {}
@@ -0,0 +1,186 @@
+"""Module containing the statistics that the readers can collect while they read"""
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+from ._paths import get_records_selector
+
+
+class ReaderStats:
+    """
+    The statistics of one or more reads, passed to the readers as their stats argument:
+
+    - bytes_read: the bytes (or characters, for str input) read from the source
+    - records_seen: the records whose start tag was parsed, including those rejected by where
+    - records_yielded: the records yielded (those in the yielded batches when reading in batches)
+    - read_seconds, parse_seconds and convert_seconds: the time spent reading the source, parsing (and building
+      the records) and converting them to dicts
+    - largest_record_elements: the number of elements of the largest record, as parsed, before fields are applied
+    - peak_live_elements: the peak number of parsed elements held by the reader, i.e. the open ancestors of the
+      records, the elements of the record being parsed and those of the finished records not yet yielded
+    - total_seconds: the time spent inside the stats' `with` block, if used as a context manager
+
+    Used as a context manager, it calls callback (if any) with itself on exit, e.g. to send the statistics to a metrics
+    system. Readers given no stats do not collect anything, so they pay no overhead
+    """
+
+    def __init__(self, callback: Optional[Callable[['ReaderStats'], Any]] = None):
+        self.callback = callback
+        self.reset()
+
+    def reset(self):
+        """Sets all the statistics back to zero"""
+        self.bytes_read = 0
+        self.records_seen = 0
+        self.records_yielded = 0
+        self.read_seconds = 0.0
+        self.parse_seconds = 0.0
+        self.convert_seconds = 0.0
+        self.largest_record_elements = 0
+        self.peak_live_elements = 0
+        self.total_seconds = 0.0
+
+        self._records_tag: Optional[Union[str, Iterable[str]]] = None
+        self._selector = None
+        self._number_of_open_elements = 0
+        # the number of open elements when the record being parsed started, 0 when outside of any record
+        self._record_depth = 0
+        self._record_elements = 0
+        self._pending_records: List[int] = []
+        self._pending_elements = 0
+        self._entered_at: Optional[float] = None
+
+    def as_dict(self) -> Dict[str, Union[int, float]]:
+        """Returns the statistics as a dict, e.g. to be sent to a metrics system"""
+        return {key: value for key, value in vars(self).items() if not key.startswith('_') and key != 'callback'}
+
+    def __enter__(self) -> 'ReaderStats':
+        self._entered_at = perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.total_seconds += perf_counter() - self._entered_at
+        if self.callback is not None:
+            self.callback(self)
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__name__, ', '.join(
+            '{}={}'.format(key, round(value, 6) if isinstance(value, float) else value)
+            for key, value in self.as_dict().items()))
+
+    def _start_reading(self, records_tag: Optional[Union[str, Iterable[str]]]):
+        """Called by the readers before a read"""
+        self._records_tag = records_tag
+        self._selector = get_records_selector(records_tag)
+        self._number_of_open_elements = self._record_depth = self._record_elements = self._pending_elements = 0
+        self._pending_records = []
+
+    def _iter_timed_chunks(self, chunks: Iterable) -> Iterator:
+        """Yields the chunks, timing how long each takes to be read and counting their sizes"""
+        iterator = iter(chunks)
+
+        while True:
+            start = perf_counter()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                self.read_seconds += perf_counter() - start
+                return
+
+            self.read_seconds += perf_counter() - start
+            self.bytes_read += len(chunk)
+            yield chunk
+
+    def _timed_feed(self, feed: Callable[[Any], None]) -> Callable[[Any], None]:
+        """Returns the feed method of a parser, timed as parsing"""
+        def timed_feed(chunk):
+            start = perf_counter()
+            feed(chunk)
+            self.parse_seconds += perf_counter() - start
+
+        return timed_feed
+
+    def _timed_convert(self, convert: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        """Returns the function converting records to dicts, timed as conversion and no longer as parsing"""
+        def timed_convert(record):
+            start = perf_counter()
+            converted_record = convert(record)
+            duration = perf_counter() - start
+            self.convert_seconds += duration
+            # conversions happen while the parser is being fed
+            self.parse_seconds -= duration
+            return converted_record
+
+        return timed_convert
+
+    def _iter_counted_records(self, records: Iterable, is_batched: bool) -> Iterator:
+        """Yields the records (or batches of records), counting them"""
+        for record in records:
+            self.records_yielded += len(record) if is_batched else 1
+            yield record
+
+    def _on_start(self, tag: str):
+        """Called for the start tag of every element"""
+        self._number_of_open_elements += 1
+        if self._selector is None:
+            is_record = tag == self._records_tag
+        else:
+            is_record = self._selector.start(tag) is not None
+
+        if self._record_depth:
+            self._record_elements += 1
+            if is_record:
+                self.records_seen += 1
+        elif is_record:
+            self.records_seen += 1
+            self._record_depth = self._number_of_open_elements
+            self._record_elements = 1
+        else:
+            return
+
+        live_elements = self._record_depth - 1 + self._record_elements + self._pending_elements
+        if live_elements > self.peak_live_elements:
+            self.peak_live_elements = live_elements
+
+    def _on_end(self, tag: str, is_kept: bool = True):
+        """Called for the end tag of every element, is_kept being False if a record ending there was filtered out"""
+        if self._selector is not None:
+            self._selector.end()
+
+        if self._record_depth == self._number_of_open_elements:
+            if self._record_elements > self.largest_record_elements:
+                self.largest_record_elements = self._record_elements
+            if is_kept:
+                self._pending_records.append(self._record_elements)
+                self._pending_elements += self._record_elements
+            self._record_depth = self._record_elements = 0
+
+        self._number_of_open_elements -= 1
+
+    def _on_records_released(self, number_of_records_left: int = 0):
+        """Called once the finished records have been yielded, but for the number_of_records_left last ones"""
+        number_of_released_records = len(self._pending_records) - number_of_records_left
+        if number_of_released_records > 0:
+            self._pending_elements -= sum(self._pending_records[:number_of_released_records])
+            del self._pending_records[:number_of_released_records]
+
+
+class InstrumentedTarget:
+    """A parser target passing the parser's events on to a records builder, counting them in the stats"""
+
+    def __init__(self, builder: Any, stats: ReaderStats):
+        self._builder = builder
+        self._stats = stats
+        self.records = builder.records
+        self.data = builder.data
+        self.close = builder.close
+
+    def start(self, tag: str, attrib: Dict[str, str]):
+        """Called by the parser for each start tag"""
+        self._stats._on_start(tag)
+        self._builder.start(tag, attrib)
+
+    def end(self, tag: str):
+        """Called by the parser for each end tag"""
+        number_of_records = len(self.records)
+        self._builder.end(tag)
+        self._stats._on_end(tag, is_kept=len(self.records) > number_of_records)